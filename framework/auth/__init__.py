@@ -15,6 +15,7 @@ from website import settings
 
 from .core import User, Auth
 from .core import get_user
+from . import signals
 
 
 __all__ = [
@@ -153,6 +154,8 @@ def logout():
             del session.data[key]
         except KeyError:
             pass
+    if session._get_current_object() is not None:
+        signals.user_logged_out.send(session._id)
     return True
 
 
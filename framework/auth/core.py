@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 import re
+import heapq
+import bisect
 import logging
 import urlparse
 import itertools
@@ -1002,8 +1004,10 @@ class User(GuidStoredObject, AddonModelMixin):
         watched_nodes = [each.node for each in self.watched]
         if watch_config.node in watched_nodes:
             raise ValueError('Node is already being watched.')
+        from website.project import counters
         watch_config.save()
         self.watched.append(watch_config)
+        counters.increment(watch_config.node._id, watchers=1)
         return None
 
     def unwatch(self, watch_config):
@@ -1016,7 +1020,9 @@ class User(GuidStoredObject, AddonModelMixin):
         """
         for each in self.watched:
             if watch_config.node._id == each.node._id:
+                from website.project import counters
                 each.__class__.remove_one(each)
+                counters.increment(watch_config.node._id, watchers=-1)
                 return None
         raise ValueError('Node not being watched.')
 
@@ -1025,31 +1031,47 @@ class User(GuidStoredObject, AddonModelMixin):
         watched_node_ids = set([config.node._id for config in self.watched])
         return node._id in watched_node_ids
 
-    def get_recent_log_ids(self, since=None):
-        '''Return a generator of recent logs' ids.
+    def get_recent_log_ids(self, since=None, before=None):
+        '''Return a generator of recent logs' ids, newest first.
 
         :param since: A datetime specifying the oldest time to retrieve logs
         from. If ``None``, defaults to 60 days before today. Must be a tz-aware
         datetime because PyMongo's generation times are tz-aware.
+        :param str before: Only return ids older than this log id; used as a
+        cursor to fetch the next page of results
 
         :rtype: generator of log ids (strings)
         '''
-        log_ids = []
+        return _merge_reversed(self._get_watched_log_id_windows(since, before))
+
+    def count_recent_log_ids(self, since=None):
+        '''Return the number of distinct ids yielded by `get_recent_log_ids`
+        without merging them.
+        '''
+        windows = self._get_watched_log_id_windows(since)
+        return len(set(itertools.chain.from_iterable(windows)))
+
+    def _get_watched_log_id_windows(self, since=None, before=None):
+        '''For each watched node, return its log ids created after ``since``
+        and before the log id ``before`` as an ascending list.
+        '''
         # Default since to 60 days before today if since is None
         # timezone aware utcnow
         utcnow = dt.datetime.utcnow().replace(tzinfo=pytz.utc)
         since_date = since or (utcnow - dt.timedelta(days=60))
+        # The first 4 bytes of Mongo's ObjectId encode its creation time, so
+        # comparing ids against the smallest id generated after `since_date`
+        # filters by time without loading each log
+        since_id = str(bson.ObjectId.from_datetime(since_date + dt.timedelta(seconds=1)))
+        windows = []
         for config in self.watched:
-            # Extract the timestamps for each log from the log_id (fast!)
-            # The first 4 bytes of Mongo's ObjectId encodes time
-            # This prevents having to load each Log Object and access their
-            # date fields
-            node_log_ids = [log_id for log_id in config.node.logs._to_primary_keys()
-                                   if bson.ObjectId(log_id).generation_time > since_date and
-                                   log_id not in log_ids]
-            # Log ids in reverse chronological order
-            log_ids = _merge_into_reversed(log_ids, node_log_ids)
-        return (l_id for l_id in log_ids)
+            # Logs are appended in creation order, so sorting is linear
+            node_log_ids = sorted(config.node.logs._to_primary_keys())
+            start = bisect.bisect_left(node_log_ids, since_id)
+            stop = bisect.bisect_left(node_log_ids, before) if before else len(node_log_ids)
+            if start < stop:
+                windows.append(node_log_ids[start:stop])
+        return windows
 
     def get_daily_digest_log_ids(self):
         '''Return a generator of log ids generated in the past day
@@ -1209,7 +1231,26 @@ class User(GuidStoredObject, AddonModelMixin):
         return len(self.get_projects_in_common(other_user, primary_keys=True))
 
 
-def _merge_into_reversed(*iterables):
-    '''Merge multiple sorted inputs into a single output in reverse order.
+def _merge_reversed(windows):
+    '''Merge ascending lists of ids into a single de-duplicated stream in
+    descending order. Performs a k-way merge with a heap, so taking the first
+    n ids costs O(n log k) for k lists.
     '''
-    return sorted(itertools.chain(*iterables), reverse=True)
+    # Heap entries are (-int(id), id, list index, position in list)
+    heap = [
+        (-int(window[-1], 16), window[-1], index, len(window) - 1)
+        for index, window in enumerate(windows)
+    ]
+    heapq.heapify(heap)
+    last = None
+    while heap:
+        _, log_id, index, position = heap[0]
+        if position:
+            next_id = windows[index][position - 1]
+            heapq.heapreplace(heap, (-int(next_id, 16), next_id, index, position - 1))
+        else:
+            heapq.heappop(heap)
+        # The same log may belong to several watched nodes, e.g. forks
+        if log_id != last:
+            last = log_id
+            yield log_id
@@ -6,6 +6,7 @@ signals = blinker.Namespace()
 user_registered = signals.signal('user-registered')
 user_confirmed = signals.signal('user-confirmed')
 user_email_removed = signals.signal('user-email-removed')
+user_logged_out = signals.signal('user-logged-out')
 
 contributor_removed = signals.signal('contributor-removed')
 node_deleted = signals.signal('node-deleted')
\ No newline at end of file
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""In-process caches with expiry, a size bound, and hit/miss counters."""
+
+import time
+import threading
+import collections
+
+
+class TTLCache(object):
+    """Thread-safe cache holding at most ``maxsize`` entries. Entries expire
+    ``ttl`` seconds after being set; when the cache is full, the least recently
+    used entry is evicted.
+
+    :param int maxsize: Maximum number of entries
+    :param ttl: Seconds before entries expire, or `None` to never expire
+    :param group: Optional function mapping keys to groups; the entries of a
+        group can be deleted together with `delete_group`
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, group=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.group = group
+        # Maps key => (expiration timestamp, value); ordered by recency of use
+        self._data = collections.OrderedDict()
+        # Maps group => set of keys, if entries are grouped
+        self._groups = collections.defaultdict(set)
+        self._lock = threading.RLock()
+        self.stats = collections.Counter()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, value = self._data.pop(key)
+            except KeyError:
+                self.stats['misses'] += 1
+                return default
+            if expires is not None and expires <= time.time():
+                self._ungroup(key)
+                self.stats['misses'] += 1
+                self.stats['expirations'] += 1
+                return default
+            self._data[key] = (expires, value)
+            self.stats['hits'] += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (expires, value)
+            if self.group is not None:
+                self._groups[self.group(key)].add(key)
+            while len(self._data) > self.maxsize:
+                evicted, _ = self._data.popitem(last=False)
+                self._ungroup(evicted)
+                self.stats['evictions'] += 1
+
+    def _ungroup(self, key):
+        if self.group is None:
+            return
+        group = self.group(key)
+        keys = self._groups.get(group)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._groups[group]
+
+    def delete(self, key):
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self._ungroup(key)
+
+    def delete_matching(self, predicate):
+        """Delete every entry whose key satisfies ``predicate``. Scans all
+        entries; prefer `delete_group` where entries are grouped.
+        """
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+                self._ungroup(key)
+                self.stats['invalidations'] += 1
+
+    def delete_group(self, group):
+        """Delete every entry in ``group``, in time proportional to the size
+        of the group.
+        """
+        with self._lock:
+            for key in self._groups.pop(group, ()):
+                del self._data[key]
+                self.stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._groups.clear()
+
+    def metrics(self):
+        """Return hit/miss counters, current size, and hit rate.
+        """
+        metrics = dict(self.stats)
+        lookups = self.stats['hits'] + self.stats['misses']
+        metrics.update({
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hit_rate': self.stats['hits'] / float(lookups) if lookups else None,
+        })
+        return metrics
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+import pymongo
+from modularodm import fields
+
+from framework.mongo import StoredObject
+
+from website import settings
+
+
+class CacheStamp(StoredObject):
+    """Version of a set of cached data, incremented by any process that
+    changes the records the data is derived from. See `framework.caching.stamps`.
+    """
+
+    _id = fields.StringField(primary=True)
+    version = fields.IntegerField(default=0)
+    date_modified = fields.DateTimeField(auto_now=True)
+
+    __indices__ = [
+        # Expire stamps that have not been bumped for CACHE_STAMP_TTL seconds
+        {
+            'key_or_list': [('date_modified', pymongo.ASCENDING)],
+            'expireAfterSeconds': settings.CACHE_STAMP_TTL,
+        },
+    ]
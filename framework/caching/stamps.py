@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Version stamps shared by all processes through the database.
+
+A process caching data derived from database records reads the stamps that
+cover the data before computing it and stores them with the cache entry. A
+process that changes those records bumps the stamps, so that every process
+discards its entries on their next read. Reading stamps costs one query by
+primary key, however many stamps are read.
+
+Stamps expire `settings.CACHE_STAMP_TTL` seconds after they were last bumped,
+which restarts their versions at zero; caches using stamps must expire their
+entries well before then.
+"""
+
+import datetime
+
+from framework.mongo import database
+
+from framework.caching.model import CacheStamp
+
+
+def get_collection():
+    return database[CacheStamp._name]
+
+
+def bump(name):
+    """Invalidate cached data covered by the stamp ``name`` in all processes.
+    """
+    get_collection().update(
+        {'_id': name},
+        {
+            '$inc': {'version': 1},
+            '$set': {'date_modified': datetime.datetime.utcnow()},
+        },
+        upsert=True,
+        manipulate=False,
+    )
+
+
+def get_stamps(*names):
+    """Read the current versions of several stamps with a single query.
+
+    :return: Tuple of versions, in the order of ``names``
+    """
+    versions = {
+        each['_id']: each['version']
+        for each in get_collection().find({'_id': {'$in': list(names)}})
+    }
+    return tuple(versions.get(name, 0) for name in names)
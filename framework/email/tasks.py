@@ -1,5 +1,11 @@
+import os
+import time
+import socket
 import smtplib
 import logging
+import threading
+import contextlib
+import collections
 from email.mime.text import MIMEText
 
 from framework.tasks import app
@@ -7,6 +13,160 @@ from website import settings
 
 logger = logging.getLogger(__name__)
 
+# Errors after which an SMTP connection can no longer be used
+CONNECTION_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    socket.error,
+)
+
+
+class SMTPConnectionPool(object):
+    """Per-process pool of authenticated SMTP connections, so that EHLO,
+    STARTTLS and LOGIN run once per connection rather than once per message.
+    Connections are keyed on server and credentials. Idle connections are
+    checked with NOOP before reuse and are retired after
+    `settings.MAIL_CONNECTION_MAX_MESSAGES` messages; the pool is emptied
+    after a fork.
+    """
+
+    def __init__(self):
+        # Maps key => list of [connection, last used timestamp, messages sent]
+        self._idle = collections.defaultdict(list)
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self.stats = collections.Counter()
+
+    @contextlib.contextmanager
+    def connection(self, mail_server, ttls=True, login=True, username=None, password=None):
+        """Check out a connection for the duration of the block. Connections
+        that raise one of `CONNECTION_ERRORS` are discarded rather than
+        returned to the pool.
+        """
+        key = (mail_server, ttls, login, username, password)
+        entry = self._checkout(key)
+        try:
+            yield entry[0]
+        except CONNECTION_ERRORS:
+            self._close(entry[0])
+            raise
+        except Exception:
+            # e.g. a rejected recipient; the session itself is still usable
+            self._checkin(key, entry)
+            raise
+        else:
+            entry[1] = time.time()
+            entry[2] += 1
+            self._checkin(key, entry)
+
+    def reset(self):
+        """Close all idle connections opened by the current process.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, collections.defaultdict(list)
+            inherited = self._pid != os.getpid()
+            self._pid = os.getpid()
+        if not inherited:
+            for entries in idle.values():
+                for entry in entries:
+                    self._close(entry[0])
+
+    def metrics(self):
+        metrics = dict(self.stats)
+        metrics['idle'] = sum(len(entries) for entries in self._idle.values())
+        return metrics
+
+    def _checkout(self, key):
+        if self._pid != os.getpid():
+            self.reset()
+        while True:
+            with self._lock:
+                entries = self._idle[key]
+                entry = entries.pop() if entries else None
+            if entry is None:
+                break
+            if time.time() - entry[1] < settings.MAIL_CONNECTION_MAX_IDLE:
+                self.stats['reused'] += 1
+                return entry
+            try:
+                entry[0].noop()
+            except CONNECTION_ERRORS:
+                self.stats['stale'] += 1
+                self._close(entry[0])
+            else:
+                self.stats['reused'] += 1
+                return entry
+        self.stats['connects'] += 1
+        return [self._connect(*key), time.time(), 0]
+
+    def _checkin(self, key, entry):
+        if entry[2] >= settings.MAIL_CONNECTION_MAX_MESSAGES:
+            self._close(entry[0])
+            return
+        with self._lock:
+            entries = self._idle[key]
+            if len(entries) < settings.MAIL_POOL_SIZE:
+                entries.append(entry)
+                return
+        self._close(entry[0])
+
+    def _connect(self, mail_server, ttls, login, username, password):
+        s = smtplib.SMTP(mail_server)
+        s.ehlo()
+        if ttls:
+            s.starttls()
+            s.ehlo()
+        if login:
+            s.login(username, password)
+        return s
+
+    def _close(self, connection):
+        self.stats['closed'] += 1
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, socket.error):
+            connection.close()
+
+
+connection_pool = SMTPConnectionPool()
+
+
+def _build_message(from_addr, to_addr, subject, message, mimetype):
+    msg = MIMEText(message, mimetype, _charset='utf-8')
+    msg['Subject'] = subject
+    msg['From'] = from_addr
+    msg['To'] = to_addr
+    return msg
+
+
+def _send(connection_kwargs, from_addr, to_addr, msg):
+    """Send ``msg`` over a pooled connection, retrying once on a fresh
+    connection if the pooled one was dropped by the server.
+    """
+    for attempt in range(2):
+        try:
+            with connection_pool.connection(**connection_kwargs) as s:
+                s.sendmail(
+                    from_addr=from_addr,
+                    to_addrs=[to_addr],
+                    msg=msg.as_string()
+                )
+            return
+        except smtplib.SMTPServerDisconnected:
+            if attempt:
+                raise
+            logger.warning('SMTP connection dropped; reconnecting.')
+
+
+def _get_connection_kwargs(ttls, login, username, password, mail_server):
+    return {
+        'mail_server': mail_server or settings.MAIL_SERVER,
+        'ttls': ttls,
+        'login': login,
+        'username': username or settings.MAIL_USERNAME,
+        'password': password or settings.MAIL_PASSWORD,
+    }
+
 
 @app.task
 def send_email(from_addr, to_addr, subject, message, mimetype='html', ttls=True, login=True,
@@ -22,32 +182,47 @@ def send_email(from_addr, to_addr, subject, message, mimetype='html', ttls=True,
 
     :return: True if successful
     """
-    username = username or settings.MAIL_USERNAME
-    password = password or settings.MAIL_PASSWORD
-    mail_server = mail_server or settings.MAIL_SERVER
+    connection_kwargs = _get_connection_kwargs(ttls, login, username, password, mail_server)
 
     if not settings.USE_EMAIL:
         return
-    if login and (username is None or password is None):
+    if login and (connection_kwargs['username'] is None or connection_kwargs['password'] is None):
         logger.error('Mail username and password not set; skipping send.')
         return
 
-    msg = MIMEText(message, mimetype, _charset='utf-8')
-    msg['Subject'] = subject
-    msg['From'] = from_addr
-    msg['To'] = to_addr
-
-    s = smtplib.SMTP(mail_server)
-    s.ehlo()
-    if ttls:
-        s.starttls()
-        s.ehlo()
-    if login:
-        s.login(username, password)
-    s.sendmail(
-        from_addr=from_addr,
-        to_addrs=[to_addr],
-        msg=msg.as_string()
-    )
-    s.quit()
+    msg = _build_message(from_addr, to_addr, subject, message, mimetype)
+    _send(connection_kwargs, from_addr, to_addr, msg)
     return True
+
+
+@app.task
+def send_emails(messages, ttls=True, login=True, username=None, password=None, mail_server=None):
+    """Send several emails over a single pooled SMTP session. A failure to
+    deliver one message does not prevent delivery of the others.
+
+    :param list messages: Dicts with `from_addr`, `to_addr`, `subject`,
+        `message`, and optionally `mimetype` keys
+    :return: Dict mapping each recipient whose message failed to the error
+        message, or `None` if email is disabled
+    """
+    connection_kwargs = _get_connection_kwargs(ttls, login, username, password, mail_server)
+
+    if not settings.USE_EMAIL:
+        return
+    if login and (connection_kwargs['username'] is None or connection_kwargs['password'] is None):
+        logger.error('Mail username and password not set; skipping send.')
+        return
+
+    failures = {}
+    for each in messages:
+        msg = _build_message(
+            each['from_addr'], each['to_addr'], each['subject'],
+            each['message'], each.get('mimetype', 'html'),
+        )
+        try:
+            _send(connection_kwargs, each['from_addr'], each['to_addr'], msg)
+        except (smtplib.SMTPException, socket.error) as error:
+            logger.exception('Could not send email to {0}'.format(each['to_addr']))
+            failures[each['to_addr']] = str(error)
+    logger.info('Sent {0} of {1} emails'.format(len(messages) - len(failures), len(messages)))
+    return failures
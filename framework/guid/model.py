@@ -3,6 +3,7 @@
 from modularodm import fields
 
 from framework.mongo import StoredObject
+from framework.guid.resolution import invalidate_resolution
 
 
 class Guid(StoredObject):
@@ -17,6 +18,12 @@ class Guid(StoredObject):
     def __repr__(self):
         return '<id:{0}, referent:({1}, {2})>'.format(self._id, self.referent._primary_key, self.referent._name)
 
+    def save(self, *args, **kwargs):
+        saved_fields = super(Guid, self).save(*args, **kwargs)
+        if 'referent' in saved_fields:
+            invalidate_resolution(self._primary_key)
+        return saved_fields
+
 
 class GuidStoredObject(StoredObject):
     """Subclass of `StoredObject` that provisions a `Guid` for each new instance
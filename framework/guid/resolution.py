@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Cache of GUID resolutions. Resolving `/<guid>/<suffix>/` takes a `Guid`
+lookup, a load of the referent, and a match of the referent's `deep_url`
+against the URL map; the outcome is cached so that repeat visits can load
+the referent by primary key and call the target view directly.
+
+Entries are dropped when the referent of the GUID changes. Each entry records
+the `deep_url` it was resolved from, which is compared against the referent
+loaded on each hit, so that entries for referents whose URL changed or that
+were removed, in any process, are not used.
+"""
+
+import collections
+
+from framework.caching import TTLCache
+
+from website import settings
+
+
+Resolution = collections.namedtuple(
+    'Resolution',
+    ['model', 'primary_key', 'deep_url', 'endpoint', 'view_kwargs'],
+)
+
+# Maps (GUID, suffix, method) => Resolution; entries are grouped by GUID
+resolution_cache = TTLCache(
+    maxsize=settings.GUID_RESOLUTION_CACHE_SIZE,
+    ttl=settings.GUID_RESOLUTION_CACHE_TTL,
+    group=lambda key: key[0],
+)
+
+
+def get_resolution(guid, suffix, method):
+    return resolution_cache.get((guid, suffix, method))
+
+
+def set_resolution(guid, suffix, method, resolution):
+    resolution_cache.set((guid, suffix, method), resolution)
+
+
+def invalidate_resolution(guid):
+    resolution_cache.delete_group(guid)
+
+
+def metrics():
+    return resolution_cache.metrics()
@@ -3,12 +3,16 @@
 from modularodm import FlaskStoredObject as StoredObject
 
 from bson import ObjectId
-from .handlers import client, database, set_up_storage
+from .handlers import client, client_pool, database, set_up_storage
+from .identity import load_many, prefetch
 
 __all__ = [
     'StoredObject',
     'ObjectId',
     'client',
+    'client_pool',
     'database',
+    'load_many',
+    'prefetch',
     'set_up_storage',
 ]
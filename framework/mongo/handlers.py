@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import os
+import time
 import logging
+import threading
+import collections
 
 import pymongo
+from pymongo.errors import ConnectionFailure
 from flask import g
 from werkzeug.local import LocalProxy
 
@@ -12,10 +17,12 @@ from website import settings
 logger = logging.getLogger(__name__)
 
 
-def get_mongo_client():
+def get_mongo_client(**kwargs):
     """Create MongoDB client and authenticate database.
+
+    :param kwargs: Extra keyword arguments passed to `MongoClient`
     """
-    client = pymongo.MongoClient(settings.DB_HOST, settings.DB_PORT)
+    client = pymongo.MongoClient(settings.DB_HOST, settings.DB_PORT, **kwargs)
 
     db = client[settings.DB_NAME]
 
@@ -25,17 +32,109 @@ def get_mongo_client():
     return client
 
 
+class ClientPool(object):
+    """Process-wide MongoDB client. The client is created lazily on first use
+    and shared by every request handled by the current process; sockets are
+    pooled by pymongo up to `settings.DB_MAX_POOL_SIZE`. The client is rebuilt
+    after a fork (uWSGI workers, Celery prefork children) and after a failed
+    health check.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._pid = None
+        self._last_checked = 0
+        self._lock = threading.Lock()
+        self.stats = collections.Counter()
+
+    def get(self):
+        """Return the client for the current process, connecting if needed.
+        """
+        pid = os.getpid()
+        if self._client is None or self._pid != pid:
+            with self._lock:
+                if self._client is None or self._pid != pid:
+                    self._connect(pid)
+        elif time.time() - self._last_checked > settings.DB_HEALTH_CHECK_INTERVAL:
+            self._check()
+        self.stats['checkouts'] += 1
+        return self._client
+
+    def reset(self):
+        """Discard the current client; the next call to `get` reconnects.
+        Sockets inherited from a parent process are left for the parent to
+        close.
+        """
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._client = None
+            self._pid = None
+
+    def metrics(self):
+        """Return pool counters for the current process.
+        """
+        metrics = dict(self.stats)
+        metrics.update({
+            'pid': self._pid,
+            'connected': self._client is not None,
+            'max_pool_size': settings.DB_MAX_POOL_SIZE,
+        })
+        return metrics
+
+    def _connect(self, pid):
+        if self._pid is not None and self._pid != pid:
+            self.stats['forks'] += 1
+        self._client = get_mongo_client(max_pool_size=settings.DB_MAX_POOL_SIZE)
+        self._pid = pid
+        self._last_checked = time.time()
+        self.stats['connects'] += 1
+
+    def _check(self):
+        self._last_checked = time.time()
+        try:
+            self._client.admin.command('ping')
+        except ConnectionFailure:
+            logger.warning('Pooled MongoDB client failed health check; reconnecting.')
+            self.stats['failed_checks'] += 1
+            with self._lock:
+                self._client.close()
+                self._connect(os.getpid())
+
+
+client_pool = ClientPool()
+
+try:
+    # Only importable when running under uWSGI
+    from uwsgidecorators import postfork
+except ImportError:
+    pass
+else:
+    postfork(client_pool.reset)
+
+
 def connection_before_request():
-    """Attach MongoDB client to `g`.
+    """Attach MongoDB client to `g`. In pooled mode, pin a socket to the
+    current thread for the duration of the request so that TokuMX
+    transactions run on a single connection.
     """
-    g._mongo_client = get_mongo_client()
+    if settings.DB_POOLED_CLIENT:
+        client = client_pool.get()
+        client.start_request()
+        g._mongo_client = client
+    else:
+        g._mongo_client = get_mongo_client()
 
 
 def connection_teardown_request(error=None):
-    """Close MongoDB client if attached to `g`.
+    """Close MongoDB client if attached to `g`; release the pinned socket
+    back to the pool in pooled mode.
     """
     try:
-        g._mongo_client.close()
+        if settings.DB_POOLED_CLIENT:
+            g._mongo_client.end_request()
+        else:
+            g._mongo_client.close()
     except AttributeError:
         if not settings.DEBUG_MODE:
             logger.error('MongoDB client not attached to request.')
@@ -58,6 +157,8 @@ def _get_current_client():
     try:
         return g._mongo_client
     except (AttributeError, RuntimeError):
+        if settings.DB_POOLED_CLIENT:
+            return client_pool.get()
         return _mongo_client
 
 
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Batch loading on top of the request-scoped identity map of modular-odm.
+`StoredObject.load` serves records already loaded during the current request
+from the object cache; `load_many` fetches the records of a model that are
+not yet cached with a single `$in` query, so that later loads of any of them
+are free. Per-request counts of loads are kept so that N+1 query patterns
+show up in the logs.
+"""
+
+import logging
+import collections
+
+from flask import g, request
+from modularodm import Q
+from modularodm import signals as modm_signals
+
+
+logger = logging.getLogger(__name__)
+
+
+def load_many(model, keys):
+    """Load records of ``model`` by primary key, querying only for records
+    not already in the identity map.
+
+    :param model: `StoredObject` subclass
+    :param keys: Primary keys
+    :return: List of records in the order of ``keys``; missing records are
+        omitted
+    """
+    keys = list(keys)
+    found = {}
+    missing = []
+    for key in set(keys):
+        if model._is_cached(key):
+            found[key] = model.load(key)
+        else:
+            missing.append(key)
+    if missing:
+        record('batch_queries')
+        for each in model.find(Q(model._primary_name, 'in', missing)):
+            found[each._primary_key] = each
+    return [found[key] for key in keys if key in found]
+
+
+def prefetch(foreign_list):
+    """Load every record referenced by a list-valued `ForeignField` with a
+    single query, so that iterating over the list does not query per item.
+
+    :return: List of the referenced records
+    """
+    return load_many(foreign_list._base_class, foreign_list._to_primary_keys())
+
+
+def get_stats():
+    """Return load counts for the current request, or `None` outside of a
+    request.
+    """
+    try:
+        return g._odm_stats
+    except (AttributeError, RuntimeError):
+        return None
+
+
+def record(name, count=1):
+    stats = get_stats()
+    if stats is not None:
+        stats[name] += count
+
+
+@modm_signals.load.connect
+def count_load(cls, key=None, data=None):
+    """Classify each `StoredObject.load`: records built from query results
+    cost nothing extra, cached records are served from the identity map, and
+    anything else is a round trip to the database.
+    """
+    stats = get_stats()
+    if stats is None or data is not None:
+        return
+    if key is not None and cls._is_cached(cls._check_pk_type(key)):
+        stats['cache_hits'] += 1
+    else:
+        stats['single_queries'] += 1
+
+
+def identity_before_request():
+    g._odm_stats = collections.Counter()
+
+
+def identity_teardown_request(error=None):
+    stats = get_stats()
+    if stats is None:
+        return
+    logger.debug(
+        '{method} {path}: {single} single loads, {batch} batch loads, '
+        '{hits} cache hits'.format(
+            method=request.method,
+            path=request.path,
+            single=stats['single_queries'],
+            batch=stats['batch_queries'],
+            hits=stats['cache_hits'],
+        )
+    )
+    del g._odm_stats
+
+
+handlers = {
+    'before_request': identity_before_request,
+    'teardown_request': identity_teardown_request,
+}
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""Coordination of file render jobs.
+
+* Web processes remember which renders they started recently and do not
+  enqueue the same render again while it is pending.
+* Workers claim a render with a lock file beside its cache path, so that only
+  one worker downloads and renders a given file at a time.
+* The worker processes on a host run at most
+  `settings.MFR_MAX_CONCURRENT_RENDERS` renders at once, and fewer for
+  expensive file types. Each running render holds a slot file under
+  `settings.MFR_RENDER_SLOTS_PATH`.
+* Rendered files under `settings.MFR_CACHE_PATH` are evicted least recently
+  used first once the cache grows past `settings.MFR_CACHE_MAX_SIZE` bytes.
+"""
+
+import os
+import time
+import errno
+import logging
+import threading
+import contextlib
+
+from framework.caching import TTLCache
+
+from website import settings
+
+
+logger = logging.getLogger(__name__)
+
+LOCK_SUFFIX = '.lock'
+
+# Cache paths of renders started by this process
+pending_renders = TTLCache(
+    maxsize=settings.MFR_PENDING_RENDERS_SIZE,
+    ttl=settings.MFR_PENDING_RENDER_TTL,
+)
+_pending_lock = threading.Lock()
+
+_last_eviction = [0]
+
+
+def claim_pending(cache_path):
+    """Mark the render of ``cache_path`` as started by this process.
+
+    :return: False if this process started the same render recently
+    """
+    with _pending_lock:
+        if pending_renders.get(cache_path) is not None:
+            return False
+        pending_renders.set(cache_path, True)
+        return True
+
+
+def _is_stale(path, check_pid=False):
+    """Whether the lock file at ``path`` is older than `settings.MFR_TIMEOUT`
+    seconds or, if ``check_pid`` is set, was left behind by a process on this
+    host that died.
+    """
+    try:
+        with open(path) as fp:
+            pid = int(fp.read() or 0)
+        age = time.time() - os.path.getmtime(path)
+    except (IOError, OSError, ValueError):
+        return False
+    if age >= settings.MFR_TIMEOUT:
+        return True
+    if check_pid and pid:
+        try:
+            os.kill(pid, 0)
+        except OSError as error:
+            return error.errno == errno.ESRCH
+    return False
+
+
+def _acquire_file(path, check_pid=False):
+    """Create the lock file at ``path``, holding the current process ID,
+    unless another process holds it.
+
+    :return: True if the lock was acquired
+    """
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                raise
+            if not _is_stale(path, check_pid=check_pid):
+                return False
+            logger.warning('Removing stale render lock {0}'.format(path))
+            _release_file(path)
+        else:
+            os.write(fd, str(os.getpid()))
+            os.close(fd)
+            return True
+    return False
+
+
+def _release_file(path):
+    try:
+        os.remove(path)
+    except OSError as error:
+        if error.errno != errno.ENOENT:
+            raise
+
+
+def acquire_render_lock(cache_path):
+    """Claim the render of ``cache_path`` among all workers sharing the render
+    cache, which may span hosts; locks are only taken over once they time out.
+
+    :return: True if the lock was acquired
+    """
+    return _acquire_file(cache_path + LOCK_SUFFIX)
+
+
+def release_render_lock(cache_path):
+    _release_file(cache_path + LOCK_SUFFIX)
+
+
+def _acquire_slot(slots_path, name, limit):
+    """Take one of ``limit`` numbered slot files named after ``name``.
+
+    :return: Path of the slot file taken, or None if all are taken
+    """
+    for index in range(limit):
+        path = os.path.join(slots_path, '{0}.{1}'.format(name, index))
+        if _acquire_file(path, check_pid=True):
+            return path
+    return None
+
+
+@contextlib.contextmanager
+def render_slot(extension, slots_path=None):
+    """Reserve a render slot for a file with the given extension, without
+    waiting. Slots are shared by all processes using the same ``slots_path``.
+
+    :return: Context manager yielding True if a slot was reserved
+    """
+    slots_path = slots_path or settings.MFR_RENDER_SLOTS_PATH
+    try:
+        os.makedirs(slots_path)
+    except OSError as error:
+        if error.errno != errno.EEXIST:
+            raise
+    limits = [('all', settings.MFR_MAX_CONCURRENT_RENDERS)]
+    if extension in settings.MFR_MAX_CONCURRENT_RENDERS_BY_EXTENSION:
+        limits.append((
+            extension.lstrip('.'),
+            settings.MFR_MAX_CONCURRENT_RENDERS_BY_EXTENSION[extension],
+        ))
+    acquired = []
+    try:
+        for name, limit in limits:
+            path = _acquire_slot(slots_path, name, limit)
+            if path is None:
+                break
+            acquired.append(path)
+        yield len(acquired) == len(limits)
+    finally:
+        for path in acquired:
+            _release_file(path)
+
+
+def touch(cache_path):
+    """Record a read of a rendered file, for least recently used eviction."""
+    try:
+        os.utime(cache_path, None)
+    except OSError:
+        pass
+
+
+def evict_rendered_cache(max_size=None, cache_path=None):
+    """Remove the least recently used rendered files until the render cache
+    holds at most ``max_size`` bytes.
+
+    :return: Number of files removed
+    """
+    max_size = max_size if max_size is not None else settings.MFR_CACHE_MAX_SIZE
+    cache_path = cache_path or settings.MFR_CACHE_PATH
+
+    entries = []
+    for dirpath, _, filenames in os.walk(cache_path):
+        for filename in filenames:
+            if filename.endswith(LOCK_SUFFIX):
+                continue
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    if removed:
+        logger.info('Evicted {0} files from the render cache'.format(removed))
+    return removed
+
+
+def maybe_evict_rendered_cache():
+    """Evict from the render cache if it is bounded and this process has not
+    checked its size for `settings.MFR_CACHE_EVICTION_INTERVAL` seconds.
+    """
+    if settings.MFR_CACHE_MAX_SIZE is None:
+        return
+    now = time.time()
+    if now - _last_eviction[0] < settings.MFR_CACHE_EVICTION_INTERVAL:
+        return
+    _last_eviction[0] = now
+    evict_rendered_cache()
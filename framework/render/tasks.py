@@ -14,9 +14,9 @@ from website import settings
 from website.language import ERROR_PREFIX
 
 from framework.tasks import app
+from framework.render import scheduler
 from framework.render import exceptions
 from framework.render.core import save_to_file_or_error
-from framework.render.core import render_is_done_or_happening
 
 
 logger = logging.getLogger(__name__)
@@ -46,16 +46,18 @@ def render_mfr_error(err):
         """.format(**locals())
 
 
-# TODO only allow one task at a time
-@app.task(ignore_result=True, timeout=settings.MFR_TIMEOUT)
-def _build_rendered_html(download_url, cache_path, temp_path, public_download_url):
-    """
+@app.task(bind=True, ignore_result=True, timeout=settings.MFR_TIMEOUT,
+          max_retries=settings.MFR_RENDER_MAX_RETRIES)
+def _build_rendered_html(self, download_url, cache_path, temp_path, public_download_url):
+    """Render a file unless it is already rendered or being rendered by
+    another worker. If this worker has no render slot free for the file type,
+    the render is retried later.
+
     :param str download_url: The url to download the file to be rendered
     :param str cache_path: Location to cache the rendered file
     :param str temp_path: Where the downloaded file will be cached
     """
-
-    if render_is_done_or_happening(cache_path, temp_path):
+    if os.path.isfile(cache_path):
         return
 
     # Ensure our paths exists
@@ -64,6 +66,27 @@ def _build_rendered_html(download_url, cache_path, temp_path, public_download_ur
     ensure_path(os.path.split(temp_path)[0])
     ensure_path(os.path.split(cache_path)[0])
 
+    if not scheduler.acquire_render_lock(cache_path):
+        return
+    try:
+        # The render may have finished while we waited for the lock
+        if os.path.isfile(cache_path):
+            return
+        with scheduler.render_slot(get_file_extension(temp_path)) as reserved:
+            if reserved:
+                _render(download_url, cache_path, temp_path, public_download_url)
+    finally:
+        scheduler.release_render_lock(cache_path)
+
+    if not reserved:
+        if self.request.called_directly:
+            return
+        raise self.retry(countdown=settings.MFR_RENDER_RETRY_DELAY)
+
+    scheduler.maybe_evict_rendered_cache()
+
+
+def _render(download_url, cache_path, temp_path, public_download_url):
     rendered = None
     try:
         save_to_file_or_error(download_url, temp_path)
@@ -86,14 +109,15 @@ def _build_rendered_html(download_url, cache_path, temp_path, public_download_ur
             except MFRError as err:
                 # Rendered MFR error
                 rendered = render_mfr_error(err)
+    finally:
+        # Cleanup when we're done
+        if os.path.isfile(temp_path):
+            os.remove(temp_path)
 
     # Cache rendered content
     with codecs.open(cache_path, 'w', 'utf-8') as render_result_cache:
         render_result_cache.write(rendered)
 
-    # Cleanup when we're done
-    os.remove(temp_path)
-
 
 @app.task(ignore_result=True, timeout=settings.MFR_TIMEOUT)
 def _old_build_rendered_html(file_path, cache_dir, cache_file_name, download_url):
@@ -127,12 +151,22 @@ def _old_build_rendered_html(file_path, cache_dir, cache_file_name, download_url
     return True
 
 
+def build_rendered_html(download_url, cache_path, temp_path, public_download_url):
+    """Start rendering a file, unless this process started the same render
+    recently.
+    """
+    if not scheduler.claim_pending(cache_path):
+        return
+    if settings.USE_CELERY:
+        _build_rendered_html.delay(download_url, cache_path, temp_path, public_download_url)
+    else:
+        _build_rendered_html(download_url, cache_path, temp_path, public_download_url)
+
+
 if settings.USE_CELERY:
-    build_rendered_html = _build_rendered_html.delay
     old_build_rendered_html = _old_build_rendered_html.delay
 else:
     #Expose render function
-    build_rendered_html = _build_rendered_html
     old_build_rendered_html = _old_build_rendered_html
 
 
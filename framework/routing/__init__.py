@@ -1,19 +1,24 @@
 # -*- coding: utf-8 -*-
 import os
+import re
+import time
 import logging
 import copy
 import json
 import functools
+import itertools
 import httplib as http
+from HTMLParser import HTMLParser
 
-import lxml.html
 import werkzeug.wrappers
 from werkzeug.exceptions import NotFound
+from werkzeug.datastructures import ImmutableDict
 from mako.template import Template
 from mako.lookup import TemplateLookup
 from flask import request, make_response
 
 from framework import sentry
+from framework.caching import TTLCache
 from framework.flask import app, redirect
 from framework.sessions import session
 from framework.exceptions import HTTPError
@@ -110,17 +115,80 @@ def wrap_with_renderer(fn, renderer, renderer_kwargs=None, debug_mode=True):
     return wrapped
 
 
+def freeze(data):
+    """Return an immutable copy of ``data``, converting dictionaries to
+    `ImmutableDict`, lists to tuples, and sets to frozensets recursively.
+    """
+    if isinstance(data, dict):
+        return ImmutableDict(
+            (key, freeze(value))
+            for key, value in data.iteritems()
+        )
+    if isinstance(data, (list, tuple)):
+        return tuple(freeze(value) for value in data)
+    if isinstance(data, set):
+        return frozenset(data)
+    return data
+
+
 def data_to_lambda(data):
     """Create a lambda function that takes arbitrary arguments and returns
-    a deep copy of the passed data. This function must deep copy the data,
-    else other code operating on the returned data can change the return value
-    of the lambda.
+    a shallow copy of the passed data. Nested values are frozen once, so
+    other code operating on the returned data cannot change the return value
+    of the lambda, and no deep copy is needed per request.
+
+    """
+    frozen = freeze(data)
+    if isinstance(frozen, dict):
+        return lambda *args, **kwargs: dict(frozen)
+    return lambda *args, **kwargs: frozen
+
+
+# Rendered responses of constant-data web routes, for anonymous visitors
+page_cache = TTLCache(
+    maxsize=settings.STATIC_PAGE_CACHE_SIZE,
+    ttl=settings.STATIC_PAGE_CACHE_TTL,
+)
+
+# Session keys that make a page specific to the visitor
+VISITOR_SESSION_KEYS = ['auth_user_id', 'auth_error_code', 'status']
+
 
+def is_anonymous_request():
+    """Whether the current request is a GET from a visitor who is not logged
+    in and has no pending status messages.
     """
-    return lambda *args, **kwargs: copy.deepcopy(data)
+    if request.method != 'GET':
+        return False
+    if not session:
+        return True
+    return not any(session.data.get(key) for key in VISITOR_SESSION_KEYS)
+
+
+def cache_anonymous_page(view_func, endpoint):
+    """Wrap a rendered view whose data never changes so that its response
+    to anonymous visitors is rendered once per URL and then served from
+    `page_cache`.
+    """
+    @functools.wraps(view_func)
+    def wrapped(*args, **kwargs):
+        if not settings.STATIC_PAGE_CACHE_TTL or not is_anonymous_request():
+            return view_func(*args, **kwargs)
+        key = (endpoint, request.full_path)
+        cached = page_cache.get(key)
+        if cached is None:
+            response = make_response(view_func(*args, **kwargs))
+            if response.status_code != http.OK:
+                return response
+            cached = (response.get_data(), response.status_code, dict(response.headers))
+            page_cache.set(key, cached)
+        return make_response(*cached)
+    return wrapped
 
 
 view_functions = {}
+# Renderers of web routes; used to warm the template cache
+web_renderers = []
 
 def process_rules(app, rules, prefix=''):
     """Add URL routes to Flask / Werkzeug lookup table.
@@ -156,6 +224,9 @@ def process_rules(app, rules, prefix=''):
                 route.replace('/', '') for route in rule.routes
             )
 
+        if isinstance(rule.renderer, WebRenderer) and rule.renderer not in web_renderers:
+            web_renderers.append(rule.renderer)
+
         # Wrap view function with renderer
         wrapped_view_func = wrap_with_renderer(
             view_func,
@@ -164,6 +235,11 @@ def process_rules(app, rules, prefix=''):
             debug_mode=app.debug
         )
 
+        # Constant pages look the same to every anonymous visitor
+        if not (app.debug or callable(rule.view_func_or_data)) \
+                and isinstance(rule.renderer, WebRenderer):
+            wrapped_view_func = cache_anonymous_page(wrapped_view_func, endpoint)
+
         # Add routes
         for url in rule.routes:
             app.add_url_rule(
@@ -183,23 +259,88 @@ def render_mustache_string(tpl_string, data):
 def render_jinja_string(tpl, data):
     pass
 
-mako_cache = {}
-def render_mako_string(tpldir, tplname, data):
+class TemplateCache(object):
+    """Bounded cache of compiled Mako templates keyed on template path. When
+    ``check_mtime`` is set or the app is in debug mode, templates whose files
+    have changed since compilation are recompiled.
 
-    tpl = mako_cache.get(tplname)
-    if tpl is None:
-        tpl = Template(
-            open(os.path.join(tpldir, tplname)).read(),
-            lookup=_tpl_lookup,
-            input_encoding='utf-8',
-            output_encoding='utf-8',
-        )
-    # Don't cache in debug mode
-    if not app.debug:
-        mako_cache[tplname] = tpl
+    :param int maxsize: Maximum number of compiled templates
+    :param bool check_mtime: Compare file modification times on each lookup
+    """
+
+    def __init__(self, maxsize, check_mtime=False):
+        self.check_mtime = check_mtime
+        self._cache = TTLCache(maxsize=maxsize)
+
+    def get(self, path):
+        """Return the compiled template at ``path``, compiling it if needed.
+
+        :raises: IOError if the template file cannot be read
+        """
+        entry = self._cache.get(path)
+        if entry is not None:
+            template, mtime = entry
+            if not (self.check_mtime or app.debug) or _get_mtime(path) == mtime:
+                return template
+            self._cache.stats['stale'] += 1
+        mtime = _get_mtime(path)
+        with open(path) as fp:
+            template = Template(
+                fp.read(),
+                lookup=_tpl_lookup,
+                input_encoding='utf-8',
+                output_encoding='utf-8',
+            )
+        self._cache.set(path, (template, mtime))
+        return template
+
+    def warm(self, paths):
+        """Compile each template in ``paths``, skipping unreadable files.
+        """
+        for path in paths:
+            try:
+                self.get(path)
+            except IOError:
+                logger.warning('Could not compile template {}'.format(path))
+
+    def clear(self):
+        self._cache.clear()
+
+    def metrics(self):
+        """Return hit, miss, stale and eviction counters.
+        """
+        return self._cache.metrics()
+
+
+def _get_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+template_cache = TemplateCache(
+    maxsize=settings.TEMPLATE_CACHE_SIZE,
+    check_mtime=settings.TEMPLATE_CACHE_CHECK_MTIME,
+)
+
+
+def render_mako_string(tpldir, tplname, data):
+    tpl = template_cache.get(os.path.join(tpldir, tplname))
     return tpl.render(**data)
 
 
+def warm_template_cache():
+    """Compile the Mako templates of all web routes added with
+    `process_rules`. Call once per worker before serving requests.
+    """
+    template_cache.warm(
+        os.path.join(renderer.template_dir, renderer.template_name)
+        for renderer in web_renderers
+        if renderer.template_name and renderer.renderer is render_mako_string
+    )
+
+
 renderer_extension_map = {
     '.stache': render_mustache_string,
     '.jinja': render_jinja_string,
@@ -219,6 +360,30 @@ def unpack(data, n=4):
     return data + (None,) * (n - len(data))
 
 
+def match_url(url):
+    """Look up the endpoint and view kwargs for a given URL.
+
+    :param url: URL to match
+    :return: Tuple of endpoint and view kwargs
+    :raises: NotFound, MethodNotAllowed if no route matches
+
+    """
+    # Get URL map, passing current request method; else method defaults to GET
+    return app.url_map.bind('').match(url, method=request.method)
+
+
+def dispatch(endpoint, view_kwargs):
+    """Call Flask view function for a given endpoint.
+
+    :param endpoint: Endpoint name
+    :param view_kwargs: Keyword arguments to view function
+    :return: Return value of view function, wrapped in Werkzeug Response
+
+    """
+    response = app.view_functions[endpoint](**view_kwargs)
+    return make_response(response)
+
+
 def proxy_url(url):
     """Call Flask view function for a given URL.
 
@@ -226,10 +391,7 @@ def proxy_url(url):
     :return: Return value of view function, wrapped in Werkzeug Response
 
     """
-    # Get URL map, passing current request method; else method defaults to GET
-    match = app.url_map.bind('').match(url, method=request.method)
-    response = app.view_functions[match[0]](**match[1])
-    return make_response(response)
+    return dispatch(*match_url(url))
 
 
 def call_url(url, view_kwargs=None):
@@ -260,6 +422,71 @@ def call_url(url, view_kwargs=None):
 
     return rv
 
+
+# Matches empty elements carrying a `mod-meta` attribute, e.g.
+# <div class="widget" mod-meta='{"tpl": "name.mako"}'></div>
+MOD_META_PATTERN = re.compile(
+    r"""(?P<open><(?P<tag>[a-zA-Z][\w-]*)[^>]*?\smod-meta=(?P<quote>['"])"""
+    r"""(?P<meta>.*?)(?P=quote)[^>]*>)\s*(?P<close></(?P=tag)\s*>)""",
+    re.DOTALL,
+)
+_html_parser = HTMLParser()
+
+
+def parse_include(attributes_string):
+    """Parse the `mod-meta` attribute of an embedded template.
+
+    :return: 2-tuple: (<parsed attribute>, <error HTML or None>)
+    """
+    try:
+        return json.loads(attributes_string), None
+    except ValueError:
+        return None, '<div>No JSON object could be decoded: {}</div>'.format(
+            attributes_string
+        )
+
+
+def call_include_uri(element_meta):
+    """Call the sub-view named by the `uri` of an embedded template.
+
+    :return: 3-tuple: (<view data>, <error HTML or None>, <seconds elapsed>)
+    """
+    uri = element_meta.get('uri')
+    if not uri:
+        return {}, None, 0
+    start = time.time()
+    # Catch errors and return appropriate debug divs
+    # todo: add debug parameter
+    try:
+        uri_data = call_url(uri, view_kwargs=element_meta.get('view_kwargs', {}))
+    except NotFound:
+        return None, '<div>URI {} not found</div>'.format(uri), 0
+    except Exception as error:
+        logger.exception(error)
+        error_msg = element_meta.get('error', None)
+        if error_msg:
+            return None, '<div>{}</div>'.format(error_msg), 0
+        return None, '<div>Error retrieving URI {}: {}</div>'.format(
+            uri,
+            repr(error)
+        ), 0
+    return uri_data, None, time.time() - start
+
+
+def log_include_timing(element_meta, call_seconds, render_seconds):
+    """Log the time spent on an embedded template; slow embeds are logged as
+    warnings.
+    """
+    total_ms = (call_seconds + render_seconds) * 1000
+    log = logger.warning if total_ms > settings.NESTED_RENDER_SLOW_MS else logger.debug
+    log('Embedded template {0} (uri: {1}) took {2:.1f} ms: {3:.1f} ms in view, {4:.1f} ms rendering'.format(
+        element_meta.get('tpl'),
+        element_meta.get('uri'),
+        total_ms,
+        call_seconds * 1000,
+        render_seconds * 1000,
+    ))
+
 ### Renderers ###
 
 class Renderer(object):
@@ -430,43 +657,37 @@ class WebRenderer(Renderer):
         :param data: Dictionary to be passed to the template as context
         :return: 2-tuple: (<result>, <flag: replace div>)
         """
-        attributes_string = element.get("mod-meta")
+        return self.render_include(element.get('mod-meta'), data)
 
-        # Return debug <div> if JSON cannot be parsed
-        try:
-            element_meta = json.loads(attributes_string)
-        except ValueError:
-            return '<div>No JSON object could be decoded: {}</div>'.format(
-                attributes_string
-            ), True
+    def render_include(self, attributes_string, data):
+        """Render an embedded template from the value of its `mod-meta`
+        attribute.
 
-        uri = element_meta.get('uri')
+        :param attributes_string: JSON value of the `mod-meta` attribute
+        :param data: Dictionary to be passed to the template as context
+        :return: 2-tuple: (<result>, <flag: replace div>)
+        """
+        element_meta, error_html = parse_include(attributes_string)
+        if error_html is not None:
+            return error_html, True
+        uri_data = call_include_uri(element_meta)
+        return self._render_include(element_meta, data, uri_data)
+
+    def _render_include(self, element_meta, data, uri_data):
+        """Render the template of an embed, given the result of its `uri`
+        sub-view as returned by `call_include_uri`.
+        """
         is_replace = element_meta.get('replace', False)
-        kwargs = element_meta.get('kwargs', {})
-        view_kwargs = element_meta.get('view_kwargs', {})
-        error_msg = element_meta.get('error', None)
+        uri_data, error_html, elapsed = uri_data
+        if error_html is not None:
+            return error_html, is_replace
 
         # TODO: Is copy enough? Discuss.
         render_data = copy.copy(data)
-        render_data.update(kwargs)
-
-        if uri:
-            # Catch errors and return appropriate debug divs
-            # todo: add debug parameter
-            try:
-                uri_data = call_url(uri, view_kwargs=view_kwargs)
-                render_data.update(uri_data)
-            except NotFound:
-                return '<div>URI {} not found</div>'.format(uri), is_replace
-            except Exception as error:
-                logger.exception(error)
-                if error_msg:
-                    return '<div>{}</div>'.format(error_msg), is_replace
-                return '<div>Error retrieving URI {}: {}</div>'.format(
-                    uri,
-                    repr(error)
-                ), is_replace
+        render_data.update(element_meta.get('kwargs', {}))
+        render_data.update(uri_data)
 
+        start = time.time()
         try:
             template_rendered = self._render(
                 render_data,
@@ -478,11 +699,13 @@ class WebRenderer(Renderer):
                 element_meta['tpl'],
                 repr(error)
             ), is_replace
+        log_include_timing(element_meta, elapsed, time.time() - start)
 
         return template_rendered, is_replace
 
     def _render(self, data, template_name=None):
-        """Render output of view function to HTML.
+        """Render output of view function to HTML. Embedded templates are
+        located in a single scan of the output and spliced in order.
 
         :param data: Data dictionary from view function
         :param template_name: Name of template file
@@ -507,49 +730,41 @@ class WebRenderer(Renderer):
         except IOError:
             return '<div>Template {} not found.</div>'.format(template_name)
 
-        html = lxml.html.fragment_fromstring(rendered, create_parent='remove')
-
-        for element in html.findall('.//*[@mod-meta]'):
-
-            # Render nested template
-            template_rendered, is_replace = self.render_element(element, data)
+        matches = list(MOD_META_PATTERN.finditer(rendered))
+        if not matches:
+            return rendered
 
-            original = lxml.html.tostring(element)
+        includes = [
+            parse_include(_html_parser.unescape(match.group('meta')))
+            for match in matches
+        ]
+        uri_results = itertools.imap(call_include_uri, [
+            element_meta for element_meta, _ in includes
+            if element_meta is not None
+        ])
+
+        parts = []
+        position = 0
+        for match, (element_meta, error_html) in zip(matches, includes):
+            if error_html is not None:
+                template_rendered, is_replace = error_html, True
+            else:
+                template_rendered, is_replace = self._render_include(
+                    element_meta, data, next(uri_results),
+                )
+            parts.append(rendered[position:match.start()])
             if is_replace:
-                replacement = template_rendered
+                parts.append(template_rendered)
             else:
-                replacement = original
-                replacement = replacement.replace('><', '>' + template_rendered + '<')
-
-            rendered = rendered.replace(original, replacement)
-
-        ## Parse HTML using html5lib; lxml is too strict and e.g. throws
-        ## errors if missing parent container; htmlparser mangles whitespace
-        ## and breaks replacement
-        #parsed = BeautifulSoup(rendered, 'html5lib')
-        #subtemplates = parsed.find_all(
-        #    lambda tag: tag.has_attr('mod-meta')
-        #)
-        #
-        #for element in subtemplates:
-        #
-        #    # Extract HTML of original element
-        #    element_html = str(element)
-        #
-        #    # Render nested template
-        #    template_rendered, is_replace = self.render_element(element, data)
-        #
-        #    # Build replacement
-        #    if is_replace:
-        #        replacement = template_rendered
-        #    else:
-        #        element.string = template_rendered
-        #        replacement = str(element)
-        #
-        #    # Replace
-        #    rendered = rendered.replace(element_html, replacement)
-
-        return rendered
+                parts.extend([
+                    match.group('open'),
+                    template_rendered,
+                    match.group('close'),
+                ])
+            position = match.end()
+        parts.append(rendered[position:])
+
+        return ''.join(parts)
 
     def render(self, data, redirect_url, *args, **kwargs):
         """Render output of view function to HTML, following redirects
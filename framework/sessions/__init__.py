@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 
-import httplib as http
+import copy
 import urllib
+import datetime
 import urlparse
+import httplib as http
 import bson.objectid
 import itsdangerous
 from werkzeug.local import LocalProxy
@@ -13,6 +15,7 @@ from framework.flask import app, redirect
 from website import settings
 
 from .model import Session
+from .backends import backend
 
 
 def add_key_to_url(url, scheme, key):
@@ -79,6 +82,37 @@ def prepare_private_key():
 # todo 2-back page view queue
 # todo actively_editing date
 
+# Navigation history is kept in a signed cookie rather than in the session,
+# so that recording a page view does not require a database write
+history_serializer = itsdangerous.URLSafeSerializer(settings.SECRET_KEY, salt='history')
+
+
+def get_history():
+    """Return the list of recently visited URLs for the current request.
+    """
+    current_request = request._get_current_object()
+    if current_request not in histories:
+        history = []
+        cookie = request.cookies.get(settings.SESSION_HISTORY_COOKIE_NAME)
+        if cookie:
+            try:
+                history = history_serializer.loads(cookie)
+            except itsdangerous.BadData:
+                pass
+        histories[current_request] = history
+    return histories[current_request]
+
+
+def save_history(response):
+    """Set the history cookie on ``response`` if the history changed.
+    """
+    if request._get_current_object() not in histories:
+        return
+    value = history_serializer.dumps(get_history())
+    if value != request.cookies.get(settings.SESSION_HISTORY_COOKIE_NAME):
+        response.set_cookie(settings.SESSION_HISTORY_COOKIE_NAME, value=value)
+
+
 def set_previous_url(url=None):
     """Add current URL to session history if not in excluded list; cap history
     at set length.
@@ -91,9 +125,10 @@ def set_previous_url(url=None):
     url = url or request.path
     if any([rule(url) for rule in settings.SESSION_HISTORY_IGNORE_RULES]):
         return
-    session.data['history'].append(url)
-    while len(session.data['history']) > settings.SESSION_HISTORY_LENGTH:
-        session.data['history'].pop(0)
+    history = get_history()
+    history.append(url)
+    while len(history) > settings.SESSION_HISTORY_LENGTH:
+        history.pop(0)
 
 
 def goback(n=1):
@@ -104,7 +139,7 @@ def goback(n=1):
         return redirect('/')
     try:
         for _ in range(n):
-            url = session.data['history'].pop()
+            url = get_history().pop()
     except IndexError:
         url = '/dashboard/'
     return redirect(url)
@@ -118,24 +153,60 @@ def set_session(session):
     sessions[request._get_current_object()] = session
 
 
+def mark_clean(session):
+    """Record the data of ``session`` as stored, so that `save_session` only
+    writes it if it changes.
+    """
+    snapshots[request._get_current_object()] = (session._id, copy.deepcopy(session.data))
+
+
+def is_dirty(session):
+    snapshot = snapshots.get(request._get_current_object())
+    return snapshot != (session._id, session.data)
+
+
+def save_session(session):
+    """Write ``session`` through the session backend if its data changed
+    during the request, or if it was last written long enough ago that it
+    would otherwise approach expiry.
+    """
+    touch_after = datetime.timedelta(seconds=settings.SESSION_TOUCH_INTERVAL)
+    is_stale = (
+        session.date_modified is None or
+        session.date_modified < datetime.datetime.utcnow() - touch_after
+    )
+    if is_dirty(session) or is_stale:
+        backend.save(session)
+        mark_clean(session)
+
+
 def create_session(response, data=None):
     current_session = get_session()
     if current_session:
+        # Avoid circular imports
+        from website.addons.base import grants
+        # The session may change user; drop grants issued to the previous one
+        grants.invalidate_session_grants(current_session._id)
         current_session.data.update(data or {})
-        current_session.save()
+        backend.save(current_session)
+        mark_clean(current_session)
         cookie_value = itsdangerous.Signer(settings.SECRET_KEY).sign(current_session._id)
     else:
         session_id = str(bson.objectid.ObjectId())
         session = Session(_id=session_id, data=data or {})
-        session.save()
+        backend.save(session)
         cookie_value = itsdangerous.Signer(settings.SECRET_KEY).sign(session_id)
         set_session(session)
+        mark_clean(session)
     if response is not None:
         response.set_cookie(settings.COOKIE_NAME, value=cookie_value)
         return response
 
 
 sessions = WeakKeyDictionary()
+# Maps requests to (session id, data) as last loaded or written
+snapshots = WeakKeyDictionary()
+histories = WeakKeyDictionary()
 session = LocalProxy(get_session)
 
 # Request callbacks
@@ -190,8 +261,12 @@ def before_request():
     if cookie:
         try:
             session_id = itsdangerous.Signer(settings.SECRET_KEY).unsign(cookie)
-            session = Session.load(session_id) or Session(_id=session_id)
+            stored = backend.load(session_id)
+            session = stored or Session(_id=session_id)
             set_session(session)
+            # Sessions not yet stored are written at the end of the request
+            if stored is not None:
+                mark_clean(session)
             return
         except:
             pass
@@ -203,9 +278,10 @@ def before_request():
 
 @app.after_request
 def after_request(response):
-    # Save if session exists and not authenticated by API
     set_previous_url()
+    save_history(response)
+    # Save if session exists and not authenticated by API
     if session._get_current_object() is not None \
             and not session.data.get('auth_api_key'):
-        session.save()
+        save_session(session._get_current_object())
     return response
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Storage backends for request sessions. A backend loads sessions by key and
+writes them back; `framework.sessions` only asks the backend to write a
+session whose data changed during the request, or which has not been written
+for `settings.SESSION_TOUCH_INTERVAL` seconds. Sessions in MongoDB expire
+through a TTL index on `Session.date_modified`.
+
+The backend is chosen with `settings.SESSION_BACKEND`.
+"""
+
+import copy
+
+from framework.caching import TTLCache
+
+from website import settings
+
+from .model import Session
+
+
+class MongoSessionBackend(object):
+    """Read and write sessions directly from MongoDB.
+    """
+
+    def load(self, session_id):
+        return Session.load(session_id)
+
+    def save(self, session):
+        session.save()
+
+    def invalidate(self, session_id):
+        pass
+
+    def metrics(self):
+        return {}
+
+
+class CachedSessionBackend(MongoSessionBackend):
+    """Serve sessions from an in-process cache, writing through to MongoDB.
+    Changes made by other processes, such as a logout handled by another
+    worker, are seen once the cached copy expires after
+    `settings.SESSION_CACHE_TTL` seconds.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache or TTLCache(
+            maxsize=settings.SESSION_CACHE_SIZE,
+            ttl=settings.SESSION_CACHE_TTL,
+        )
+
+    def load(self, session_id):
+        data = self.cache.get(session_id)
+        if data is None:
+            session = super(CachedSessionBackend, self).load(session_id)
+            if session is not None:
+                self.cache.set(session_id, session.to_storage())
+            return session
+        return Session.load(data=copy.deepcopy(data))
+
+    def save(self, session):
+        super(CachedSessionBackend, self).save(session)
+        self.cache.set(session._id, session.to_storage())
+
+    def invalidate(self, session_id):
+        self.cache.delete(session_id)
+
+    def metrics(self):
+        return self.cache.metrics()
+
+
+BACKENDS = {
+    'mongo': MongoSessionBackend,
+    'cached': CachedSessionBackend,
+}
+
+
+def get_backend(name=None):
+    return BACKENDS[name or settings.SESSION_BACKEND]()
+
+
+backend = get_backend()
@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import pymongo
 from bson import ObjectId
 from modularodm import fields
 
 from framework.mongo import StoredObject
 
+from website import settings
+
 
 class Session(StoredObject):
 
@@ -13,8 +16,10 @@ class Session(StoredObject):
     date_modified = fields.DateTimeField(auto_now=True)
     data = fields.DictionaryField()
 
-    def __init__(self, *args, **kwargs):
-        super(Session, self).__init__(*args, **kwargs)
-        # Initialize history to empty list if not found
-        if 'history' not in self.data:
-            self.data['history'] = []
+    __indices__ = [
+        # Expire sessions that have not been written to for SESSION_TTL seconds
+        {
+            'key_or_list': [('date_modified', pymongo.ASCENDING)],
+            'expireAfterSeconds': settings.SESSION_TTL,
+        },
+    ]
@@ -1,6 +1,7 @@
 from modularodm import Q
 
 from .model import Session
+from .backends import backend
 
 
 def remove_sessions_for_user(user):
@@ -8,4 +9,11 @@ def remove_sessions_for_user(user):
 
     :param User user:
     """
-    Session.remove(Q('data.auth_user_id', 'eq', user._id))
\ No newline at end of file
+    # Avoid circular imports
+    from framework.auth import signals as auth_signals
+    query = Q('data.auth_user_id', 'eq', user._id)
+    for session in Session.find(query):
+        backend.invalidate(session._id)
+        # Drop grants issued to the session, as on logout
+        auth_signals.user_logged_out.send(session._id)
+    Session.remove(query)
@@ -6,9 +6,11 @@ imported by Celery and is not used elsewhere in the application.
 from celery import signals
 from modularodm import storage
 
-from framework.mongo import set_up_storage, StoredObject
+from framework.email.tasks import connection_pool as smtp_pool
+from framework.mongo import set_up_storage, client_pool, StoredObject
 
 from website import models
+from website.search import handlers as search_handlers
 
 
 @signals.task_prerun.connect
@@ -24,3 +26,32 @@ def attach_models(*args, **kwargs):
     """Attach models to database collections on worker initialization.
     """
     set_up_storage(models.MODELS, storage.MongoStorage)
+
+
+@signals.worker_process_init.connect
+def reset_client_pool(*args, **kwargs):
+    """Drop the MongoDB client inherited from the parent process so that each
+    prefork child opens its own connections.
+    """
+    client_pool.reset()
+
+
+@signals.worker_process_init.connect
+def reset_smtp_pool(*args, **kwargs):
+    """Drop SMTP connections inherited from the parent process.
+    """
+    smtp_pool.reset()
+
+
+@signals.task_prerun.connect
+def open_search_queue(*args, **kwargs):
+    """Collect search index updates made by the task.
+    """
+    search_handlers.search_task_prerun()
+
+
+@signals.task_postrun.connect
+def flush_search_queue(*args, **kwargs):
+    """Send search index updates made by the task in bulk.
+    """
+    search_handlers.search_task_postrun(state=kwargs.get('state'))
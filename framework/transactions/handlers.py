@@ -3,7 +3,7 @@
 import httplib
 import logging
 
-from flask import request, current_app
+from flask import g, request, current_app
 from pymongo.errors import OperationFailure
 
 from framework.transactions import utils, commands, messages
@@ -14,6 +14,12 @@ from website import settings
 LOCK_ERROR_CODE = httplib.BAD_REQUEST
 NO_AUTO_TRANSACTION_ATTR = '_no_auto_transaction'
 
+# Outcome of the request's transaction, stored on `g`
+TRANSACTION_STATUS_ATTR = '_transaction_status'
+STARTED = 'started'
+COMMITTED = 'committed'
+ROLLED_BACK = 'rolled_back'
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,6 +28,20 @@ def no_auto_transaction(func):
     return func
 
 
+def get_transaction_status():
+    """Return the outcome of the current request's transaction, or `None` if
+    the request has no transaction, in which case writes are not deferred.
+    """
+    try:
+        return getattr(g, TRANSACTION_STATUS_ATTR, None)
+    except RuntimeError:
+        return None
+
+
+def _set_transaction_status(status):
+    setattr(g, TRANSACTION_STATUS_ATTR, status)
+
+
 def view_has_annotation(attr):
     try:
         endpoint = request.url_rule.endpoint
@@ -44,6 +64,7 @@ def transaction_before_request():
         if messages.NO_TRANSACTION_ERROR not in message:
             raise
     commands.begin()
+    _set_transaction_status(STARTED)
 
 
 def transaction_after_request(response):
@@ -55,6 +76,7 @@ def transaction_after_request(response):
         return response
     if response.status_code >= 500:
         commands.rollback()
+        _set_transaction_status(ROLLED_BACK)
     else:
         try:
             commands.commit()
@@ -62,8 +84,10 @@ def transaction_after_request(response):
             message = utils.get_error_message(error)
             if 'lock not granted' in message.lower():
                 commands.rollback()
+                _set_transaction_status(ROLLED_BACK)
                 return utils.handle_error(LOCK_ERROR_CODE)
             raise
+        _set_transaction_status(COMMITTED)
     return response
 
 
@@ -82,6 +106,7 @@ def transaction_teardown_request(error=None):
         # e.g. when Flask#test_request_context() is used
         if not current_app.testing:
             commands.rollback()
+        _set_transaction_status(ROLLED_BACK)
 
 
 handlers = {
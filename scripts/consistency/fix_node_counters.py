@@ -0,0 +1,85 @@
+"""Recompute the denormalized node counters (see `website.project.counters`)
+from their source records. Nodes whose counters have drifted are reported,
+and nodes without counters are backfilled.
+
+Dry run: python -m scripts/consistency/fix_node_counters
+Real: python -m scripts/consistency/fix_node_counters false
+
+"""
+
+import logging
+
+from website.app import init_app
+from website import models
+from website.project import counters
+
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+app = init_app()
+
+BATCH_SIZE = 1000
+
+
+def iter_node_ids():
+    cursor = models.Node._storage[0].store.find(
+        {}, {'_id': True}
+    ).sort('_id', 1).batch_size(BATCH_SIZE)
+    for each in cursor:
+        yield each['_id']
+
+
+def find_drift(stored, computed):
+    """Return the names of counters whose stored values differ from the
+    computed values.
+    """
+    if stored is None:
+        return list(counters.FIELDS) + ['user_logs']
+    drift = [
+        field
+        for field in counters.FIELDS
+        if stored.get(field, 0) != computed[field]
+    ]
+    if stored.get('user_logs', {}) != computed['user_logs']:
+        drift.append('user_logs')
+    return drift
+
+
+def fix_node_counters(dry_run=True):
+    collection = counters.get_collection()
+    checked, missing, drifted = 0, 0, 0
+    for node_id in iter_node_ids():
+        node = models.Node.load(node_id)
+        if node is None:
+            continue
+        checked += 1
+        stored = collection.find_one({'_id': node_id})
+        computed = counters.compute_counters(node)
+        drift = find_drift(stored, computed)
+        if drift:
+            if stored is None:
+                missing += 1
+            else:
+                drifted += 1
+                logger.info(
+                    'Counters of node {0} out of date: {1}'.format(
+                        node_id, ', '.join(drift)
+                    )
+                )
+            if not dry_run:
+                counters.reset_counters(node)
+        # Keep the identity map from holding every node in memory
+        if checked % BATCH_SIZE == 0:
+            models.Node._clear_caches()
+    logger.info(
+        'Checked {0} nodes: {1} without counters, {2} out of date'.format(
+            checked, missing, drifted
+        )
+    )
+
+
+if __name__ == '__main__':
+    import sys
+    dry_run = len(sys.argv) == 1 or sys.argv[1].lower() not in ['f', 'false']
+    fix_node_counters(dry_run=dry_run)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""Populate `OsfStorageFileNode.ancestors` on records created before the
+field was added. Each file tree is walked from its root one level at a time,
+with one bulk update per folder. Trees are also migrated as needed when
+they are copied or deleted; this script migrates the rest.
+"""
+
+import logging
+
+from framework.transactions.context import TokuTransaction
+
+from website.app import init_app
+from website.addons.osfstorage import utils
+from website.addons.osfstorage.model import OsfStorageFileNode
+
+from scripts import utils as script_utils
+
+
+logger = logging.getLogger(__name__)
+
+
+def main(dry_run=True):
+    collection = OsfStorageFileNode._storage[0].store
+    roots = collection.find({'parent': None}, {'_id': True})
+    logger.info('Migrating {0} file trees'.format(roots.count()))
+    for root in roots:
+        try:
+            with TokuTransaction():
+                if not dry_run:
+                    collection.update({'_id': root['_id']}, {'$set': {'ancestors': []}})
+                count = utils.set_subtree_ancestors(
+                    OsfStorageFileNode, root['_id'], [root['_id']], dry_run=dry_run,
+                )
+            logger.info('Migrated {0} folders under root {1}'.format(count, root['_id']))
+        except Exception as error:
+            logger.error('Could not migrate file tree {0}'.format(root['_id']))
+            logger.exception(error)
+
+
+if __name__ == '__main__':
+    import sys
+    dry_run = 'dry' in sys.argv
+    if not dry_run:
+        script_utils.add_file_logger(logger, __file__)
+    init_app(set_backends=True, routes=False)
+    main(dry_run=dry_run)
@@ -1,13 +1,17 @@
 """Script for sending OSF email digests to subscribed users and removing the records once sent."""
 
-import datetime
+import sys
+import string
 import logging
-from bson.code import Code
+import datetime
+import itertools
 
+import pymongo
 from modularodm import Q
 
 from framework import sentry
 from framework.auth.core import User
+from framework.flask import app
 from framework.mongo import database as db
 from framework.tasks import app as celery_app
 from scripts import utils as script_utils
@@ -29,13 +33,40 @@ if not settings.DEBUG_MODE:
         logging.getLogger(logger_name).setLevel(logging.CRITICAL)
 
 
-def main():
+# Characters that primary keys generated by modular-odm start with, in sort order
+USER_ID_CHARACTERS = string.digits + string.ascii_lowercase
+
+
+def main(shards=1):
     script_utils.add_file_logger(logger, __file__)
-    app = init_app(attach_request_handlers=False)
+    init_app(attach_request_handlers=False)
     celery_app.main = 'scripts.send_digest'
-    grouped_digests = group_digest_notifications_by_user()
+    for start, end in user_id_ranges(shards):
+        if settings.USE_CELERY:
+            send_users_digests.delay(start=start, end=end)
+        else:
+            send_users_digests(start=start, end=end)
+
+
+def user_id_ranges(shards):
+    """Split the user id space into ``shards`` contiguous ranges by the first
+    character of the id. Together the ranges cover every possible id.
+
+    :return: List of (start, end) tuples; `start` is inclusive, `end` is
+        exclusive, and `None` means unbounded
+    """
+    shards = max(1, min(shards, len(USER_ID_CHARACTERS)))
+    step = len(USER_ID_CHARACTERS) / float(shards)
+    bounds = [USER_ID_CHARACTERS[int(round(step * i))] for i in range(1, shards)]
+    return zip([None] + bounds, bounds + [None])
+
+
+@celery_app.task
+def send_users_digests(start=None, end=None):
+    """Send digests to users whose ids fall in [start, end).
+    """
     with app.test_request_context():
-        send_digest(grouped_digests)
+        send_digest(group_digest_notifications_by_user(start=start, end=end))
 
 
 def send_digest(grouped_digests):
@@ -48,7 +79,7 @@ def send_digest(grouped_digests):
         if not user:
             sentry.log_exception()
             sentry.log_message("A user with this username does not exist.")
-            return
+            continue
 
         info = group['info']
         digest_notification_ids = [message['_id'] for message in info]
@@ -70,8 +101,7 @@ def send_digest(grouped_digests):
 
 @celery_app.task
 def remove_sent_digest_notifications(digest_notification_ids=None):
-    for digest_id in digest_notification_ids:
-        NotificationDigest.remove(Q('_id', 'eq', digest_id))
+    NotificationDigest.remove(Q('_id', 'in', digest_notification_ids))
 
 
 def group_messages_by_node(notifications):
@@ -81,46 +111,58 @@ def group_messages_by_node(notifications):
     return d
 
 
-def group_digest_notifications_by_user():
-    """ Group digest notification messages from the past 24 hours by user
-    :return: [{
+def group_digest_notifications_by_user(start=None, end=None):
+    """ Group digest notification messages from before now by user. Reads
+    `notificationdigest` with a cursor sorted on the (user_id, timestamp)
+    index, so only one user's messages are held in memory at a time.
+
+    :param str start: Only include users with ids >= `start`
+    :param str end: Only include users with ids < `end`
+    :return: Generator of dicts, ordered by user id, of the form {
                 'user_id': 'se8ea',
                 'info': [{
-                    'message': {
-                        'message': 'Freddie commented on your project Open Science',
-                        'timestamp': datetime object
-                    },
+                    'message': 'Freddie commented on your project Open Science',
                     'node_lineage': ['parent._id', 'node._id'],
                     '_id': NotificationDigest._id
-                }, ...
-                }]
-              },
-              {
-                'user_id': ...
-              }]
+                }, ...]
+              }
     """
-    return db['notificationdigest'].group(
-        key={'user_id': 1},
-        condition={
-            'timestamp': {
-                '$lt': datetime.datetime.utcnow()
-            }
-        },
-        initial={'info': []},
-        reduce=Code(
-            """
-            function(curr, result) {
-                result.info.push({
-                    'message': curr.message,
-                    'node_lineage': curr.node_lineage,
-                    '_id': curr._id
-                });
-            };
-            """
-        )
-    )
+    query = {
+        'timestamp': {
+            '$lt': datetime.datetime.utcnow()
+        }
+    }
+    user_range = {}
+    if start is not None:
+        user_range['$gte'] = start
+    if end is not None:
+        user_range['$lt'] = end
+    if user_range:
+        query['user_id'] = user_range
+
+    cursor = db['notificationdigest'].find(
+        query,
+        {'user_id': True, 'message': True, 'node_lineage': True},
+    ).sort([
+        ('user_id', pymongo.ASCENDING),
+        ('timestamp', pymongo.ASCENDING),
+    ]).batch_size(settings.DIGEST_BATCH_SIZE)
+
+    for user_id, digests in itertools.groupby(cursor, key=lambda digest: digest['user_id']):
+        yield {
+            'user_id': user_id,
+            'info': [
+                {
+                    'message': digest['message'],
+                    'node_lineage': digest['node_lineage'],
+                    '_id': digest['_id'],
+                }
+                for digest in digests
+            ]
+        }
 
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.DEBUG)
-    main()
+    shards = [arg.split('=', 1)[1] for arg in sys.argv if arg.startswith('--shards=')]
+    main(shards=int(shards[0]) if shards else 1)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import mock
+from nose.tools import *  # noqa (PEP8 asserts)
+
+from framework.caching import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_get_set(self):
+        cache = TTLCache()
+        assert_is_none(cache.get('key'))
+        cache.set('key', 'value')
+        assert_equal(cache.get('key'), 'value')
+        assert_equal(cache.metrics()['hits'], 1)
+        assert_equal(cache.metrics()['misses'], 1)
+        assert_equal(cache.metrics()['hit_rate'], 0.5)
+
+    @mock.patch('framework.caching.time.time')
+    def test_entries_expire(self, mock_time):
+        mock_time.return_value = 100
+        cache = TTLCache(ttl=10)
+        cache.set('key', 'value')
+        mock_time.return_value = 109
+        assert_equal(cache.get('key'), 'value')
+        mock_time.return_value = 110
+        assert_is_none(cache.get('key'))
+        assert_equal(len(cache), 0)
+
+    def test_least_recently_used_evicted(self):
+        cache = TTLCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        assert_equal(cache.get('a'), 1)
+        assert_is_none(cache.get('b'))
+        assert_equal(cache.metrics()['evictions'], 1)
+
+    def test_delete_matching(self):
+        cache = TTLCache()
+        cache.set(('node', 'abc12'), 1)
+        cache.set(('node', 'def34'), 2)
+        cache.delete_matching(lambda key: key[1] == 'abc12')
+        assert_is_none(cache.get(('node', 'abc12')))
+        assert_equal(cache.get(('node', 'def34')), 2)
+
+    def test_delete_group(self):
+        cache = TTLCache(group=lambda key: key[0])
+        cache.set(('abc12', 'files/'), 1)
+        cache.set(('abc12', 'wiki/'), 2)
+        cache.set(('def34', 'files/'), 3)
+        cache.delete_group('abc12')
+        assert_is_none(cache.get(('abc12', 'files/')))
+        assert_is_none(cache.get(('abc12', 'wiki/')))
+        assert_equal(cache.get(('def34', 'files/')), 3)
+        assert_equal(cache.metrics()['invalidations'], 2)
+
+    def test_groups_forget_evicted_entries(self):
+        cache = TTLCache(maxsize=2, group=lambda key: key[0])
+        cache.set(('abc12', 'files/'), 1)
+        cache.set(('abc12', 'wiki/'), 2)
+        cache.set(('def34', 'files/'), 3)
+        cache.delete(('def34', 'files/'))
+        assert_equal(dict(cache._groups), {'abc12': set([('abc12', 'wiki/')])})
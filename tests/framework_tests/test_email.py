@@ -2,9 +2,10 @@
 import unittest
 import smtplib
 
+import mock
 from nose.tools import *  # PEP8 asserts
 
-from framework.email.tasks import send_email
+from framework.email.tasks import send_email, send_emails, SMTPConnectionPool
 from website import settings
 
 # Check if local mail server is running
@@ -27,5 +28,55 @@ class TestEmail(unittest.TestCase):
                                  message="<h1>Greetings!</h1>", ttls=False, login=False))
 
 
+@mock.patch('framework.email.tasks.smtplib.SMTP')
+class TestSMTPConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = SMTPConnectionPool()
+
+    def test_connection_reused(self, mock_smtp):
+        with self.pool.connection('mail.example.com', username='user', password='pass') as first:
+            pass
+        with self.pool.connection('mail.example.com', username='user', password='pass') as second:
+            pass
+        assert_is(first, second)
+        assert_equal(mock_smtp.call_count, 1)
+        assert_equal(first.login.call_count, 1)
+        assert_equal(self.pool.metrics()['reused'], 1)
+
+    def test_broken_connection_discarded(self, mock_smtp):
+        with assert_raises(smtplib.SMTPServerDisconnected):
+            with self.pool.connection('mail.example.com', login=False):
+                raise smtplib.SMTPServerDisconnected
+        assert_equal(self.pool.metrics()['idle'], 0)
+
+    @mock.patch('framework.email.tasks.settings.MAIL_CONNECTION_MAX_MESSAGES', 1)
+    def test_connection_retired_after_max_messages(self, mock_smtp):
+        with self.pool.connection('mail.example.com', login=False) as s:
+            pass
+        assert_true(s.quit.called)
+        assert_equal(self.pool.metrics()['idle'], 0)
+
+
+@mock.patch('framework.email.tasks.settings.USE_EMAIL', True)
+@mock.patch('framework.email.tasks.connection_pool', SMTPConnectionPool())
+@mock.patch('framework.email.tasks.smtplib.SMTP')
+class TestSendEmails(unittest.TestCase):
+
+    def test_failures_reported_per_recipient(self, mock_smtp):
+        def sendmail(from_addr, to_addrs, msg):
+            if to_addrs == ['bad@example.com']:
+                raise smtplib.SMTPRecipientsRefused({'bad@example.com': (550, 'No such user')})
+        mock_smtp.return_value.sendmail.side_effect = sendmail
+        messages = [
+            {'from_addr': 'osf@example.com', 'to_addr': to_addr, 'subject': 'Hi', 'message': 'Hello'}
+            for to_addr in ['good@example.com', 'bad@example.com', 'also-good@example.com']
+        ]
+        failures = send_emails(messages, ttls=False, login=False)
+        assert_equal(list(failures), ['bad@example.com'])
+        assert_equal(mock_smtp.call_count, 1)
+        assert_equal(mock_smtp.return_value.sendmail.call_count, 3)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -4,6 +4,8 @@
 These require a test db because they use Session objects.
 '''
 import json
+import shutil
+import tempfile
 import unittest
 import os
 
@@ -13,7 +15,7 @@ import werkzeug.wrappers
 
 from framework.exceptions import HTTPError, http
 from framework.routing import (
-    Renderer, JSONRenderer, WebRenderer,
+    Renderer, JSONRenderer, WebRenderer, TemplateCache,
     render_mako_string,
 )
 
@@ -230,6 +232,22 @@ class WebRendererTemplateTestCase(OsfTestCase):
         # The contents of the inner template should be present in the page.
         self.assertIn('child template content', resp.data)
 
+    def test_multiple_nested_templates(self):
+        self.app.app.preprocess_request()
+
+        r = WebRenderer(
+            'nested_parent_multiple.html',
+            render_mako_string,
+            template_dir=TEMPLATES_PATH,
+        )
+        rendered = r._render({})
+
+        self.assertEqual(rendered.count('child template content'), 2)
+        # Embeds without "replace" keep their wrapping element
+        self.assertIn('<p>child template content</p></div>\n    <p>between</p>', rendered)
+        self.assertIn('<div>No JSON object could be decoded: not json</div>', rendered)
+        self.assertEqual(rendered.count('mod-meta'), 1)
+
     def test_render_included_template(self):
         """``WebRenderer.render_element()`` is the internal method called when
         a template string is rendered. This test case examines the same
@@ -339,3 +357,45 @@ class JSONRendererEncoderTestCase(unittest.TestCase):
             '"my string"',
             json.dumps('my string', cls=JSONRenderer.Encoder)
         )
+
+
+class TemplateCacheTestCase(AppTestCase):
+
+    def setUp(self):
+        super(TemplateCacheTestCase, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'page.mako')
+        self.write_template('first', mtime=1)
+
+    def tearDown(self):
+        super(TemplateCacheTestCase, self).tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+    def write_template(self, content, mtime):
+        with open(self.path, 'w') as fp:
+            fp.write(content)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_compiled_once(self):
+        cache = TemplateCache(maxsize=10)
+        template = cache.get(self.path)
+        self.assertIs(cache.get(self.path), template)
+        self.assertEqual(cache.metrics()['hits'], 1)
+        self.assertEqual(cache.metrics()['misses'], 1)
+
+    def test_changed_file_recompiled(self):
+        cache = TemplateCache(maxsize=10, check_mtime=True)
+        self.assertEqual(cache.get(self.path).render(), 'first')
+        self.write_template('second', mtime=2)
+        self.assertEqual(cache.get(self.path).render(), 'second')
+        self.assertEqual(cache.metrics()['stale'], 1)
+
+    def test_size_bounded(self):
+        cache = TemplateCache(maxsize=1)
+        cache.warm([self.path, os.path.join(TEMPLATES_PATH, 'nested_child.html')])
+        self.assertEqual(cache.metrics()['size'], 1)
+
+    def test_warm_skips_missing_templates(self):
+        cache = TemplateCache(maxsize=10)
+        cache.warm([os.path.join(self.tmp_dir, 'missing.mako'), self.path])
+        self.assertEqual(cache.metrics()['size'], 1)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the pooled MongoDB client and batch loading in
+framework.mongo.
+"""
+
+import unittest
+
+import mock
+from nose.tools import *  # noqa (PEP8 asserts)
+from pymongo.errors import ConnectionFailure
+
+from framework.auth import User
+from framework.mongo import handlers, identity, load_many, StoredObject
+
+from tests.base import OsfTestCase
+from tests.factories import UserFactory
+
+
+@mock.patch('framework.mongo.handlers.get_mongo_client')
+class TestClientPool(unittest.TestCase):
+
+    def setUp(self):
+        super(TestClientPool, self).setUp()
+        self.pool = handlers.ClientPool()
+
+    def test_client_reused_within_process(self, mock_get_client):
+        first = self.pool.get()
+        second = self.pool.get()
+        assert_is(first, second)
+        assert_equal(mock_get_client.call_count, 1)
+        assert_equal(self.pool.metrics()['checkouts'], 2)
+        assert_equal(self.pool.metrics()['connects'], 1)
+
+    @mock.patch('framework.mongo.handlers.os.getpid')
+    def test_reconnect_after_fork(self, mock_getpid, mock_get_client):
+        mock_getpid.return_value = 1
+        self.pool.get()
+        mock_getpid.return_value = 2
+        self.pool.get()
+        assert_equal(mock_get_client.call_count, 2)
+        assert_equal(self.pool.metrics()['forks'], 1)
+        assert_equal(self.pool.metrics()['pid'], 2)
+
+    def test_reset(self, mock_get_client):
+        client = self.pool.get()
+        self.pool.reset()
+        assert_true(client.close.called)
+        assert_false(self.pool.metrics()['connected'])
+        self.pool.get()
+        assert_equal(mock_get_client.call_count, 2)
+
+    @mock.patch('framework.mongo.handlers.settings.DB_HEALTH_CHECK_INTERVAL', -1)
+    def test_failed_health_check_reconnects(self, mock_get_client):
+        client = self.pool.get()
+        client.admin.command.side_effect = ConnectionFailure
+        self.pool.get()
+        assert_true(client.close.called)
+        assert_equal(mock_get_client.call_count, 2)
+        assert_equal(self.pool.metrics()['failed_checks'], 1)
+
+
+class TestLoadMany(OsfTestCase):
+
+    def setUp(self):
+        super(TestLoadMany, self).setUp()
+        self.users = [UserFactory() for _ in range(3)]
+        StoredObject._clear_caches()
+        identity.identity_before_request()
+
+    def test_load_many_preserves_order(self):
+        keys = [user._id for user in reversed(self.users)]
+        loaded = load_many(User, keys + ['nonexistent'])
+        assert_equal([user._id for user in loaded], keys)
+
+    def test_load_many_queries_once(self):
+        load_many(User, [user._id for user in self.users])
+        for user in self.users:
+            User.load(user._id)
+        stats = identity.get_stats()
+        assert_equal(stats['batch_queries'], 1)
+        assert_equal(stats['single_queries'], 0)
+        assert_equal(stats['cache_hits'], len(self.users))
+
+    def test_load_many_skips_cached_records(self):
+        User.load(self.users[0]._id)
+        load_many(User, [user._id for user in self.users])
+        load_many(User, [user._id for user in self.users])
+        stats = identity.get_stats()
+        assert_equal(stats['single_queries'], 1)
+        assert_equal(stats['batch_queries'], 1)
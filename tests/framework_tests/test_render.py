@@ -1,41 +1,155 @@
+import os
 import mock
-import time
+import shutil
+import tempfile
 import unittest
+import multiprocessing
 from nose.tools import *  # noqa
 
 from framework.render import core
+from framework.render import tasks
+from framework.render import scheduler
 from framework.render import exceptions
 
 
-class TestRenderIsHappening(unittest.TestCase):
-
-    @mock.patch('framework.render.core.os.path.isfile')
-    def test_cache_exists_is_true(self, mock_isfile):
-        mock_isfile.return_value = True
-        assert_true(core.render_is_done_or_happening('path', 'path'))
-
-    @mock.patch('framework.render.core.os.path.isfile')
-    def test_nothing_exists(self, mock_isfile):
-        mock_isfile.return_value = False
-        assert_false(core.render_is_done_or_happening('path', 'path'))
-
-    @mock.patch('framework.render.core.os.remove')
-    @mock.patch('framework.render.core.os.path.isfile')
-    @mock.patch('framework.render.core.os.path.getmtime')
-    def test_old_temp(self, mockmtime, mock_isfile, mock_remove):
-        mockmtime.return_value = 0
-        mock_isfile.side_effect = [False, True]
-
-        assert_false(core.render_is_done_or_happening('path', 'path'))
-
-    @mock.patch('framework.render.core.os.remove')
-    @mock.patch('framework.render.core.os.path.isfile')
-    @mock.patch('framework.render.core.os.path.getmtime')
-    def test_temp_newish(self, mockmtime, mock_isfile, mock_remove):
-        mockmtime.return_value = time.time()
-        mock_isfile.side_effect = [False, True]
-
-        assert_true(core.render_is_done_or_happening('path', 'path'))
+class TestRenderLock(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.cache_dir, 'file.html')
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_acquire(self):
+        assert_true(scheduler.acquire_render_lock(self.cache_path))
+        assert_false(scheduler.acquire_render_lock(self.cache_path))
+
+    def test_release(self):
+        scheduler.acquire_render_lock(self.cache_path)
+        scheduler.release_render_lock(self.cache_path)
+        assert_true(scheduler.acquire_render_lock(self.cache_path))
+
+    def test_stale_lock_taken_over(self):
+        scheduler.acquire_render_lock(self.cache_path)
+        lock_path = self.cache_path + scheduler.LOCK_SUFFIX
+        os.utime(lock_path, (0, 0))
+        assert_true(scheduler.acquire_render_lock(self.cache_path))
+
+    def test_claim_pending(self):
+        scheduler.pending_renders.clear()
+        assert_true(scheduler.claim_pending(self.cache_path))
+        assert_false(scheduler.claim_pending(self.cache_path))
+
+
+class TestBuildRenderedHtml(unittest.TestCase):
+
+    def setUp(self):
+        scheduler.pending_renders.clear()
+
+    @mock.patch('framework.render.tasks.settings.USE_CELERY', False)
+    @mock.patch('framework.render.tasks._build_rendered_html')
+    def test_duplicate_renders_not_started(self, mock_build):
+        args = ('download', 'cache', 'temp', 'public')
+        tasks.build_rendered_html(*args)
+        tasks.build_rendered_html(*args)
+        mock_build.assert_called_once_with(*args)
+
+
+def _hold_slot(extension, slots_path, held, done):
+    with scheduler.render_slot(extension, slots_path=slots_path) as reserved:
+        assert reserved
+        held.set()
+        done.wait(10)
+
+
+@mock.patch('framework.render.scheduler.settings.MFR_MAX_CONCURRENT_RENDERS', 1)
+@mock.patch('framework.render.scheduler.settings.MFR_MAX_CONCURRENT_RENDERS_BY_EXTENSION', {'.pdf': 1})
+class TestRenderSlot(unittest.TestCase):
+
+    def setUp(self):
+        self.slots_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.slots_path)
+
+    def render_slot(self, extension):
+        return scheduler.render_slot(extension, slots_path=self.slots_path)
+
+    def test_slots_bounded(self):
+        with self.render_slot('.txt') as outer:
+            assert_true(outer)
+            with self.render_slot('.txt') as inner:
+                assert_false(inner)
+        with self.render_slot('.txt') as again:
+            assert_true(again)
+
+    @mock.patch('framework.render.scheduler.settings.MFR_MAX_CONCURRENT_RENDERS', 2)
+    def test_slots_bounded_by_extension(self):
+        with self.render_slot('.pdf'):
+            with self.render_slot('.pdf') as pdf:
+                assert_false(pdf)
+            with self.render_slot('.txt') as txt:
+                assert_true(txt)
+
+    def test_slots_bounded_across_processes(self):
+        held, done = multiprocessing.Event(), multiprocessing.Event()
+        process = multiprocessing.Process(
+            target=_hold_slot,
+            args=('.pdf', self.slots_path, held, done),
+        )
+        process.start()
+        try:
+            assert_true(held.wait(10))
+            with self.render_slot('.pdf') as reserved:
+                assert_false(reserved)
+        finally:
+            done.set()
+            process.join()
+        with self.render_slot('.pdf') as reserved:
+            assert_true(reserved)
+
+    def test_slot_of_dead_process_taken_over(self):
+        process = multiprocessing.Process(target=os._exit, args=(0, ))
+        process.start()
+        process.join()
+        with open(os.path.join(self.slots_path, 'all.0'), 'w') as fp:
+            fp.write(str(process.pid))
+        with self.render_slot('.txt') as reserved:
+            assert_true(reserved)
+
+
+class TestEvictRenderedCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        for index, name in enumerate(['old.html', 'new.html', 'newest.html']):
+            path = os.path.join(self.cache_dir, name)
+            with open(path, 'w') as fp:
+                fp.write('x' * 10)
+            os.utime(path, (index, index))
+        open(os.path.join(self.cache_dir, 'old.html' + scheduler.LOCK_SUFFIX), 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_evict_least_recently_used(self):
+        removed = scheduler.evict_rendered_cache(max_size=20, cache_path=self.cache_dir)
+        assert_equal(removed, 1)
+        assert_equal(
+            sorted(os.listdir(self.cache_dir)),
+            ['new.html', 'newest.html', 'old.html' + scheduler.LOCK_SUFFIX],
+        )
+
+    def test_evict_under_limit(self):
+        removed = scheduler.evict_rendered_cache(max_size=100, cache_path=self.cache_dir)
+        assert_equal(removed, 0)
+
+    def test_touch_keeps_file(self):
+        scheduler.touch(os.path.join(self.cache_dir, 'old.html'))
+        scheduler.evict_rendered_cache(max_size=20, cache_path=self.cache_dir)
+        assert_not_in('new.html', os.listdir(self.cache_dir))
+        assert_in('old.html', os.listdir(self.cache_dir))
 
 
 @mock.patch('__builtin__.open')
@@ -1,12 +1,19 @@
 # -*- coding: utf-8 -*-
+import os
 import unittest
 
+import mock
 from nose.tools import *  # noqa (PEP8 asserts)
 from flask import Flask
 from webtest_plus import TestApp
 
 from framework.exceptions import HTTPError
-from framework.routing import json_renderer, process_rules, Rule
+from framework.routing import (
+    json_renderer, process_rules, Rule, WebRenderer, data_to_lambda,
+    page_cache, render_mako_string,
+)
+
+TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
 
 def error_view():
     raise HTTPError(400)
@@ -40,3 +47,43 @@ class TestJSONRenderer(unittest.TestCase):
         data = res.json
         assert_equal(data['message_short'], 'Invalid')
         assert_equal(data['message_long'], 'Invalid request')
+
+
+class TestConstantDataRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.wt = TestApp(self.app)
+        self.renderer = WebRenderer(
+            'nested_child.html',
+            render_mako_string,
+            template_dir=TEMPLATES_PATH,
+        )
+        page_cache.clear()
+
+    def test_data_to_lambda_returns_copies(self):
+        view = data_to_lambda({'items': [1, 2], 'meta': {'key': 'value'}})
+        data = view()
+        data['extra'] = True
+        assert_not_in('extra', view())
+        assert_equal(view()['items'], (1, 2))
+        with assert_raises(TypeError):
+            data['meta']['key'] = 'changed'
+
+    @mock.patch('framework.routing.settings.STATIC_PAGE_CACHE_TTL', 60)
+    def test_page_rendered_once_for_anonymous_visitors(self):
+        process_rules(self.app, [Rule('/about/', 'get', {}, self.renderer)])
+        with mock.patch.object(self.renderer, 'render', wraps=self.renderer.render) as mock_render:
+            first = self.wt.get('/about/')
+            second = self.wt.get('/about/')
+        assert_equal(mock_render.call_count, 1)
+        assert_equal(first.body, second.body)
+        assert_in('child template content', second.body)
+
+    @mock.patch('framework.routing.settings.STATIC_PAGE_CACHE_TTL', 0)
+    def test_page_cache_disabled(self):
+        process_rules(self.app, [Rule('/about/', 'get', {}, self.renderer)])
+        with mock.patch.object(self.renderer, 'render', wraps=self.renderer.render) as mock_render:
+            self.wt.get('/about/')
+            self.wt.get('/about/')
+        assert_equal(mock_render.call_count, 2)
@@ -1,8 +1,14 @@
+import datetime
+
+import mock
 from nose.tools import *
 
+from framework import sessions
 from framework.sessions import utils
+from framework.sessions.backends import CachedSessionBackend
 from tests import factories
-from tests.base import DbTestCase
+from tests.base import DbTestCase, OsfTestCase
+from website import settings
 from website.models import User
 from website.models import Session
 
@@ -34,3 +40,80 @@ class SessionUtilsTestCase(DbTestCase):
 
         utils.remove_sessions_for_user(self.user)
         assert_equal(1, Session.find().count())
+
+
+class TestSaveSession(OsfTestCase):
+
+    def setUp(self):
+        super(TestSaveSession, self).setUp()
+        self.session = Session(data={'auth_user_id': 'abc12'})
+        self.session.save()
+        sessions.set_session(self.session)
+        sessions.mark_clean(self.session)
+
+    @mock.patch('framework.sessions.backend.save')
+    def test_unchanged_session_not_saved(self, mock_save):
+        sessions.save_session(self.session)
+        assert_false(mock_save.called)
+
+    @mock.patch('framework.sessions.backend.save')
+    def test_changed_session_saved(self, mock_save):
+        self.session.data['auth_user_fullname'] = 'Freddie Mercury'
+        sessions.save_session(self.session)
+        mock_save.assert_called_once_with(self.session)
+        sessions.save_session(self.session)
+        assert_equal(mock_save.call_count, 1)
+
+    @mock.patch('framework.sessions.backend.save')
+    def test_new_session_saved(self, mock_save):
+        session = Session()
+        sessions.set_session(session)
+        sessions.save_session(session)
+        mock_save.assert_called_once_with(session)
+
+    @mock.patch('framework.sessions.backend.save')
+    def test_stale_session_touched(self, mock_save):
+        stale = datetime.datetime.utcnow() - datetime.timedelta(
+            seconds=settings.SESSION_TOUCH_INTERVAL + 1
+        )
+        self.session._fields['date_modified'].__set__(self.session, stale, safe=True)
+        sessions.save_session(self.session)
+        mock_save.assert_called_once_with(self.session)
+
+
+class TestHistory(OsfTestCase):
+
+    def test_history_read_from_cookie(self):
+        cookie = sessions.history_serializer.dumps(['/dashboard/'])
+        headers = {'Cookie': '{0}={1}'.format(settings.SESSION_HISTORY_COOKIE_NAME, cookie)}
+        with self.app.app.test_request_context(headers=headers):
+            assert_equal(sessions.get_history(), ['/dashboard/'])
+
+    def test_tampered_cookie_ignored(self):
+        headers = {'Cookie': '{0}=/evil/'.format(settings.SESSION_HISTORY_COOKIE_NAME)}
+        with self.app.app.test_request_context(headers=headers):
+            assert_equal(sessions.get_history(), [])
+
+
+class TestCachedSessionBackend(OsfTestCase):
+
+    def setUp(self):
+        super(TestCachedSessionBackend, self).setUp()
+        self.backend = CachedSessionBackend()
+        self.session = Session(data={'auth_user_id': 'abc12'})
+        self.backend.save(self.session)
+
+    def test_load_from_cache(self):
+        Session._storage[0].store.update(
+            {'_id': self.session._id},
+            {'$set': {'data.auth_user_id': 'def34'}},
+        )
+        Session._clear_caches()
+        loaded = self.backend.load(self.session._id)
+        assert_equal(loaded.data['auth_user_id'], 'abc12')
+        assert_equal(self.backend.metrics()['hits'], 1)
+
+    def test_invalidate(self):
+        self.backend.invalidate(self.session._id)
+        Session.remove_one(self.session)
+        assert_is_none(self.backend.load(self.session._id))
@@ -13,15 +13,19 @@ from modularodm import storage
 from framework.auth import signing
 from framework.auth.core import Auth
 from framework.exceptions import HTTPError
+from framework import sessions
+from framework.caching import stamps
 from framework.sessions.model import Session
+from framework.sessions.utils import remove_sessions_for_user
 from framework.mongo import set_up_storage
 
 from website import settings
 from website.util import api_url_for, rubeus
+from website.addons import base
 from website.addons.base import exceptions, GuidFile
 from website.project import new_private_link
 from website.project.utils import serialize_node
-from website.addons.base import AddonConfig, AddonNodeSettingsBase, views
+from website.addons.base import AddonConfig, AddonNodeSettingsBase, views, grants
 from website.addons.github.model import AddonGitHubOauthSettings
 from tests.base import OsfTestCase
 from tests.factories import AuthUserFactory, ProjectFactory
@@ -107,6 +111,7 @@ class TestAddonAuth(OsfTestCase):
         self.session.save()
         self.cookie = itsdangerous.Signer(settings.SECRET_KEY).sign(self.session._id)
         self.configure_addon()
+        grants.invalidate_grants()
 
     def configure_addon(self):
         self.user.add_addon('github')
@@ -166,6 +171,92 @@ class TestAddonAuth(OsfTestCase):
         res = test_app.get(url, expect_errors=True)
         assert_equal(res.status_code, 403)
 
+    @mock.patch('website.addons.base.views.Node.load')
+    def test_auth_grant_cached(self, mock_load):
+        mock_load.return_value = self.node
+        hits = grants.metrics()['hits']
+        url = self.build_url()
+        first = self.test_app.get(url)
+        second = self.test_app.get(url)
+        assert_equal(first.json, second.json)
+        assert_equal(mock_load.call_count, 1)
+        assert_equal(grants.metrics()['hits'], hits + 1)
+
+    def test_auth_grant_not_shared_across_actions(self):
+        self.test_app.get(self.build_url())
+        with mock.patch('website.addons.base.views.Node.load') as mock_load:
+            mock_load.return_value = self.node
+            self.test_app.get(self.build_url(action='upload'))
+        assert_equal(mock_load.call_count, 1)
+
+    def test_auth_grant_invalidated_on_permission_change(self):
+        read_user = AuthUserFactory()
+        self.node.add_contributor(read_user, permissions=['read'], auth=self.auth_obj)
+        self.node.save()
+        session = Session(data={'auth_user_id': read_user._id})
+        session.save()
+        cookie = itsdangerous.Signer(settings.SECRET_KEY).sign(session._id)
+        url = self.build_url(cookie=cookie)
+        res = self.test_app.get(url)
+        assert_equal(res.status_code, 200)
+        self.node.remove_contributor(read_user, auth=self.auth_obj)
+        self.node.save()
+        res = self.test_app.get(url, expect_errors=True)
+        assert_equal(res.status_code, 403)
+
+    def test_auth_grant_invalidated_on_addon_settings_change(self):
+        self.test_app.get(self.build_url())
+        self.node_addon.repo = 'another-repo'
+        self.node_addon.save()
+        res = self.test_app.get(self.build_url())
+        assert_equal(res.json['settings'], self.node_addon.serialize_waterbutler_settings())
+
+    def assert_grant_recomputed(self):
+        with mock.patch('website.addons.base.views.Node.load') as mock_load:
+            mock_load.return_value = self.node
+            self.test_app.get(self.build_url())
+        assert_equal(mock_load.call_count, 1)
+
+    def test_auth_grant_invalidated_on_logout(self):
+        self.test_app.get(self.build_url())
+        grants.invalidate_session_grants(self.session._id)
+        self.assert_grant_recomputed()
+
+    def test_auth_grant_invalidated_on_token_change(self):
+        self.test_app.get(self.build_url())
+        self.oauth_settings.oauth_access_token = 'refreshed'
+        self.oauth_settings.save()
+        self.assert_grant_recomputed()
+
+    def test_auth_grant_invalidated_on_session_removal(self):
+        self.test_app.get(self.build_url())
+        remove_sessions_for_user(self.user)
+        res = self.test_app.get(self.build_url(), expect_errors=True)
+        assert_equal(res.status_code, 401)
+
+    def test_auth_grant_invalidated_by_other_process(self):
+        self.test_app.get(self.build_url())
+        # Another process changing permissions bumps the stamp, but cannot
+        # clear the cache of this process
+        stamps.bump(grants.GRANTS_STAMP)
+        assert_equal(len(grants.grant_cache), 1)
+        self.assert_grant_recomputed()
+
+    def test_auth_grant_session_invalidated_by_other_process(self):
+        self.test_app.get(self.build_url())
+        stamps.bump(grants.session_stamp(self.session._id))
+        self.assert_grant_recomputed()
+
+    def test_auth_grant_not_shared_with_next_user_of_session(self):
+        self.test_app.get(self.build_url())
+        other_user = AuthUserFactory()
+        with self.app.app.test_request_context():
+            sessions.set_session(self.session)
+            sessions.mark_clean(self.session)
+            sessions.create_session(None, data={'auth_user_id': other_user._id})
+        res = self.test_app.get(self.build_url(), expect_errors=True)
+        assert_equal(res.status_code, 403)
+
 
 class TestAddonLogs(OsfTestCase):
 
@@ -225,6 +316,33 @@ class TestAddonLogs(OsfTestCase):
         self.node.reload()
         assert_equal(len(self.node.logs), nlogs + 1)
 
+    def test_add_log_invalidates_file_metadata(self):
+        provider = self.node_addon.config.short_name
+        keys = [
+            (self.node._id, provider, 'pizza', None),
+            (self.node._id, provider, 'pizza', 'abc123'),
+            (self.node._id, provider, 'pasta', None),
+        ]
+        for key in keys:
+            current_stamps, _ = base.get_file_metadata(key)
+            base.set_file_metadata(key, current_stamps, {})
+        url = self.node.api_url_for('create_waterbutler_log')
+        payload = self.build_payload(metadata={'path': '/pizza'})
+        self.test_app.put_json(url, payload, headers={'Content-Type': 'application/json'})
+        assert_is_none(base.get_file_metadata(keys[0])[1])
+        assert_is_none(base.get_file_metadata(keys[1])[1])
+        assert_is_not_none(base.get_file_metadata(keys[2])[1])
+
+    def test_add_log_for_folder_invalidates_provider_metadata(self):
+        provider = self.node_addon.config.short_name
+        key = (self.node._id, provider, 'pizza', None)
+        current_stamps, _ = base.get_file_metadata(key)
+        base.set_file_metadata(key, current_stamps, {})
+        url = self.node.api_url_for('create_waterbutler_log')
+        payload = self.build_payload(metadata={'path': '/toppings/'}, action='create_folder')
+        self.test_app.put_json(url, payload, headers={'Content-Type': 'application/json'})
+        assert_is_none(base.get_file_metadata(key)[1])
+
     def test_add_log_missing_args(self):
         path = 'pizza'
         url = self.node.api_url_for('create_waterbutler_log')
@@ -355,9 +473,10 @@ class TestAddonFileViewHelpers(OsfFileTestCase):
 
         assert_false(mock_render.called)
 
+    @mock.patch('website.addons.base.views.scheduler.touch')
     @mock.patch('website.addons.base.views.codecs.open')
     @mock.patch('website.addons.base.views.build_rendered_html')
-    def test_get_or_start_returns_found(self, mock_render, mock_open):
+    def test_get_or_start_returns_found(self, mock_render, mock_open, mock_touch):
         file_guid = mock.Mock()
         mock_file = mock.Mock()
 
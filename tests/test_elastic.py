@@ -1,4 +1,6 @@
 import unittest
+
+import mock
 from nose.tools import *  # PEP8 asserts
 
 from tests.base import OsfTestCase
@@ -8,13 +10,20 @@ from tests.factories import (
     UnregUserFactory, UnconfirmedUserFactory
 )
 
+from flask import g
+
 from framework.auth.core import Auth
+from framework.caching import TTLCache
+from framework.transactions import handlers as transaction_handlers
 
 from website import settings
 import website.search.search as search
 from website.search import elastic_search
+from website.search import handlers as search_handlers
 from website.search.util import build_query
-from website.search_migration.migrate import migrate
+from website.search_migration.migrate import (
+    migrate, set_up_index, create_checkpoints, get_pending_index
+)
 
 @requires_search
 class SearchTestCase(OsfTestCase):
@@ -228,6 +237,36 @@ class TestPublicNodes(SearchTestCase):
         assert_equal(docs[0]['parent_title'], 'hello & world')
         assert_true(docs[0]['parent_url'])
 
+    @mock.patch('website.search.elastic_search.Node.load')
+    def test_component_results_do_not_load_parent(self, mock_load):
+        docs = query('category:component AND ' + self.title)['results']
+        assert_equal(len(docs), 1)
+        assert_equal(docs[0]['parent_title'], self.title)
+        assert_false(mock_load.called)
+
+    def test_search_is_single_request(self):
+        with mock.patch.object(elastic_search.es, 'search', wraps=elastic_search.es.search) as mock_search:
+            results = query(self.title)
+        assert_equal(mock_search.call_count, 1)
+        assert_equal(results['counts']['total'], 3)
+        assert_equal(len(results['results']), 3)
+
+    def test_doc_type_filters_hits_not_counts(self):
+        results = search.search(build_query(self.title), index=elastic_search.INDEX, doc_type='project')
+        assert_equal(len(results['results']), 1)
+        assert_equal(results['counts']['project'], 1)
+        assert_equal(results['counts']['component'], 1)
+        assert_equal(results['counts']['registration'], 1)
+
+    @mock.patch('website.search.elastic_search.facet_cache', TTLCache(ttl=60))
+    def test_facets_cached(self):
+        first = query(self.title)
+        with mock.patch.object(elastic_search.es, 'search', wraps=elastic_search.es.search) as mock_search:
+            second = query(self.title)
+        assert_not_in('aggregations', mock_search.call_args[1]['body'])
+        assert_equal(first['counts'], second['counts'])
+        assert_equal(first['tags'], second['tags'])
+
     def test_make_parent_private(self):
         """Make parent of component, public, then private, and verify that the
         component still appears but doesn't link to the parent in search.
@@ -426,6 +465,13 @@ class TestAddContributor(SearchTestCase):
         contribs = search.search_contributor(self.name2.split(' ')[0])
         assert_equal(len(contribs['users']), 0)
 
+    @mock.patch('website.search.elastic_search.User.load')
+    def test_search_contributor_does_not_load_each_user(self, mock_load):
+        contribs = search.search_contributor(self.name1, current_user=self.user)
+        assert_equal(len(contribs['users']), 1)
+        assert_equal(contribs['users'][0]['n_projects_in_common'], 0)
+        assert_false(mock_load.called)
+
     def test_search_partial(self):
         """Verify that searching for part of first name yields exactly one
         result.
@@ -438,6 +484,75 @@ class TestAddContributor(SearchTestCase):
         assert_equal(len(contribs['users']), 0)
 
 
+@requires_search
+class TestIndexQueue(SearchTestCase):
+
+    def setUp(self):
+        super(TestIndexQueue, self).setUp()
+        self.user = UserFactory(fullname='Freddie Mercury')
+        self.project = ProjectFactory(
+            title='Bohemian',
+            creator=self.user,
+            is_public=True,
+        )
+        search_handlers.search_before_request()
+
+    def test_update_deferred_until_teardown(self):
+        self.project.title = 'Rhapsody'
+        self.project.save()
+        assert_equal(len(query('Rhapsody')['results']), 0)
+
+        search_handlers.search_teardown_request()
+        elastic_search.es.indices.refresh(elastic_search.INDEX)
+        assert_equal(len(query('Rhapsody')['results']), 1)
+
+    @mock.patch('website.search.search.bulk_update_nodes')
+    def test_repeated_saves_indexed_once(self, mock_bulk_update):
+        for title in ['Under', 'Pressure']:
+            self.project.title = title
+            self.project.save()
+        search_handlers.search_teardown_request()
+        mock_bulk_update.assert_called_once_with(
+            [self.project],
+            index=elastic_search.INDEX,
+        )
+
+    @mock.patch('website.search.search.bulk_update_users')
+    def test_failed_request_not_indexed(self, mock_bulk_update):
+        self.user.fullname = 'Brian May'
+        self.user.save()
+        search_handlers.search_teardown_request(error=Exception())
+        assert_false(mock_bulk_update.called)
+
+    @mock.patch('website.search.search.bulk_update_users')
+    def test_rolled_back_request_not_indexed(self, mock_bulk_update):
+        self.user.fullname = 'Brian May'
+        self.user.save()
+        setattr(g, transaction_handlers.TRANSACTION_STATUS_ATTR, transaction_handlers.ROLLED_BACK)
+        search_handlers.search_teardown_request()
+        assert_false(mock_bulk_update.called)
+
+    @mock.patch('website.search.search.bulk_update_users')
+    def test_committed_request_indexed(self, mock_bulk_update):
+        self.user.fullname = 'Brian May'
+        self.user.save()
+        setattr(g, transaction_handlers.TRANSACTION_STATUS_ATTR, transaction_handlers.COMMITTED)
+        search_handlers.search_teardown_request()
+        assert_true(mock_bulk_update.called)
+
+    @mock.patch('website.search.search.bulk_update_users')
+    def test_failed_task_not_indexed(self, mock_bulk_update):
+        search_handlers.search_task_prerun()
+        search_handlers._task_local.queue.add_user(self.user, elastic_search.INDEX)
+        search_handlers.search_task_postrun(state='FAILURE')
+        assert_false(mock_bulk_update.called)
+
+        search_handlers.search_task_prerun()
+        search_handlers._task_local.queue.add_user(self.user, elastic_search.INDEX)
+        search_handlers.search_task_postrun(state='SUCCESS')
+        assert_true(mock_bulk_update.called)
+
+
 class TestSearchExceptions(OsfTestCase):
     """
     Verify that the correct exception is thrown when the connection is lost
@@ -519,3 +634,18 @@ class TestSearchMigration(SearchTestCase):
             var = self.es.indices.get_aliases()
             assert_equal(var[settings.ELASTIC_INDEX + '_v{}'.format(n + 1)]['aliases'].keys()[0], settings.ELASTIC_INDEX)
             assert not var.get(settings.ELASTIC_INDEX + '_v{}'.format(n))
+
+    def test_migration_indexes_records(self):
+        migrate(delete=False, index=settings.ELASTIC_INDEX)
+        assert_equal(len(query(self.project.title)['results']), 1)
+        assert_equal(len(query_user(self.user.fullname)['results']), 1)
+
+    def test_resume_interrupted_migration(self):
+        new_index = set_up_index(settings.ELASTIC_INDEX)
+        create_checkpoints(new_index)
+        assert_equal(get_pending_index(settings.ELASTIC_INDEX), new_index)
+
+        migrate(delete=False, index=settings.ELASTIC_INDEX, resume=True)
+        assert_is_none(get_pending_index(settings.ELASTIC_INDEX))
+        var = self.es.indices.get_aliases()
+        assert_equal(var[new_index]['aliases'].keys()[0], settings.ELASTIC_INDEX)
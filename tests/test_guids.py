@@ -11,6 +11,8 @@ from modularodm import fields
 from modularodm.storage.mongostorage import MongoStorage
 
 from framework.mongo import database
+from framework.caching import TTLCache
+from framework.guid import resolution
 from framework.guid.model import GuidStoredObject
 
 from website import models
@@ -38,6 +40,7 @@ class TestResolveGuid(OsfTestCase):
     def setUp(self):
         super(TestResolveGuid, self).setUp()
         self.node = NodeFactory()
+        resolution.resolution_cache.clear()
 
     def test_resolve_guid(self):
         res_guid = self.app.get(self.node.web_url_for('node_setting', _guid=True), auth=self.node.creator.auth)
@@ -63,3 +66,67 @@ class TestResolveGuid(OsfTestCase):
             expect_errors=True,
         )
         assert_equal(res.status_code, 404)
+
+    def test_resolve_guid_cached(self):
+        url = self.node.web_url_for('node_setting', _guid=True)
+        res_first = self.app.get(url, auth=self.node.creator.auth)
+        with mock.patch('website.views.Guid.load') as mock_load:
+            res_second = self.app.get(url, auth=self.node.creator.auth)
+        assert_false(mock_load.called)
+        assert_equal(res_first.text, res_second.text)
+        cached = resolution.get_resolution(self.node._id, 'settings/', 'GET')
+        assert_equal(cached.model, models.Node)
+        assert_equal(cached.primary_key, self.node._id)
+        assert_equal(cached.endpoint, 'node_setting')
+
+    def test_resolve_guid_cache_kept_on_unrelated_save(self):
+        self.app.get(
+            self.node.web_url_for('node_setting', _guid=True),
+            auth=self.node.creator.auth,
+        )
+        self.node.title = 'Changed'
+        self.node.save()
+        assert_is_not_none(resolution.get_resolution(self.node._id, 'settings/', 'GET'))
+
+    def test_resolve_guid_cache_invalidated_on_referent_change(self):
+        self.app.get(
+            self.node.web_url_for('node_setting', _guid=True),
+            auth=self.node.creator.auth,
+        )
+        other = NodeFactory()
+        resolution.set_resolution(other._id, None, 'GET', mock.Mock())
+        assert_equal(len(resolution.resolution_cache), 2)
+        guid = models.Guid.load(self.node._id)
+        guid.referent = None
+        guid.save()
+        assert_equal(len(resolution.resolution_cache), 1)
+        assert_is_not_none(resolution.get_resolution(other._id, None, 'GET'))
+
+    def test_resolve_guid_cache_not_used_when_url_changes(self):
+        url = self.node.web_url_for('node_setting', _guid=True)
+        self.app.get(url, auth=self.node.creator.auth)
+        deep_url = '/project/{0}/moved/'.format(self.node._id)
+        with mock.patch('website.project.model.Node.deep_url', deep_url):
+            with mock.patch('website.views.Guid.load') as mock_load:
+                mock_load.return_value = None
+                self.app.get(url, auth=self.node.creator.auth, expect_errors=True)
+        assert_true(mock_load.called)
+        assert_is_none(resolution.get_resolution(self.node._id, 'settings/', 'GET'))
+
+    @mock.patch.object(resolution, 'resolution_cache', TTLCache(maxsize=2))
+    def test_resolve_guid_cache_bounded_across_suffixes(self):
+        for page in ['one', 'two', 'three']:
+            self.app.get(
+                '/{0}/wiki/{1}/'.format(self.node._id, page),
+                auth=self.node.creator.auth,
+                expect_errors=True,
+            )
+        assert_equal(len(resolution.resolution_cache), 2)
+
+    def test_resolve_guid_cached_deleted_node(self):
+        url = self.node.web_url_for('node_setting', _guid=True)
+        self.app.get(url, auth=self.node.creator.auth)
+        self.node.is_deleted = True
+        self.node.save()
+        res = self.app.get(url, auth=self.node.creator.auth, expect_errors=True)
+        assert_equal(res.status_code, 410)
@@ -15,4 +15,19 @@ def test_plain_mail():
 def test_html_mail():
     mail = mails.Mail('test', subject='A test email')
     rendered = mail.html(name='World')
-    assert_equal(rendered.strip(), 'Hello <p>World</p>')
\ No newline at end of file
+    assert_equal(rendered.strip(), 'Hello <p>World</p>')
+
+@mock.patch('website.mails.settings.USE_CELERY', False)
+@mock.patch('website.mails.settings.MAIL_BULK_BATCH_SIZE', 2)
+@mock.patch('website.mails.tasks.send_emails')
+def test_send_mail_batch(mock_send_emails):
+    mail = mails.Mail('test', subject='A test email to ${name}')
+    with mails.MailBatch() as batch:
+        for name in ['Ada', 'Grace', 'Barbara']:
+            mails.send_mail(name + '@example.com', mail, batch=batch, name=name)
+        assert_false(mock_send_emails.called)
+    assert_equal(mock_send_emails.call_count, 2)
+    messages = mock_send_emails.call_args_list[0][1]['messages']
+    assert_equal([each['to_addr'] for each in messages], ['Ada@example.com', 'Grace@example.com'])
+    assert_equal(messages[0]['subject'], 'A test email to Ada')
+    assert_equal(len(batch), 0)
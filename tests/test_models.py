@@ -25,10 +25,11 @@ from framework.auth.utils import impute_names_model
 from framework.bcrypt import check_password_hash
 from website import filters, language, settings
 from website.exceptions import NodeStateError
+from website.project import counters
 from website.profile.utils import serialize_user
 from website.project.model import (
     ApiKey, Comment, Node, NodeLog, Pointer, ensure_schemas, has_anonymous_link,
-    get_pointer_parent,
+    get_pointer_parent, CloneJob,
 )
 from website.util.permissions import CREATOR_PERMISSIONS
 from website.util import web_url_for, api_url_for
@@ -1678,6 +1679,182 @@ class TestNodeTraversals(OsfTestCase):
         descendants = list(point1.get_descendants_recursive())
         assert_equal(len(descendants), 1)
 
+class TestAggregateLogs(OsfTestCase):
+
+    def setUp(self):
+        super(TestAggregateLogs, self).setUp()
+        self.user = UserFactory()
+        self.auth = Auth(user=self.user)
+        self.project = ProjectFactory(creator=self.user)
+
+    def test_paginated_in_database(self):
+        for _ in range(5):
+            self.project.add_log('file_added', params={'node': self.project._id}, auth=self.auth)
+        logs = list(self.project.get_aggregate_logs_queryset(self.auth))
+        page = self.project.get_aggregate_logs_queryset(self.auth).offset(2).limit(2)
+        assert_equal(list(page), logs[2:4])
+        assert_equal(self.project.get_aggregate_logs_queryset(self.auth).count(), len(logs))
+
+    def test_logs_copied_from_private_source_hidden(self):
+        self.project.is_public = True
+        self.project.save()
+        forker = UserFactory()
+        fork = self.project.fork_node(auth=Auth(user=forker))
+        assert_greater(fork.get_aggregate_logs_queryset(Auth(user=forker)).count(), 1)
+
+        self.project.is_public = False
+        self.project.save()
+        logs = fork.get_aggregate_logs_queryset(Auth(user=forker))
+        assert_equal([log.action for log in logs], [NodeLog.NODE_FORKED])
+
+
+class TestNodeCounters(OsfTestCase):
+
+    def setUp(self):
+        super(TestNodeCounters, self).setUp()
+        self.user = UserFactory()
+        self.auth = Auth(user=self.user)
+        self.project = ProjectFactory(creator=self.user, is_public=True)
+
+    def get_counters(self):
+        return counters.get_node_counters(self.project)
+
+    def test_counters_computed_on_first_read(self):
+        assert_is_none(counters.get_collection().find_one({'_id': self.project._id}))
+        node_counters = self.get_counters()
+        assert_equal(node_counters['logs'], len(self.project.logs))
+        assert_equal(node_counters['user_logs'], {self.user._id: len(self.project.logs)})
+        assert_is_not_none(counters.get_collection().find_one({'_id': self.project._id}))
+
+    def test_add_log_increments(self):
+        before = self.get_counters()
+        self.project.add_log('file_added', params={'node': self.project._id}, auth=self.auth)
+        after = self.get_counters()
+        assert_equal(after['logs'], before['logs'] + 1)
+        assert_equal(
+            counters.get_user_log_count(after, self.user),
+            counters.get_user_log_count(before, self.user) + 1,
+        )
+        assert_equal(after, counters.compute_counters(self.project))
+
+    def test_fork_and_remove_fork(self):
+        self.get_counters()
+        fork = self.project.fork_node(auth=self.auth)
+        assert_equal(self.get_counters()['forks'], 1)
+        fork.remove_node(auth=self.auth)
+        assert_equal(self.get_counters()['forks'], 0)
+
+    def test_register_increments(self):
+        self.get_counters()
+        RegistrationFactory(project=self.project, user=self.user)
+        assert_equal(self.get_counters()['registrations'], 1)
+
+    def test_watch_and_unwatch(self):
+        self.get_counters()
+        watcher = UserFactory()
+        config = WatchConfigFactory(node=self.project)
+        watcher.watch(config)
+        assert_equal(self.get_counters()['watchers'], 1)
+        watcher.unwatch(config)
+        assert_equal(self.get_counters()['watchers'], 0)
+
+    def test_pointers(self):
+        self.get_counters()
+        other = ProjectFactory(creator=self.user)
+        pointer = other.add_pointer(self.project, auth=self.auth)
+        assert_equal(self.get_counters()['pointers'], 1)
+        other.rm_pointer(pointer, auth=self.auth)
+        assert_equal(self.get_counters()['pointers'], 0)
+
+    def test_fork_with_pointer_and_remove_fork(self):
+        self.get_counters()
+        other = ProjectFactory(creator=self.user)
+        other.add_pointer(self.project, auth=self.auth)
+        assert_equal(self.get_counters()['pointers'], 1)
+        fork = other.fork_node(auth=self.auth)
+        assert_equal(self.get_counters()['pointers'], 2)
+        assert_equal(self.get_counters(), counters.compute_counters(self.project))
+        fork.remove_node(auth=self.auth)
+        assert_equal(self.get_counters()['pointers'], 1)
+        assert_equal(self.get_counters(), counters.compute_counters(self.project))
+
+    def test_reset_counters_fixes_drift(self):
+        self.get_counters()
+        counters.increment(self.project._id, logs=10)
+        counters.reset_counters(self.project)
+        assert_equal(self.get_counters(), counters.compute_counters(self.project))
+
+
+class TestCloneJob(OsfTestCase):
+
+    def setUp(self):
+        super(TestCloneJob, self).setUp()
+        self.user = UserFactory()
+        self.auth = Auth(user=self.user)
+        self.project = ProjectFactory(creator=self.user)
+        self.component = NodeFactory(creator=self.user, parent=self.project)
+
+    def test_fork_job(self):
+        job = CloneJob.create(CloneJob.FORK, self.project, self.auth)
+        assert_equal(job.total, 2)
+        job.run(batch_size=1)
+        assert_equal(job.status, CloneJob.SUCCESS)
+        assert_equal(job.done, 2)
+        fork = job.result
+        assert_true(fork.is_fork)
+        assert_false(fork.is_deleted)
+        assert_equal(fork.title, 'Fork of ' + self.project.title)
+        assert_equal(fork.forked_from, self.project)
+        assert_equal(len(fork.nodes), 1)
+        assert_equal(fork.nodes[0].forked_from, self.component)
+        assert_equal(fork.nodes[0].title, self.component.title)
+
+    def test_clones_hidden_until_finished(self):
+        job = CloneJob.create(CloneJob.FORK, self.project, self.auth)
+        job.run_batch(1)
+        assert_equal(job.status, CloneJob.RUNNING)
+        assert_true(Node.load(job.clones[self.project._id]).is_deleted)
+        assert_is_none(job.result)
+        job.run_batch(1)
+        assert_equal(job.status, CloneJob.SUCCESS)
+        assert_false(Node.load(job.clones[self.project._id]).is_deleted)
+        assert_false(Node.load(job.clones[self.component._id]).is_deleted)
+
+    def test_cloned_entries_skipped_on_resume(self):
+        job = CloneJob.create(CloneJob.FORK, self.project, self.auth)
+        job.run_batch(1)
+        job.queue.insert(0, {'source': self.project._id, 'parent': None, 'pointer': False})
+        job.run(batch_size=1)
+        assert_equal(len(self.project.node__forked), 1)
+
+    def test_unreadable_components_not_forked(self):
+        self.project.is_public = True
+        self.project.save()
+        forker = UserFactory()
+        job = CloneJob.create(CloneJob.FORK, self.project, Auth(user=forker))
+        assert_equal(job.total, 1)
+        job.run()
+        assert_equal(len(job.result.nodes), 0)
+
+    def test_fork_private_project_forbidden(self):
+        with assert_raises(PermissionsError):
+            CloneJob.create(CloneJob.FORK, self.project, Auth(user=UserFactory()))
+
+    def test_registration_job(self):
+        job = CloneJob.create(
+            CloneJob.REGISTRATION, self.project, self.auth,
+            schema=None, template='Template1', data='Some words',
+        )
+        job.run()
+        registration = job.result
+        assert_true(registration.is_registration)
+        assert_equal(registration.registered_from, self.project)
+        assert_equal(registration.nodes[0].registered_from, self.component)
+        self.project.reload()
+        assert_equal(self.project.logs[-1].action, NodeLog.PROJECT_REGISTERED)
+        assert_equal(self.project.logs[-1].params['registration'], registration._id)
+
+
 class TestRemoveNode(OsfTestCase):
 
     def setUp(self):
@@ -17,6 +17,7 @@ from scripts.send_digest import group_digest_notifications_by_user
 from scripts.send_digest import group_messages_by_node
 from scripts.send_digest import remove_sent_digest_notifications
 from scripts.send_digest import send_digest
+from scripts.send_digest import user_id_ranges
 from website.notifications import constants
 from website.notifications.model import NotificationDigest
 from website.notifications.model import NotificationSubscription
@@ -962,6 +963,59 @@ class TestSendEmails(OsfTestCase):
         emails.check_parent(node._id, 'comments', [], user, node, datetime.datetime.utcnow())
         assert_false(mock_send.called)
 
+    def test_resolve_subscribers_closest_subscription_wins(self):
+        user = factories.UserFactory()
+        self.project.add_contributor(user, permissions=['read', 'write', 'admin'], save=True)
+        self.project_subscription.email_digest.append(user)
+        self.project_subscription.save()
+        self.node_subscription.none.append(user)
+        self.node_subscription.save()
+        component = factories.NodeFactory(parent=self.node)
+
+        subscribers = utils.resolve_subscribers(component._id, 'comments')
+        by_user = dict((each.user_id, each) for each in subscribers)
+        assert_equal(by_user[user._id].notification_type, 'none')
+        assert_equal(by_user[user._id].uid, component._id)
+        assert_equal(by_user[self.project.creator._id].notification_type, 'email_transactional')
+        assert_equal(by_user[self.project.creator._id].uid, self.node._id)
+        assert_true(by_user[self.project.creator._id].inherited)
+
+    def test_resolve_subscribers_cached_until_subscription_saved(self):
+        user = factories.UserFactory()
+        self.project.add_contributor(user, permissions=['read', 'write', 'admin'], save=True)
+        first = utils.resolve_subscribers(self.node._id, 'comments')
+        assert_is(utils.resolve_subscribers(self.node._id, 'comments'), first)
+        self.node_subscription.email_transactional.append(user)
+        self.node_subscription.save()
+        subscribers = utils.resolve_subscribers(self.node._id, 'comments')
+        assert_in(user._id, [each.user_id for each in subscribers])
+
+    def test_resolve_subscribers_invalidated_by_other_process(self):
+        user = factories.UserFactory()
+        self.project.add_contributor(user, permissions=['read', 'write', 'admin'], save=True)
+        self.project_subscription.email_transactional.append(user)
+        self.project_subscription.save()
+        subscribers = utils.resolve_subscribers(self.node._id, 'comments')
+        assert_in(user._id, [each.user_id for each in subscribers])
+        # Simulate another process removing the contributor: the database
+        # changes and the stamp is bumped, but this process's cache is kept
+        with mock.patch('website.notifications.utils.subscribers_cache.clear'):
+            self.project.remove_contributor(user, auth=Auth(self.project.creator))
+            self.project.save()
+        subscribers = utils.resolve_subscribers(self.node._id, 'comments')
+        assert_not_in(user._id, [each.user_id for each in subscribers])
+
+    @mock.patch('website.notifications.emails.send')
+    def test_notify_excludes_parent_subscribers_without_access(self, mock_send):
+        user = factories.UserFactory()
+        self.project.add_contributor(user, permissions=['read'], save=True)
+        self.project_subscription.email_transactional.append(user)
+        self.project_subscription.save()
+        sent_subscribers = emails.notify(self.node._id, 'comments', self.user, self.node, datetime.datetime.utcnow())
+        assert_not_in(user._id, sent_subscribers)
+        for call in mock_send.call_args_list:
+            assert_not_in(user._id, call[0][0])
+
     # @mock.patch('website.notifications.emails.email_transactional')
     # def test_send_calls_correct_mail_function(self, email_transactional):
     #     emails.send([self.user], 'email_transactional', self.project._id, 'comments',
@@ -1026,6 +1080,25 @@ class TestSendEmails(OsfTestCase):
             url=self.project.absolute_url + 'settings/',
         )
 
+    @mock.patch('website.mails.send_mail')
+    @mock.patch('website.mails.render_message')
+    def test_send_email_transactional_renders_once_per_timezone(self, render_message, send_mail):
+        render_message.return_value = 'Hello'
+        users = [factories.UserFactory(timezone='Etc/UTC') for _ in range(3)]
+        users.append(factories.UserFactory(timezone='Asia/Tokyo'))
+        emails.email_transactional(
+            [each._id for each in users], self.project._id, 'comments',
+            user=self.project.creator,
+            node=self.project,
+            timestamp=datetime.datetime.utcnow().replace(tzinfo=pytz.utc),
+            gravatar_url=self.user.gravatar_url,
+            content='',
+            parent_comment='',
+            url=self.project.absolute_url,
+        )
+        assert_equal(send_mail.call_count, 4)
+        assert_equal(render_message.call_count, 2)
+
     def test_send_email_digest_creates_digest_notification(self):
         subscribed_users = [factories.UserFactory()._id]
         digest_count_before = NotificationDigest.find().count()
@@ -1139,7 +1212,7 @@ class TestSendDigest(OsfTestCase):
             node_lineage=[project._id]
         )
         d2.save()
-        user_groups = group_digest_notifications_by_user()
+        user_groups = list(group_digest_notifications_by_user())
         expected = [{
                     u'user_id': user._id,
                     u'info': [{
@@ -1157,9 +1230,31 @@ class TestSendDigest(OsfTestCase):
                     }]
         }]
 
+        expected.sort(key=lambda group: group['user_id'])
+
         assert_equal(len(user_groups), 2)
         assert_equal(user_groups, expected)
 
+    def test_group_digest_notifications_by_user_range(self):
+        timestamp = datetime.datetime.utcnow() - datetime.timedelta(hours=1)
+        for user_id in ['abcde', 'mnopq', 'xyz12']:
+            factories.NotificationDigestFactory(
+                user_id=user_id,
+                timestamp=timestamp,
+                message='Hello',
+                node_lineage=[factories.ProjectFactory()._id]
+            ).save()
+        user_groups = list(group_digest_notifications_by_user(start='b', end='x'))
+        assert_equal([group['user_id'] for group in user_groups], ['mnopq'])
+
+    def test_user_id_ranges_cover_all_ids(self):
+        ranges = user_id_ranges(4)
+        assert_equal(len(ranges), 4)
+        assert_is_none(ranges[0][0])
+        assert_is_none(ranges[-1][1])
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert_equal(end, start)
+
     @mock.patch('scripts.send_digest.remove_sent_digest_notifications')
     @mock.patch('website.mails.send_mail')
     def test_send_digest_called_with_correct_args(self, mock_send_mail, mock_callback):
@@ -1170,7 +1265,7 @@ class TestSendDigest(OsfTestCase):
             node_lineage=[factories.ProjectFactory()._id]
         )
         d.save()
-        user_groups = group_digest_notifications_by_user()
+        user_groups = list(group_digest_notifications_by_user())
         send_digest(user_groups)
         assert_true(mock_send_mail.called)
         assert_equals(mock_send_mail.call_count, len(user_groups))
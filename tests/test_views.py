@@ -22,6 +22,7 @@ from framework.auth.utils import impute_names_model
 
 from website import mailchimp_utils
 from website.views import _rescale_ratio
+from website.project import counters
 from website.util import permissions
 from website.models import Node, Pointer, NodeLog
 from website.project.model import ensure_schemas, has_anonymous_link
@@ -902,6 +903,20 @@ class TestChildrenViews(OsfTestCase):
         assert_is_instance(rescale_ratio, float)
         assert_equal(rescale_ratio, _rescale_ratio(Auth(self.user), [child]))
 
+    def test_get_children_rescale_ratio_follows_pointed_node_logs(self):
+        project = ProjectFactory(creator=self.user)
+        pointed = ProjectFactory(creator=self.user)
+        pointer = project.add_pointer(pointed, Auth(self.user), save=True)
+        url = project.api_url_for('get_children')
+        self.app.get(url, auth=self.user.auth)
+
+        for _ in range(3):
+            pointed.add_log('file_added', params={'node': pointed._id}, auth=Auth(self.user))
+        res = self.app.get(url, auth=self.user.auth)
+
+        assert_equal(res.json['rescale_ratio'], float(len(pointed.logs)))
+        assert_is_none(counters.get_collection().find_one({'_id': pointer._id}))
+
     def test_get_children_render_nodes_receives_auth(self):
         project = ProjectFactory(creator=self.user)
         NodeFactory(parent=project, creator=self.user)
@@ -2082,6 +2097,21 @@ class TestWatchViews(OsfTestCase):
         assert_equal(res.json['pages'], 2)
         assert_equal(res.json['logs'][0]['action'], 'file_added')
 
+    def test_get_watched_logs_with_cursor(self):
+        project = ProjectFactory()
+        for _ in range(12):
+            project.logs.append(NodeLogFactory(user=self.user, action="file_added"))
+        project.save()
+        self.user.watch(WatchConfigFactory(node=project))
+        self.user.save()
+        url = api_url_for("watched_logs_get")
+        first = self.app.get(url, auth=self.auth).json
+        second = self.app.get(url, {'cursor': first['cursor']}, auth=self.auth).json
+        assert_equal(len(second['logs']), 3)
+        assert_is_none(second['cursor'])
+        ids = [log['id'] for log in first['logs'] + second['logs']]
+        assert_equal(ids, sorted(set(ids), reverse=True))
+
     def test_get_more_watched_logs_invalid_page(self):
         project = ProjectFactory()
         watch_cfg = WatchConfigFactory(node=project)
@@ -3826,6 +3856,27 @@ class TestForkViews(OsfTestCase):
         assert_equal(len(res.json['nodes']), 1)
         assert_equal(res.json['nodes'][0]['id'], fork._id)
 
+    def test_fork_returns_job_status(self):
+        url = self.project.api_url_for('node_fork_page')
+        res = self.app.post_json(url, auth=self.user.auth)
+        assert_equal(res.json['status'], 'success')
+        fork = self.project.node__forked[0]
+        assert_equal(res.json['result'], fork.url)
+
+        res = self.app.get(res.json['status_url'], auth=self.user.auth)
+        assert_equal(res.json['status'], 'success')
+        assert_equal(res.json['done'], res.json['total'])
+
+    def test_job_status_forbidden_to_other_users(self):
+        url = self.project.api_url_for('node_fork_page')
+        res = self.app.post_json(url, auth=self.user.auth)
+        res = self.app.get(
+            res.json['status_url'],
+            auth=AuthUserFactory().auth,
+            expect_errors=True,
+        )
+        assert_equal(res.status_code, http.FORBIDDEN)
+
 
 class TestProjectCreation(OsfTestCase):
 
@@ -88,6 +88,17 @@ class TestWatching(OsfTestCase):
         day_log_ids = list(self.user.get_daily_digest_log_ids())
         assert_in(self.last_log._id, day_log_ids)
 
+    def test_get_recent_log_ids_merges_watched_nodes(self):
+        fork = self.project.fork_node(auth=Auth(user=self.project.creator))
+        self._watch_project(self.project)
+        self._watch_project(fork)
+        log_ids = list(self.user.get_recent_log_ids())
+        # Logs shared by the fork and its original are yielded once
+        assert_equal(log_ids, sorted(set(log_ids), reverse=True))
+        assert_equal(len(log_ids), self.user.count_recent_log_ids())
+        older = list(self.user.get_recent_log_ids(before=log_ids[0]))
+        assert_equal(older, log_ids[1:])
+
     def _watch_project(self, project):
         watch_config = WatchConfigFactory(node=project)
         self.user.watch(watch_config)
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import os
+import copy
 import glob
 import importlib
 import mimetypes
@@ -14,12 +15,15 @@ import requests
 from modularodm import Q
 from modularodm.storage.base import KeyExistsException
 
+from framework.caching import TTLCache
+from framework.caching import stamps
 from framework.exceptions import PermissionsError
 from framework.mongo import StoredObject
 from framework.routing import process_rules
 from framework.guid.model import GuidStoredObject
 
 from website import settings
+from website.addons.base import grants
 from website.addons.base import exceptions
 from website.addons.base import serializer
 from website.project.model import Node
@@ -51,6 +55,55 @@ STATUS_EXCEPTIONS = {
     404: exceptions.FileDoesntExistError
 }
 
+# Reuse connections to WaterButler across requests
+waterbutler_session = requests.Session()
+
+# Maps (node id, provider, path, revision) => (stamps, file metadata from
+# WaterButler). Entries are checked against version stamps shared by all
+# processes (see `framework.caching.stamps`), since the metadata of the latest
+# version of a file changes whenever the file is updated through any process.
+metadata_cache = TTLCache(
+    maxsize=settings.WATERBUTLER_METADATA_CACHE_SIZE,
+    ttl=settings.WATERBUTLER_METADATA_CACHE_TTL,
+)
+
+
+def metadata_stamps(node_id, provider, path):
+    """Names of the stamps covering cached metadata of a file: one for all
+    files of the provider on the node, and one for the file itself.
+    """
+    prefix = 'metadata:{0}:{1}'.format(node_id, provider)
+    return prefix, prefix + ':' + path.lstrip('/')
+
+
+def get_file_metadata(key):
+    """Look up cached metadata for ``key``, a tuple of node id, provider,
+    path, and revision.
+
+    :return: Tuple of the current stamps of the file, to store with metadata
+        fetched after the lookup, and the cached metadata or `None`
+    """
+    current_stamps = stamps.get_stamps(*metadata_stamps(*key[:3]))
+    cached = metadata_cache.get(key)
+    if cached is None or cached[0] != current_stamps:
+        return current_stamps, None
+    return current_stamps, cached[1]
+
+
+def set_file_metadata(key, current_stamps, metadata):
+    metadata_cache.set(key, (current_stamps, metadata))
+
+
+def invalidate_file_metadata(node_id, provider, path):
+    """Drop cached metadata for all revisions of a file, or for all files of
+    the provider on the node if ``path`` is a folder, in every process.
+    """
+    provider_stamp, file_stamp = metadata_stamps(node_id, provider, path)
+    if not path.strip('/') or path.endswith('/'):
+        stamps.bump(provider_stamp)
+    else:
+        stamps.bump(file_stamp)
+
 
 def _is_image(filename):
     mtype, _ = mimetypes.guess_type(filename)
@@ -387,14 +440,32 @@ class GuidFile(GuidStoredObject):
 
         raise exceptions.AddonEnrichmentError(response.status_code)
 
+    @property
+    def _metadata_key(self):
+        return (
+            self.node._id,
+            self.provider,
+            self.waterbutler_path.lstrip('/'),
+            self.revision,
+        )
+
     def _fetch_metadata(self, should_raise=False):
-        # Note: We should look into caching this at some point
-        # Some attributes may change however.
-        resp = requests.get(self.metadata_url)
+        # Access to the node is checked by the views before metadata is
+        # fetched, so cached metadata is shared by all visitors. Entries are
+        # invalidated by `create_waterbutler_log` when the file changes.
+        key = self._metadata_key
+        current_stamps, metadata = get_file_metadata(key)
+        if metadata is not None:
+            self._metadata_cache = copy.deepcopy(metadata)
+            return
+
+        resp = waterbutler_session.get(self.metadata_url)
 
         if should_raise:
             self._exception_from_response(resp)
         self._metadata_cache = resp.json()['data']
+        if resp.ok:
+            set_file_metadata(key, current_stamps, copy.deepcopy(self._metadata_cache))
 
 
 class AddonSettingsBase(StoredObject):
@@ -406,6 +477,14 @@ class AddonSettingsBase(StoredObject):
         'abstract': True,
     }
 
+    def save(self, *args, **kwargs):
+        saved_fields = super(AddonSettingsBase, self).save(*args, **kwargs)
+        # Cached WaterButler grants include serialized credentials and
+        # settings
+        if saved_fields:
+            grants.invalidate_grants()
+        return saved_fields
+
     def delete(self, save=True):
         self.deleted = True
         self.on_delete()
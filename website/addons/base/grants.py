@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Short-lived cache of the authorization grants returned to WaterButler by
+`get_auth`. Bulk file operations call `get_auth` once per file with the same
+session, node, provider, and action; cached grants spare the session, user,
+and node lookups and the serialization of provider credentials.
+
+Grants are dropped in every process when node permissions, private links, or
+addon settings change, and when a session logs out or changes user: each
+grant is stored with the version stamps current when it was computed, and is
+discarded once another process has bumped them (see
+`framework.caching.stamps`).
+"""
+
+import itsdangerous
+
+from framework.caching import TTLCache
+from framework.caching import stamps
+from framework.auth import signals as auth_signals
+
+from website import settings
+
+
+GRANTS_STAMP = 'grants'
+
+# Maps grant key => (stamps, grant)
+grant_cache = TTLCache(
+    maxsize=settings.WATERBUTLER_AUTH_CACHE_SIZE,
+    ttl=settings.WATERBUTLER_AUTH_CACHE_TTL,
+)
+
+
+def get_session_id(cookie):
+    """Unsign a session cookie without loading the session.
+
+    :return: Session primary key, or `None` if the cookie is invalid
+    """
+    try:
+        return itsdangerous.Signer(settings.SECRET_KEY).unsign(cookie)
+    except itsdangerous.BadSignature:
+        return None
+
+
+def grant_key(session_id, node_id, provider, action, view_only=None):
+    return (session_id, node_id, provider, action, view_only)
+
+
+def session_stamp(session_id):
+    return '{0}:session:{1}'.format(GRANTS_STAMP, session_id)
+
+
+def get_stamps(session_id):
+    """Read the stamps covering the grants of a session; read them before
+    computing a grant, so that changes made meanwhile invalidate it.
+    """
+    return stamps.get_stamps(GRANTS_STAMP, session_stamp(session_id))
+
+
+def get_grant(key, current_stamps):
+    cached = grant_cache.get(key)
+    if cached is None:
+        return None
+    grant_stamps, grant = cached
+    if grant_stamps != current_stamps:
+        grant_cache.delete(key)
+        return None
+    return grant
+
+
+def set_grant(key, current_stamps, grant):
+    grant_cache.set(key, (current_stamps, grant))
+
+
+def invalidate_grants():
+    stamps.bump(GRANTS_STAMP)
+    grant_cache.clear()
+
+
+@auth_signals.user_logged_out.connect
+def invalidate_session_grants(session_id):
+    stamps.bump(session_stamp(session_id))
+
+
+def metrics():
+    return grant_cache.metrics()
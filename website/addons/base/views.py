@@ -15,11 +15,14 @@ from modularodm.exceptions import NoResultsFound
 from framework.auth import Auth
 from framework.sentry import log_exception
 from framework.exceptions import HTTPError
+from framework.render import scheduler
 from framework.render.tasks import build_rendered_html
 from framework.auth.decorators import must_be_logged_in, must_be_signed
 
 from website import settings
 from website.project import decorators
+from website.addons.base import grants
+from website.addons.base import invalidate_file_metadata
 from website.addons.base import exceptions
 from website.models import User, Node, NodeLog
 from website.util import rubeus
@@ -134,6 +137,13 @@ def get_auth(**kwargs):
 
     view_only = request.args.get('view_only')
 
+    session_id = grants.get_session_id(cookie)
+    key = grants.grant_key(session_id, node_id, provider_name, action, view_only)
+    grant_stamps = grants.get_stamps(session_id)
+    grant = grants.get_grant(key, grant_stamps)
+    if grant is not None:
+        return grant
+
     user = User.from_cookie(cookie)
 
     node = Node.load(node_id)
@@ -153,7 +163,7 @@ def get_auth(**kwargs):
         log_exception()
         raise HTTPError(httplib.BAD_REQUEST)
 
-    return {
+    grant = {
         'auth': make_auth(user),
         'credentials': credentials,
         'settings': settings,
@@ -162,6 +172,8 @@ def get_auth(**kwargs):
             _absolute=True,
         ),
     }
+    grants.set_grant(key, grant_stamps, grant)
+    return grant
 
 
 LOG_ACTION_MAP = {
@@ -199,6 +211,7 @@ def create_waterbutler_log(payload, **kwargs):
         raise HTTPError(httplib.BAD_REQUEST)
     auth = Auth(user=user)
     node_addon.create_waterbutler_log(auth, osf_action, metadata)
+    invalidate_file_metadata(node._id, provider, metadata['path'])
 
     return {'status': 'success'}
 
@@ -210,7 +223,9 @@ def get_or_start_render(file_guid, start_render=True):
         return error.as_html()
 
     try:
-        return codecs.open(file_guid.mfr_cache_path, 'r', 'utf-8').read()
+        rendered = codecs.open(file_guid.mfr_cache_path, 'r', 'utf-8').read()
+        scheduler.touch(file_guid.mfr_cache_path)
+        return rendered
     except IOError:
         if start_render:
             # Start rendering job if requested
@@ -13,6 +13,7 @@ from box import CredentialsV2, refresh_v2_token, BoxClientException
 from framework.auth import Auth
 from framework.exceptions import HTTPError
 
+from website.addons.base import grants
 from website.addons.base import exceptions
 from website.addons.base import AddonUserSettingsBase, AddonNodeSettingsBase, GuidFile
 
@@ -81,6 +82,13 @@ class BoxOAuthSettings(StoredObject):
     refresh_token = fields.StringField()
     expires_at = fields.DateTimeField()
 
+    def save(self, *args, **kwargs):
+        saved_fields = super(BoxOAuthSettings, self).save(*args, **kwargs)
+        # Cached WaterButler grants include the access token
+        if {'access_token'}.intersection(saved_fields):
+            grants.invalidate_grants()
+        return saved_fields
+
     def fetch_access_token(self):
         self.refresh_access_token()
         return self.access_token
@@ -53,7 +53,7 @@ class TestDataverseFile(DataverseAddonTestCase):
         assert_equals(dvf1, dvf2)
 
     @mock.patch('website.addons.dataverse.model._get_current_user')
-    @mock.patch('website.addons.base.requests.get')
+    @mock.patch('website.addons.base.waterbutler_session.get')
     def test_name(self, mock_get, mock_get_user):
         mock_get_user.return_value = self.user
         mock_response = mock.Mock(ok=True, status_code=200)
@@ -71,7 +71,7 @@ class TestDataverseFile(DataverseAddonTestCase):
         assert_equal(dvf.name, 'Morty.foo')
 
     @mock.patch('website.addons.dataverse.model._get_current_user')
-    @mock.patch('website.addons.base.requests.get')
+    @mock.patch('website.addons.base.waterbutler_session.get')
     def test_mfr_temp_path(self, mock_get, mock_get_user):
         mock_get_user.return_value = self.user
         mock_response = mock.Mock(ok=True, status_code=200)
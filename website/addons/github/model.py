@@ -15,6 +15,7 @@ from framework.mongo import StoredObject
 from website import settings
 from website.util import web_url_for
 from website.addons.base import GuidFile
+from website.addons.base import grants
 from website.addons.base import exceptions
 from website.addons.base import AddonUserSettingsBase, AddonNodeSettingsBase
 
@@ -101,6 +102,13 @@ class AddonGitHubOauthSettings(StoredObject):
     oauth_access_token = fields.StringField()
     oauth_token_type = fields.StringField()
 
+    def save(self, *args, **kwargs):
+        saved_fields = super(AddonGitHubOauthSettings, self).save(*args, **kwargs)
+        # Cached WaterButler grants include the access token
+        if {'oauth_access_token', 'oauth_token_type'}.intersection(saved_fields):
+            grants.invalidate_grants()
+        return saved_fields
+
 
 class AddonGitHubUserSettings(AddonUserSettingsBase):
 
@@ -12,6 +12,7 @@ from tests.factories import UserFactory, ProjectFactory
 
 from framework.auth import Auth
 
+from website.addons.base import exceptions
 from website.addons.github.exceptions import NotFoundError
 from website.addons.github import settings as github_settings
 from website.addons.github.exceptions import TooBigToRenderError
@@ -48,7 +49,7 @@ class TestFileGuid(OsfTestCase):
 
         assert_equal(guid.extra, {})
 
-    @mock.patch('website.addons.base.requests.get')
+    @mock.patch('website.addons.base.waterbutler_session.get')
     def test_unique_identifier(self, mock_get):
         mock_response = mock.Mock(ok=True, status_code=200)
         mock_get.return_value = mock_response
@@ -66,6 +67,41 @@ class TestFileGuid(OsfTestCase):
 
         assert_equal(guid.unique_identifier, 'Im a little tea pot')
 
+    @mock.patch('website.addons.base.waterbutler_session.get')
+    def test_enrich_cached(self, mock_get):
+        mock_response = mock.Mock(ok=True, status_code=200)
+        mock_get.return_value = mock_response
+        mock_response.json.return_value = {
+            'data': {
+                'name': 'Morty',
+                'extra': {
+                    'fileSha': 'Im a little tea pot'
+                }
+            }
+        }
+
+        guid, _ = self.node_addon.find_or_create_file_guid('perth')
+        guid.enrich()
+        guid.enrich()
+        assert_equal(mock_get.call_count, 1)
+
+        # Other revisions are fetched separately
+        guid.maybe_set_version(ref='abc123')
+        guid.enrich()
+        assert_equal(mock_get.call_count, 2)
+
+    @mock.patch('website.addons.base.waterbutler_session.get')
+    def test_enrich_errors_not_cached(self, mock_get):
+        mock_response = mock.Mock(ok=False, status_code=404)
+        mock_get.return_value = mock_response
+        mock_response.json.return_value = {}
+
+        guid, _ = self.node_addon.find_or_create_file_guid('perth')
+        for _ in range(2):
+            with assert_raises(exceptions.FileDoesntExistError):
+                guid.enrich()
+        assert_equal(mock_get.call_count, 2)
+
     def test_exception_from_response(self):
         mock_response = mock.Mock()
         mock_response.json.return_value = {'errors': [{'code': 'too_large'}]}
@@ -14,6 +14,7 @@ from framework.auth import Auth
 from framework.mongo import StoredObject
 
 from website import settings
+from website.addons.base import grants
 from website.addons.base import exceptions
 from website.addons.base import AddonUserSettingsBase, AddonNodeSettingsBase, GuidFile
 
@@ -120,6 +121,13 @@ class GoogleDriveOAuthSettings(StoredObject):
     refresh_token = fields.StringField()
     expires_at = fields.DateTimeField()
 
+    def save(self, *args, **kwargs):
+        saved_fields = super(GoogleDriveOAuthSettings, self).save(*args, **kwargs)
+        # Cached WaterButler grants include the access token
+        if {'access_token'}.intersection(saved_fields):
+            grants.invalidate_grants()
+        return saved_fields
+
     def fetch_access_token(self):
         self.refresh_access_token()
         return self.access_token
@@ -126,6 +126,9 @@ class OsfStorageFileNode(StoredObject):
     name = fields.StringField(required=True, index=True)
     kind = fields.StringField(required=True, index=True)
     parent = fields.ForeignField('OsfStorageFileNode', index=True)
+    # Primary keys of all ancestors, root first; kept in step with `parent` on
+    # save so that a subtree can be selected with a single indexed query
+    ancestors = fields.StringField(list=True, index=True)
     versions = fields.ForeignField('OsfStorageFileVersion', list=True)
     node_settings = fields.ForeignField('OsfStorageNodeSettings', required=True, index=True)
 
@@ -157,6 +160,44 @@ class OsfStorageFileNode(StoredObject):
     def children(self):
         return self.__class__.find(Q('parent', 'eq', self._id))
 
+    @property
+    @utils.must_be('folder')
+    def descendants(self):
+        self.ensure_descendant_ancestors()
+        return self.__class__.find(Q('ancestors', 'eq', self._id))
+
+    @property
+    def lineage(self):
+        """Primary keys of this record's ancestors, root first. Follows
+        `parent` for records saved before `ancestors` was added.
+        """
+        if self.parent is None:
+            return []
+        if self.ancestors and self.ancestors[-1] == self.parent._id:
+            return list(self.ancestors)
+        return self.parent.lineage + [self.parent._id]
+
+    @utils.must_be('folder')
+    def ensure_descendant_ancestors(self):
+        """Fill in `ancestors` beneath this folder if any of its children
+        were saved before the field was added, so that the subtree can be
+        selected by ancestor.
+        """
+        unmigrated = self.__class__.find(
+            Q('parent', 'eq', self._id) &
+            Q('ancestors', 'ne', self._id)
+        )
+        if unmigrated.count():
+            utils.set_subtree_ancestors(
+                self.__class__, self._id, self.lineage + [self._id],
+            )
+
+    def save(self, *args, **kwargs):
+        ancestors = self.parent.lineage + [self.parent._id] if self.parent else []
+        if list(self.ancestors) != ancestors:
+            self.ancestors = ancestors
+        return super(OsfStorageFileNode, self).save(*args, **kwargs)
+
     @property
     def is_folder(self):
         return self.kind == 'folder'
@@ -271,32 +312,54 @@ class OsfStorageFileNode(StoredObject):
                 return
         raise errors.VersionNotFoundError
 
-    def log(self, auth, action, version=True):
+    def log(self, auth, action, version=True, extra=None):
         node_logger = logs.OsfStorageNodeLogger(
             auth=auth,
             node=self.node,
             path=self.path,
             full_path=self.materialized_path(),
         )
-        extra = {'version': len(self.versions)} if version else None
-        node_logger.log(action, extra=extra, save=True)
+        extra = dict(extra or {})
+        if version:
+            extra['version'] = len(self.versions)
+        node_logger.log(action, extra=extra or None, save=True)
+
+    def _set_descendants_deleted(self, is_deleted):
+        """Mark every descendant with a single bulk update.
+
+        :return: Number of descendants updated
+        """
+        self.ensure_descendant_ancestors()
+        query = (
+            Q('ancestors', 'eq', self._id) &
+            Q('is_deleted', 'eq', not is_deleted)
+        )
+        count = self.__class__.find(query).count()
+        if count:
+            self.__class__.update(query, {'is_deleted': is_deleted})
+        return count
 
     def delete(self, auth, recurse=True, log=True):
+        """Delete this file or folder and, if ``recurse``, everything beneath
+        it. The whole subtree gets a single log entry.
+        """
         if self.is_deleted:
             raise errors.DeleteError
 
         self.is_deleted = True
         self.save()
 
+        count = 0
         if recurse and self.is_folder:
-            for child in self.children:
-                try:
-                    child.delete(auth, recurse=recurse, log=log)
-                except errors.DeleteError:
-                    pass  # If a child is already deleted ignore the error
+            count = self._set_descendants_deleted(True)
 
         if log:
-            self.log(auth, NodeLog.FILE_REMOVED, version=False)
+            self.log(
+                auth,
+                NodeLog.FILE_REMOVED,
+                version=False,
+                extra={'descendants': count} if self.is_folder else None,
+            )
 
     def undelete(self, auth, recurse=True, log=True):
         if not self.is_deleted:
@@ -305,12 +368,16 @@ class OsfStorageFileNode(StoredObject):
         self.is_deleted = False
         self.save()
 
+        count = 0
         if recurse and self.is_folder:
-            for child in self.children:
-                child.undelete(auth, recurse=recurse, log=log)
+            count = self._set_descendants_deleted(False)
 
         if log:
-            self.log(auth, NodeLog.FILE_ADDED if self.is_file else NodeLog.FOLDER_CREATED)
+            self.log(
+                auth,
+                NodeLog.FILE_ADDED if self.is_file else NodeLog.FOLDER_CREATED,
+                extra={'descendants': count} if self.is_folder else None,
+            )
 
     def serialized(self):
         """Build Treebeard JSON for folder or file.
@@ -12,6 +12,7 @@ from website.addons.osfstorage.tests.utils import StorageTestCase
 
 import datetime
 
+from modularodm import Q
 from modularodm import exceptions as modm_errors
 
 from website.models import NodeLog
@@ -39,7 +40,7 @@ class TestFileGuid(OsfTestCase):
         assert_equal(guid.path, guid.waterbutler_path)
         assert_equals(guid.waterbutler_path, '/baz/foo/bar')
 
-    @mock.patch('website.addons.base.requests.get')
+    @mock.patch('website.addons.base.waterbutler_session.get')
     def test_unique_identifier(self, mock_get):
         mock_response = mock.Mock(ok=True, status_code=200)
         mock_get.return_value = mock_response
@@ -259,6 +260,88 @@ class TestOsfstorageFileNode(StorageTestCase):
         child = self.node_settings.root_node.append_folder('Cloud').append_file('Carp')
         assert_equals('/Cloud/Carp', child.materialized_path())
 
+    def test_ancestors(self):
+        root = self.node_settings.root_node
+        folder = root.append_folder('Cloud')
+        child = folder.append_file('Carp')
+        assert_equal(root.ancestors, [])
+        assert_equal(child.ancestors, [root._id, folder._id])
+        assert_equal(
+            sorted(each._id for each in root.descendants),
+            sorted([folder._id, child._id]),
+        )
+
+    def test_delete_nested_folder_logs_once(self):
+        parent = self.node_settings.root_node.append_folder('Test')
+        nested = parent.append_folder('Nested')
+        kid = nested.append_file('Kid')
+        nlogs = len(self.project.logs)
+        parent.delete(self.auth_obj)
+        for each in (nested, kid):
+            each.reload()
+            assert_true(each.is_deleted)
+        self.project.reload()
+        assert_equal(len(self.project.logs), nlogs + 1)
+        assert_equal(self.project.logs[-1].params['descendants'], 2)
+
+    def test_undelete_nested_folder(self):
+        parent = self.node_settings.root_node.append_folder('Test')
+        nested = parent.append_folder('Nested')
+        kid = nested.append_file('Kid')
+        parent.delete(None, log=False)
+        parent.undelete(None, log=False)
+        for each in (nested, kid):
+            each.reload()
+            assert_false(each.is_deleted)
+
+    def test_copy_files_nested(self):
+        parent = self.node_settings.root_node.append_folder('Test')
+        kid = parent.append_folder('Nested').append_file('Kid')
+        kid.versions.append(factories.FileVersionFactory())
+        kid.save()
+        target = self.project.get_addon('osfstorage')
+
+        copied = utils.copy_files(parent, target)
+        assert_not_equal(copied._id, parent._id)
+        assert_is_none(copied.parent)
+        copied_nested = copied.find_child_by_name('Nested', kind='folder')
+        copied_kid = copied_nested.find_child_by_name('Kid')
+        assert_equal(copied_kid.ancestors, [copied._id, copied_nested._id])
+        assert_equal(copied_kid.versions, kid.versions)
+        assert_equal(len(copied.descendants), 2)
+
+    def make_legacy_tree(self):
+        parent = self.node_settings.root_node.append_folder('Test')
+        nested = parent.append_folder('Nested')
+        kid = nested.append_file('Kid')
+        # Records saved before `ancestors` was added
+        model.OsfStorageFileNode.update(
+            Q('node_settings', 'eq', self.node_settings._id),
+            {'ancestors': []},
+        )
+        return parent, nested, kid
+
+    def test_delete_legacy_folder(self):
+        parent, nested, kid = self.make_legacy_tree()
+        parent.delete(None, log=False)
+        for each in (nested, kid):
+            each.reload()
+            assert_true(each.is_deleted)
+
+    def test_copy_legacy_folder(self):
+        parent, nested, kid = self.make_legacy_tree()
+        copied = utils.copy_files(parent, self.project.get_addon('osfstorage'))
+        copied_nested = copied.find_child_by_name('Nested', kind='folder')
+        assert_is_not_none(copied_nested.find_child_by_name('Kid'))
+        assert_equal(len(copied.descendants), 2)
+
+    def test_append_to_legacy_folder(self):
+        parent, nested, kid = self.make_legacy_tree()
+        nested.reload()
+        child = nested.append_file('Second')
+        root_id = self.node_settings.root_node._id
+        assert_equal(child.ancestors, [root_id, parent._id, nested._id])
+
 
 class TestNodeSettingsModel(StorageTestCase):
 
@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
 
 import os
+import bson
 import httplib
 import logging
 import functools
 
 
+from modularodm import Q
 from modularodm.exceptions import NoResultsFound
 from modularodm.exceptions import ValidationValueError
 from modularodm.storage.base import KeyExistsException
@@ -116,23 +118,68 @@ def must_be(_type):
     return _must_be
 
 
+def set_subtree_ancestors(model, folder_id, lineage, dry_run=False):
+    """Set the ancestors of every record beneath ``folder_id``, one level at a
+    time, with one bulk update per folder.
+
+    :param list lineage: Primary keys of the ancestors of ``folder_id``'s
+        children, root first
+    :return: Number of folders visited
+    """
+    collection = model._storage[0].store
+    # Pairs of (folder id, ancestors of the folder's children)
+    queue = [(folder_id, list(lineage))]
+    count = 0
+    while queue:
+        folder_id, ancestors = queue.pop(0)
+        count += 1
+        if not dry_run:
+            model.update(Q('parent', 'eq', folder_id), {'ancestors': ancestors})
+        for child in collection.find({'parent': folder_id, 'kind': 'folder'}, {'_id': True}):
+            queue.append((child['_id'], ancestors + [child['_id']]))
+    return count
+
+
 def copy_files(src, target_settings, parent=None):
-    """Copy the files from src to the target nodesettings
+    """Copy src and everything beneath it to the target nodesettings. The
+    subtree is read with one query on the ancestor index and written with one
+    bulk insert.
+
     :param OsfStorageFileNode src: The source to copy children from
     :param OsfStorageNodeSettings target_settings: The node settings of the project to copy files to
     :param OsfStorageFileNode parent: The parent of to attach the clone of src to, if applicable
     """
-    cloned = src.clone()
-    cloned.parent = parent
-    cloned.node_settings = target_settings
-
-    if src.is_file:
-        cloned.versions = src.versions
-
-    cloned.save()
-
+    model = src.__class__
+    collection = model._storage[0].store
     if src.is_folder:
-        for child in src.children:
-            copy_files(child, target_settings, parent=cloned)
-
-    return cloned
+        src.ensure_descendant_ancestors()
+    records = list(collection.find({
+        '$or': [{'_id': src._id}, {'ancestors': src._id}],
+    }))
+    # Maps source primary keys to the primary keys of their copies
+    copied_ids = {
+        record['_id']: str(bson.ObjectId())
+        for record in records
+    }
+    ancestors = parent.lineage + [parent._id] if parent else []
+
+    copies = []
+    for record in records:
+        copy = dict(record)
+        copy.pop('__backrefs', None)
+        copy['_id'] = copied_ids[record['_id']]
+        copy['node_settings'] = target_settings._id
+        if record['_id'] == src._id:
+            copy['parent'] = parent._id if parent else None
+            copy['ancestors'] = ancestors
+        else:
+            lineage = record['ancestors']
+            copy['parent'] = copied_ids[record['parent']]
+            copy['ancestors'] = ancestors + [
+                copied_ids[each]
+                for each in lineage[lineage.index(src._id):]
+            ]
+        copies.append(copy)
+
+    collection.insert(copies)
+    return model.load(copied_ids[src._id])
@@ -11,13 +11,14 @@ import markdown
 from markdown.extensions import codehilite, fenced_code, wikilinks
 from modularodm import fields
 
+from framework.caching import TTLCache
 from framework.forms.utils import sanitize
 from framework.guid.model import GuidStoredObject
 
 from website import settings
 from website.addons.base import AddonNodeSettingsBase
 from website.addons.wiki import utils as wiki_utils
-from website.addons.wiki.settings import WIKI_CHANGE_DATE
+from website.addons.wiki.settings import WIKI_CHANGE_DATE, WIKI_RENDER_CACHE_SIZE
 from website.project.model import write_permissions_revoked
 
 from .exceptions import (
@@ -29,6 +30,12 @@ from .exceptions import (
 
 logger = logging.getLogger(__name__)
 
+# Rendered HTML and plain text of wiki pages, keyed on (format, page id, node
+# id). Page content is immutable per version; the node is part of the key
+# because forks and registrations share page objects but link to their own
+# wiki URLs.
+rendered_cache = TTLCache(maxsize=WIKI_RENDER_CACHE_SIZE)
+
 
 class AddonWikiNodeSettings(AddonNodeSettingsBase):
 
@@ -118,6 +125,15 @@ class NodeWikiPage(GuidStoredObject):
 
     def html(self, node):
         """The cleaned HTML of the page"""
+        key = ('html', self._primary_key, node._primary_key)
+        html = rendered_cache.get(key)
+        if html is None:
+            html = self._render_html(node)
+            if self._primary_key:
+                rendered_cache.set(key, html)
+        return html
+
+    def _render_html(self, node):
         sanitized_content = render_content(self.content, node=node)
         try:
             return linkify(
@@ -130,8 +146,18 @@ class NodeWikiPage(GuidStoredObject):
 
     def raw_text(self, node):
         """ The raw text of the page, suitable for using in a test search"""
-
-        return sanitize(self.html(node), tags=[], strip=True)
+        key = ('text', self._primary_key, node._primary_key)
+        text = rendered_cache.get(key)
+        if text is None:
+            text = sanitize(self.html(node), tags=[], strip=True)
+            if self._primary_key:
+                rendered_cache.set(key, text)
+        return text
+
+    def invalidate_rendered(self):
+        """Drop cached renderings of this page for every node.
+        """
+        rendered_cache.delete_matching(lambda key: key[1] == self._primary_key)
 
     def get_draft(self, node):
         """
@@ -143,19 +169,15 @@ class NodeWikiPage(GuidStoredObject):
         sharejs_uuid = wiki_utils.get_sharejs_uuid(node, self.page_name)
 
         doc_item = db['docs'].find_one({'_id': sharejs_uuid})
-        if doc_item:
-            sharejs_version = doc_item['_v']
-            sharejs_timestamp = doc_item['_m']['mtime']
-            sharejs_timestamp /= 1000   # Convert to appropriate units
-            sharejs_date = datetime.datetime.utcfromtimestamp(sharejs_timestamp)
-
-            if sharejs_version > 1 and sharejs_date > self.date:
-                return doc_item['_data']
+        if doc_item and wiki_utils.get_draft_info(doc_item, self.date)['has_draft']:
+            return doc_item['_data']
 
         return self.content
 
     def save(self, *args, **kwargs):
         rv = super(NodeWikiPage, self).save(*args, **kwargs)
+        if 'content' in rv:
+            self.invalidate_rendered()
         if self.node:
             self.node.update_search()
         return rv
@@ -6,4 +6,6 @@ SHAREJS_PORT = 7007
 SHAREJS_URL = '{}:{}'.format(SHAREJS_HOST, SHAREJS_PORT)
 
 # TODO: Change to release date for wiki change
-WIKI_CHANGE_DATE = datetime.datetime.utcfromtimestamp(1423760098)
\ No newline at end of file
+WIKI_CHANGE_DATE = datetime.datetime.utcfromtimestamp(1423760098)
+# Maximum number of rendered wiki pages kept in memory by each process
+WIKI_RENDER_CACHE_SIZE = 2000
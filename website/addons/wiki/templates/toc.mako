@@ -36,14 +36,22 @@
                     <li ${'class="active"' if page['name'] == wiki_name else '' | n}>
                             <div class="row">
                                 %if page['name'] == wiki_name and user['can_edit']:
-                                    <a href="${page['url']}"><div class="col-xs-10">${page['name']}</div></a>
+                                    <a href="${page['url']}"><div class="col-xs-10">${page['name']}
+                                        % if page.get('has_draft'):
+                                            <i class="fa fa-pencil text-muted" data-toggle="tooltip" title="Unsaved draft" data-placement="right"></i>
+                                        % endif
+                                    </div></a>
                                     <div class="col-xs-2">
                                         <a href="#" data-toggle="modal" data-target="#deleteWiki">
                                             <i class="fa fa-trash-o text-danger pointer fa-lg" data-toggle="tooltip" title="Delete" data-placement="left"> </i>
                                         </a>
                                     </div>
                                 % else:
-                                    <a href="${page['url']}"><div class="col-xs-12">${page['name']}</div></a>
+                                    <a href="${page['url']}"><div class="col-xs-12">${page['name']}
+                                        % if page.get('has_draft'):
+                                            <i class="fa fa-pencil text-muted" data-toggle="tooltip" title="Unsaved draft" data-placement="right"></i>
+                                        % endif
+                                    </div></a>
                                 % endif
                             </div>
                     </li>
@@ -22,7 +22,7 @@ from website.addons.wiki.views import _serialize_wiki_toc, _get_wiki_web_urls, _
 from website.addons.wiki.model import NodeWikiPage, render_content
 from website.addons.wiki.utils import (
     get_sharejs_uuid, generate_private_uuid, share_db, delete_share_doc,
-    migrate_uuid, format_wiki_version,
+    migrate_uuid, format_wiki_version, get_draft_status,
 )
 from website.addons.wiki.tests.config import EXAMPLE_DOCS, EXAMPLE_OPS
 from framework.auth import Auth
@@ -703,6 +703,38 @@ class TestWikiLinks(OsfTestCase):
         assert_equal(expected, wiki.html(node))
 
 
+class TestWikiRenderCache(OsfTestCase):
+
+    def setUp(self):
+        super(TestWikiRenderCache, self).setUp()
+        self.project = ProjectFactory()
+        self.wiki = NodeWikiFactory(content='[[wiki2]]', node=self.project)
+
+    @mock.patch('website.addons.wiki.model.render_content', wraps=render_content)
+    def test_page_rendered_once(self, mock_render):
+        html = self.wiki.html(self.project)
+        assert_equal(self.wiki.html(self.project), html)
+        self.wiki.raw_text(self.project)
+        assert_equal(mock_render.call_count, 1)
+
+    def test_rendered_per_node(self):
+        fork = self.project.fork_node(Auth(self.project.creator))
+        assert_in(
+            fork.web_url_for('project_wiki_view', wname='wiki2'),
+            self.wiki.html(fork),
+        )
+        assert_in(
+            self.project.web_url_for('project_wiki_view', wname='wiki2'),
+            self.wiki.html(self.project),
+        )
+
+    def test_content_change_invalidates(self):
+        self.wiki.html(self.project)
+        self.wiki.content = 'changed'
+        self.wiki.save()
+        assert_in('changed', self.wiki.html(self.project))
+
+
 class TestWikiUuid(OsfTestCase):
 
     def setUp(self):
@@ -1027,6 +1059,24 @@ class TestWikiShareJSMongo(OsfTestCase):
         current_content = self.wiki_page.get_draft(self.project)
         assert_equals(current_content, new_content)
 
+    def test_get_draft_status(self):
+        other = 'bar.baz'
+        self.project.update_node_wiki(other, 'No draft', Auth(self.user))
+        pages = [self.wiki_page, self.project.get_wiki_page(other)]
+
+        status = get_draft_status(self.project, pages)
+        assert_false(status[self.wkey]['has_draft'])
+        assert_is_none(status[to_mongo_key(other)])
+
+        new_time = int(time.time() * 1000) + 10000
+        self.db.docs.update(
+            {'_id': self.sharejs_uuid},
+            {'$set': {'_v': self.example_docs[0]['_v'] + 1, '_m.mtime': new_time}}
+        )
+        status = get_draft_status(self.project, pages)
+        assert_true(status[self.wkey]['has_draft'])
+        assert_equal(status[self.wkey]['version'], self.example_docs[0]['_v'] + 1)
+
     def tearDown(self):
         super(TestWikiShareJSMongo, self).tearDown()
         self.db.drop_collection('docs')
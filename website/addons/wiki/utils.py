@@ -2,13 +2,13 @@
 import os
 import urllib
 import uuid
+import datetime
 
-from pymongo import MongoClient
 import requests
 
+from framework.mongo.handlers import ClientPool
 from framework.mongo.utils import to_mongo_key
 
-from website import settings
 from website.addons.wiki import settings as wiki_settings
 from website.addons.wiki.exceptions import InvalidVersionError
 
@@ -86,10 +86,60 @@ def migrate_uuid(node, wname):
     broadcast_to_sharejs('unlock', old_sharejs_uuid, data=write_contributors)
 
 
+# Kept separate from the OSF client pool so that sharejs reads and writes are
+# not pinned to the socket (and TokuMX transaction) of the current request
+share_client_pool = ClientPool()
+
+
 def share_db():
-    """Generate db client for sharejs db"""
-    client = MongoClient(settings.DB_HOST, settings.DB_PORT)
-    return client[wiki_settings.SHAREJS_DB_NAME]
+    """Return the sharejs database from the process-wide sharejs client."""
+    return share_client_pool.get()[wiki_settings.SHAREJS_DB_NAME]
+
+
+def get_draft_info(doc_item, saved_date):
+    """Summarize a sharejs document relative to the last saved version of its
+    wiki page.
+
+    :param dict doc_item: Document from the sharejs `docs` collection
+    :param datetime saved_date: Date of the last saved version, or `None`
+    :return: Dict with the sharejs `version`, the `date` of the last edit, and
+        whether the document holds a draft newer than the saved version
+    """
+    version = doc_item['_v']
+    # sharejs stores modification times in milliseconds
+    date = datetime.datetime.utcfromtimestamp(doc_item['_m']['mtime'] / 1000)
+    return {
+        'version': version,
+        'date': date,
+        'has_draft': version > 1 and (saved_date is None or date > saved_date),
+    }
+
+
+def get_draft_status(node, pages):
+    """Look up draft state for several wiki pages of a node in one query.
+
+    :param Node node: Node owning the pages
+    :param list pages: `NodeWikiPage` objects
+    :return: Dict mapping wiki keys to the output of `get_draft_info`; pages
+        without a sharejs document map to `None`
+    """
+    uuids = {}
+    for page in pages:
+        sharejs_uuid = get_sharejs_uuid(node, page.page_name)
+        if sharejs_uuid:
+            uuids[sharejs_uuid] = page
+    status = dict((to_mongo_key(page.page_name), None) for page in pages)
+    if not uuids:
+        return status
+
+    docs = share_db()['docs'].find(
+        {'_id': {'$in': list(uuids)}},
+        {'_v': True, '_m.mtime': True},
+    )
+    for doc_item in docs:
+        page = uuids[doc_item['_id']]
+        status[to_mongo_key(page.page_name)] = get_draft_info(doc_item, page.date)
+    return status
 
 
 def get_sharejs_content(node, wname):
@@ -86,19 +86,32 @@ def _get_wiki_versions(node, name, anonymous=False):
     ]
 
 
-def _get_wiki_pages_current(node):
-    return [
-        {
-            'name': sorted_page.page_name,
-            'url': node.web_url_for('project_wiki_view', wname=sorted_page.page_name, _guid=True)
-        }
-        for sorted_page in [
+def _get_wiki_pages_current(node, include_drafts=False):
+    """Serialize the current wiki pages of a node, sorted by key.
+
+    :param bool include_drafts: Also report whether each page has an unsaved
+        sharejs draft; looked up for all pages in a single query
+    """
+    pages = [
+        page for page in [
             node.get_wiki_page(sorted_key)
             for sorted_key in sorted(node.wiki_pages_current)
         ]
         # TODO: remove after forward slash migration
-        if sorted_page is not None
+        if page is not None
     ]
+    drafts = wiki_utils.get_draft_status(node, pages) if include_drafts else {}
+    ret = []
+    for page in pages:
+        serialized = {
+            'name': page.page_name,
+            'url': node.web_url_for('project_wiki_view', wname=page.page_name, _guid=True),
+        }
+        if include_drafts:
+            draft = drafts.get(to_mongo_key(page.page_name))
+            serialized['has_draft'] = bool(draft and draft['has_draft'])
+        ret.append(serialized)
+    return ret
 
 
 def _get_wiki_api_urls(node, name, additional_urls=None):
@@ -306,7 +319,7 @@ def project_wiki_view(auth, wname, path=None, **kwargs):
         'sharejs_url': settings.SHAREJS_URL,
         'is_current': is_current,
         'version_settings': version_settings,
-        'pages_current': _get_wiki_pages_current(node),
+        'pages_current': _get_wiki_pages_current(node, include_drafts=can_edit),
         'toc': toc,
         'category': node.category,
         'panels_used': panels_used,
@@ -11,16 +11,19 @@ from werkzeug.contrib.fixers import ProxyFix
 import framework
 from framework.render.core import init_mfr
 from framework.flask import app, add_handlers
+from framework.routing import warm_template_cache
 from framework.logging import logger
 from framework.mongo import set_up_storage
 from framework.addons.utils import render_addon_capabilities
 from framework.sentry import sentry
 from framework.mongo import handlers as mongo_handlers
+from framework.mongo import identity as identity_handlers
 from framework.tasks import handlers as task_handlers
 from framework.transactions import handlers as transaction_handlers
 
 import website.models
 from website.routes import make_url_map
+from website.search import handlers as search_handlers
 from website.addons.base import init_addon
 from website.project.model import ensure_schemas, Node
 
@@ -56,8 +59,10 @@ def attach_handlers(app, settings):
     """Add callback handlers to ``app`` in the correct order."""
     # Add callback handlers to application
     add_handlers(app, mongo_handlers.handlers)
+    add_handlers(app, identity_handlers.handlers)
     add_handlers(app, task_handlers.handlers)
     add_handlers(app, transaction_handlers.handlers)
+    add_handlers(app, search_handlers.handlers)
 
     # Attach handler for checking view-only link keys.
     # NOTE: This must be attached AFTER the TokuMX to avoid calling
@@ -134,6 +139,8 @@ def init_app(settings_module='website.settings', set_backends=True, routes=True,
             make_url_map(app)
         except AssertionError:  # Route map has already been created
             pass
+        if not app.debug:
+            warm_template_cache()
 
     if attach_request_handlers:
         attach_handlers(app, settings)
@@ -17,6 +17,12 @@ Usage: ::
     ...
     mails.send_mail('foo@bar.com', mails.CONFIRM_EMAIL, user=user)
 
+To send many emails over a shared SMTP session, collect them in a `MailBatch`: ::
+
+    with mails.MailBatch() as batch:
+        for user in users:
+            mails.send_mail(user.username, mails.CONFIRM_EMAIL, batch=batch, user=user)
+
 """
 import os
 import logging
@@ -31,7 +37,10 @@ logger = logging.getLogger(__name__)
 EMAIL_TEMPLATES_DIR = os.path.join(settings.TEMPLATES_PATH, 'emails')
 
 _tpl_lookup = TemplateLookup(
-    directories=[EMAIL_TEMPLATES_DIR]
+    directories=[EMAIL_TEMPLATES_DIR],
+    # Compiled templates are cached by the lookup; only check for changes to
+    # the template files while developing
+    filesystem_checks=settings.DEBUG_MODE,
 )
 
 TXT_EXT = '.txt.mako'
@@ -48,6 +57,7 @@ class Mail(object):
     def __init__(self, tpl_prefix, subject):
         self.tpl_prefix = tpl_prefix
         self._subject = subject
+        self._subject_template = None
 
     def html(self, **context):
         """Render the HTML email message."""
@@ -60,7 +70,11 @@ class Mail(object):
         return render_message(tpl_name, **context)
 
     def subject(self, **context):
-        return Template(self._subject).render(**context)
+        # Compiled on first use rather than at import, since most `Mail`
+        # objects are never sent by a given process
+        if self._subject_template is None:
+            self._subject_template = Template(self._subject)
+        return self._subject_template.render(**context)
 
 
 def render_message(tpl_name, **context):
@@ -69,8 +83,69 @@ def render_message(tpl_name, **context):
     return tpl.render(**context)
 
 
+class MailBatch(object):
+    """Collects rendered messages and sends them with `tasks.send_emails`,
+    `settings.MAIL_BULK_BATCH_SIZE` messages per task. Messages are sent when
+    `send` is called or when the ``with`` block exits without an error.
+
+    :param str username: SMTP username; defaults to `settings.MAIL_USERNAME`
+    :param str password: SMTP password; defaults to `settings.MAIL_PASSWORD`
+    :param str mail_server: SMTP server; defaults to `settings.MAIL_SERVER`
+    """
+
+    def __init__(self, username=None, password=None, mail_server=None):
+        self.username = username
+        self.password = password
+        self.mail_server = mail_server
+        self.messages = []
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.send()
+
+    def add(self, from_addr, to_addr, subject, message, mimetype):
+        self.messages.append({
+            'from_addr': from_addr,
+            'to_addr': to_addr,
+            'subject': subject,
+            'message': message,
+            'mimetype': mimetype,
+        })
+
+    def send(self):
+        """Send and clear queued messages.
+
+        :return: List of results of `tasks.send_emails`, one per chunk
+        """
+        messages, self.messages = self.messages, []
+        # Don't use ttls and login in DEBUG_MODE
+        ttls = login = not settings.DEBUG_MODE
+        results = []
+        size = settings.MAIL_BULK_BATCH_SIZE
+        for start in range(0, len(messages), size):
+            kwargs = dict(
+                messages=messages[start:start + size],
+                ttls=ttls,
+                login=login,
+                username=self.username,
+                password=self.password,
+                mail_server=self.mail_server)
+            if settings.USE_CELERY:
+                results.append(tasks.send_emails.apply_async(kwargs=kwargs))
+            else:
+                results.append(tasks.send_emails(**kwargs))
+        return results
+
+
 def send_mail(to_addr, mail, mimetype='plain', from_addr=None, mailer=None,
-            username=None, password=None, mail_server=None, callback=None, **context):
+            username=None, password=None, mail_server=None, callback=None, batch=None,
+            **context):
     """Send an email from the OSF.
     Example: ::
 
@@ -82,6 +157,8 @@ def send_mail(to_addr, mail, mimetype='plain', from_addr=None, mailer=None,
     :param Mail mail: The mail object
     :param str mimetype: Either 'plain' or 'html'
     :param function callback: celery task to execute after send_mail completes
+    :param MailBatch batch: Queue the message on ``batch`` instead of sending it
+        immediately; ``mailer``, ``callback``, and the SMTP arguments are ignored
     :param **context: Context vars for the message template
 
     .. note:
@@ -96,6 +173,9 @@ def send_mail(to_addr, mail, mimetype='plain', from_addr=None, mailer=None,
     logger.debug('Sending email...')
     logger.debug(u'To: {to_addr}\nFrom: {from_addr}\nSubject: {subject}\nMessage: {message}'.format(**locals()))
 
+    if batch is not None:
+        return batch.add(from_addr, to_addr, subject, message, mimetype)
+
     kwargs = dict(
         from_addr=from_addr,
         to_addr=to_addr,
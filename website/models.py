@@ -5,11 +5,12 @@
 from framework.auth.core import User
 from framework.guid.model import Guid
 from framework.sessions.model import Session
+from framework.caching.model import CacheStamp
 
 from website.project.model import (
     ApiKey, Node, NodeLog,
     Tag, WatchConfig, MetaSchema, Pointer,
-    Comment, PrivateLink, MetaData,
+    Comment, PrivateLink, MetaData, CloneJob,
 )
 from website.oauth.models import ExternalAccount
 from website.identifiers.model import Identifier
@@ -24,7 +25,7 @@ MODELS = (
     Tag, WatchConfig, Session, Guid, MetaSchema, Pointer,
     MailRecord, Comment, PrivateLink, MetaData, Conference,
     NotificationSubscription, NotificationDigest, CitationStyle,
-    CitationStyle, ExternalAccount, Identifier,
+    CitationStyle, ExternalAccount, Identifier, CloneJob, CacheStamp,
 )
 
 GUID_MODELS = (User, Node, Comment, MetaData)
@@ -1,12 +1,13 @@
+import collections
+
 from babel import dates, core, Locale
 from mako.lookup import Template
+from modularodm import Q
 
 from website import mails
 from website import models as website_models
-from website.notifications import constants
 from website.notifications import utils
 from website.notifications.model import NotificationDigest
-from website.notifications.model import NotificationSubscription
 from website.util import web_url_for
 
 LOCALTIME_FORMAT = '%H:%M on %A, %B %d %Z'
@@ -14,6 +15,11 @@ EMAIL_SUBJECT_MAP = {
     'comments': '${user.fullname} commented on "${title}".',
     'comment_replies': '${user.fullname} replied to your comment on "${title}".'
 }
+# Subject templates, compiled once per process
+SUBJECT_TEMPLATES = dict(
+    (event, Template(subject))
+    for event, subject in EMAIL_SUBJECT_MAP.iteritems()
+)
 
 
 def email_transactional(recipient_ids, uid, event, user, node, timestamp, **context):
@@ -28,26 +34,27 @@ def email_transactional(recipient_ids, uid, event, user, node, timestamp, **cont
     template = event + '.html.mako'
     context['title'] = node.title
     context['user'] = user
-    subject = Template(EMAIL_SUBJECT_MAP[event]).render(**context)
-
-    for user_id in recipient_ids:
-        recipient = website_models.User.load(user_id)
-        email = recipient.username
-        context['localized_timestamp'] = localize_timestamp(timestamp, recipient)
-        message = mails.render_message(template, **context)
-
-        if user._id != recipient._id:
-            mails.send_mail(
-                to_addr=email,
-                mail=mails.TRANSACTIONAL,
-                mimetype='html',
-                name=recipient.fullname,
-                node_id=node._id,
-                node_title=node.title,
-                subject=subject,
-                message=message,
-                url=get_settings_url(uid, recipient)
-            )
+    subject = SUBJECT_TEMPLATES[event].render(**context)
+    node_settings_url = None
+
+    for recipient, message in render_for_recipients(template, recipient_ids, user, timestamp, context):
+        if uid == recipient._id:
+            url = get_settings_url(uid, recipient)
+        else:
+            # Same for every recipient; avoid reloading the node each time
+            node_settings_url = node_settings_url or get_settings_url(uid, recipient)
+            url = node_settings_url
+        mails.send_mail(
+            to_addr=recipient.username,
+            mail=mails.TRANSACTIONAL,
+            mimetype='html',
+            name=recipient.fullname,
+            node_id=node._id,
+            node_title=node.title,
+            subject=subject,
+            message=message,
+            url=url
+        )
 
 
 def email_digest(recipient_ids, uid, event, user, node, timestamp, **context):
@@ -58,20 +65,37 @@ def email_digest(recipient_ids, uid, event, user, node, timestamp, **context):
     context['user'] = user
     node_lineage_ids = get_node_lineage(node) if node else []
 
-    for user_id in recipient_ids:
-        recipient = website_models.User.load(user_id)
-        context['localized_timestamp'] = localize_timestamp(timestamp, recipient)
-        message = mails.render_message(template, **context)
-
-        if user._id != recipient._id:
-            digest = NotificationDigest(
-                timestamp=timestamp,
-                event=event,
-                user_id=recipient._id,
-                message=message,
-                node_lineage=node_lineage_ids
+    for recipient, message in render_for_recipients(template, recipient_ids, user, timestamp, context):
+        digest = NotificationDigest(
+            timestamp=timestamp,
+            event=event,
+            user_id=recipient._id,
+            message=message,
+            node_lineage=node_lineage_ids
+        )
+        digest.save()
+
+
+def render_for_recipients(template, recipient_ids, user, timestamp, context):
+    """Render ``template`` for each recipient other than ``user``. Recipients
+    are loaded in a single query, and the message is rendered once per
+    distinct localized timestamp, the only recipient-specific part of it.
+
+    :return: Generator of (recipient, message) tuples
+    """
+    recipients = website_models.User.find(
+        Q('_id', 'in', [each for each in recipient_ids if each != user._id])
+    )
+    rendered = {}
+    for recipient in recipients:
+        localized_timestamp = localize_timestamp(timestamp, recipient)
+        if localized_timestamp not in rendered:
+            rendered[localized_timestamp] = mails.render_message(
+                template,
+                localized_timestamp=localized_timestamp,
+                **context
             )
-            digest.save()
+        yield recipient, rendered[localized_timestamp]
 
 
 EMAIL_FUNCTION_MAP = {
@@ -89,52 +113,49 @@ def notify(uid, event, user, node, timestamp, **context):
     :param timestamp: time
     :param context: optional variables specific to templates
         target_user: used with comment_replies
-    :return:
+    :return: Set of ids of users subscribed to the event on the node or
+        its parents, including users subscribed with the 'none' type
     """
-    node_subscribers = []
-    subscription = NotificationSubscription.load(utils.to_subscription_key(uid, event))
-
-    if subscription:
-        for notification_type in constants.NOTIFICATION_TYPES:
-            subscribed_users = getattr(subscription, notification_type, [])
-
-            node_subscribers.extend(subscribed_users)
-
-            if subscribed_users and notification_type != 'none':
-                for recipient in subscribed_users:
-                    event = 'comment_replies' if context.get('target_user') == recipient else event
-                    send([recipient._id], notification_type, uid, event, user, node, timestamp, **context)
-
-    return check_parent(uid, event, node_subscribers, user, node, timestamp, **context)
+    subscribers = utils.resolve_subscribers(uid, event)
+    send_to_subscribers(subscribers, event, user, node, timestamp, **context)
+    return set(subscriber.user_id for subscriber in subscribers)
 
 
 def check_parent(uid, event, node_subscribers, user, orig_node, timestamp, **context):
     """ Check subscription object for the event on the parent project
         and send transactional email to indirect subscribers.
-    """
-    node = website_models.Node.load(uid)
-    target_user = context.get('target_user', None)
-
-    if node and node.parent_id:
-        key = utils.to_subscription_key(node.parent_id, event)
-        subscription = NotificationSubscription.load(key)
 
-        if not subscription:
-            return check_parent(node.parent_id, event, node_subscribers, user, orig_node, timestamp, **context)
-
-        for notification_type in constants.NOTIFICATION_TYPES:
-            subscribed_users = getattr(subscription, notification_type, [])
-
-            for u in subscribed_users:
-                if u not in node_subscribers and node.has_permission(u, 'read'):
-                    if notification_type != 'none':
-                        event = 'comment_replies' if target_user == u else event
-                        send([u._id], notification_type, uid, event, user, orig_node, timestamp, **context)
-                    node_subscribers.append(u)
-
-        return check_parent(node.parent_id, event, node_subscribers, user, orig_node, timestamp, **context)
-
-    return node_subscribers
+    :param node_subscribers: Users, or ids of users, who have already been
+        notified
+    :return: Set of ids of notified users, including ``node_subscribers``
+    """
+    excluded = set(getattr(each, '_id', each) for each in node_subscribers)
+    subscribers = [
+        subscriber for subscriber in utils.resolve_subscribers(uid, event)
+        if subscriber.inherited and subscriber.user_id not in excluded
+    ]
+    send_to_subscribers(subscribers, event, user, orig_node, timestamp, **context)
+    return excluded.union(subscriber.user_id for subscriber in subscribers)
+
+
+def send_to_subscribers(subscribers, event, user, node, timestamp, **context):
+    """Send one notification per group of subscribers sharing a notification
+    type and settings node. The target of a comment reply is sent the
+    'comment_replies' event instead of ``event``.
+    """
+    target_user = context.get('target_user')
+    target_id = target_user._id if target_user else None
+    groups = collections.OrderedDict()
+    for subscriber in subscribers:
+        if subscriber.notification_type == 'none':
+            continue
+        group_event = 'comment_replies' if subscriber.user_id == target_id else event
+        key = (subscriber.notification_type, subscriber.uid, group_event)
+        groups.setdefault(key, []).append(subscriber.user_id)
+    # Send replies last, after the other recipients of the same group
+    for (notification_type, uid, group_event), user_ids in sorted(
+            groups.items(), key=lambda item: item[0][2] != event):
+        send(user_ids, notification_type, uid, group_event, user, node, timestamp, **context)
 
 
 def send(recipient_ids, notification_type, uid, event, user, node, timestamp, **context):
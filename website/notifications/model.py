@@ -1,3 +1,4 @@
+import pymongo
 from modularodm import fields
 
 from framework.mongo import StoredObject, ObjectId
@@ -17,6 +18,14 @@ class NotificationSubscription(StoredObject):
     email_digest = fields.ForeignField('user', list=True, backref='email_digest')
     email_transactional = fields.ForeignField('user', list=True, backref='email_transactional')
 
+    def save(self, *args, **kwargs):
+        saved_fields = super(NotificationSubscription, self).save(*args, **kwargs)
+        if saved_fields:
+            # Imported here to avoid a circular import
+            from website.notifications.utils import invalidate_subscribers
+            invalidate_subscribers(self.event_name)
+        return saved_fields
+
     def add_user_to_subscription(self, user, notification_type, save=True):
         for nt in NOTIFICATION_TYPES:
             if user in getattr(self, nt):
@@ -54,6 +63,15 @@ class NotificationSubscription(StoredObject):
 
 
 class NotificationDigest(StoredObject):
+    __indices__ = [
+        {
+            'key_or_list': [
+                ('user_id', pymongo.ASCENDING),
+                ('timestamp', pymongo.ASCENDING),
+            ],
+        }
+    ]
+
     _id = fields.StringField(primary=True, default=lambda: str(ObjectId()))
     user_id = fields.StringField()
     timestamp = fields.DateTimeField()
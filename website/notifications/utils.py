@@ -4,11 +4,31 @@ from modularodm import Q
 from modularodm.exceptions import NoResultsFound
 
 from framework.auth import signals
+from framework.caching import TTLCache
+from framework.caching import stamps
+from website import settings
 from website.models import Node
 from website.notifications import constants
 from website.notifications import model
 
 
+SUBSCRIBERS_STAMP = 'subscribers'
+
+# Maps (uid, event) => (stamps, resolved recipients of notifications). Entries
+# are invalidated in every process when a subscription to the event is saved
+# or when the permissions of a node change, by bumping the stamps they were
+# resolved under (see `framework.caching.stamps`).
+subscribers_cache = TTLCache(
+    maxsize=settings.NOTIFICATION_SUBSCRIBERS_CACHE_SIZE,
+    ttl=settings.NOTIFICATION_SUBSCRIBERS_CACHE_TTL,
+)
+
+Subscriber = collections.namedtuple(
+    'Subscriber',
+    ['user_id', 'notification_type', 'uid', 'inherited'],
+)
+
+
 class NotificationsDict(dict):
     def __init__(self):
         super(NotificationsDict, self).__init__()
@@ -36,6 +56,100 @@ def to_subscription_key(uid, event):
     return str(uid + '_' + event)
 
 
+def resolve_subscribers(uid, event):
+    """Compute who is notified of ``event`` on the node or user ``uid``: users
+    subscribed on ``uid`` itself, followed by users subscribed on its
+    ancestors who can read the node and are not subscribed at a closer level.
+    Users subscribed with the 'none' type are included so that they shadow
+    subscriptions further up the tree.
+
+    :return: Tuple of `Subscriber`, ordered from the closest subscription
+        outward; `uid` is the node whose settings apply to the subscriber
+    """
+    key = (uid, event)
+    current_stamps = stamps.get_stamps(SUBSCRIBERS_STAMP, event_stamp(event))
+    cached = subscribers_cache.get(key)
+    if cached is not None and cached[0] == current_stamps:
+        return cached[1]
+    subscribers = _resolve_subscribers(uid, event)
+    subscribers_cache.set(key, (current_stamps, subscribers))
+    return subscribers
+
+
+def event_stamp(event):
+    return '{0}:{1}'.format(SUBSCRIBERS_STAMP, event)
+
+
+def _resolve_subscribers(uid, event):
+    node = Node.load(uid)
+    # Node ids from `uid` up to the root
+    lineage = [uid]
+    if node:
+        ancestor = node
+        while ancestor.parent_id:
+            lineage.append(ancestor.parent_id)
+            ancestor = Node.load(ancestor.parent_id)
+
+    subscriptions = dict(
+        (subscription._id, subscription)
+        for subscription in model.NotificationSubscription.find(
+            Q('_id', 'in', [to_subscription_key(each, event) for each in lineage])
+        )
+    )
+    readers = get_reader_ids(node) if node else None
+
+    seen = set()
+    subscribers = []
+    for depth, owner_id in enumerate(lineage):
+        subscription = subscriptions.get(to_subscription_key(owner_id, event))
+        if not subscription:
+            continue
+        for notification_type in constants.NOTIFICATION_TYPES:
+            for user_id in getattr(subscription, notification_type)._to_primary_keys():
+                if user_id in seen or (depth and user_id not in readers):
+                    continue
+                seen.add(user_id)
+                subscribers.append(Subscriber(
+                    user_id=user_id,
+                    notification_type=notification_type,
+                    # Inherited subscriptions are managed from the child of
+                    # the subscribed node
+                    uid=lineage[depth - 1] if depth else uid,
+                    inherited=bool(depth),
+                ))
+    return tuple(subscribers)
+
+
+def get_reader_ids(node):
+    """Return the ids of users with read access to ``node``: its readers and
+    the admins of its parents. Equivalent to testing each user with
+    `node.has_permission(user, 'read')`.
+    """
+    readers = set(
+        user_id for user_id, perms in node.permissions.iteritems()
+        if 'read' in perms
+    )
+    parent = node.parent_node
+    while parent:
+        readers.update(
+            user_id for user_id, perms in parent.permissions.iteritems()
+            if 'admin' in perms
+        )
+        parent = parent.parent_node
+    return readers
+
+
+def invalidate_subscribers(event=None):
+    """Drop resolved recipients for ``event``, or for all events if `None`,
+    in every process.
+    """
+    if event is None:
+        stamps.bump(SUBSCRIBERS_STAMP)
+        subscribers_cache.clear()
+    else:
+        stamps.bump(event_stamp(event))
+
+
 def from_subscription_key(key):
     parsed_key = key.split("_", 1)
     return {
@@ -58,6 +172,7 @@ def remove_contributor_from_subscriptions(contributor, node):
 @signals.node_deleted.connect
 def remove_subscription(node):
     model.NotificationSubscription.remove(Q('owner', 'eq', node))
+    invalidate_subscribers()
     parent = node.parent_node
 
     if parent and parent.child_node_subscriptions:
@@ -78,6 +78,14 @@ class ExternalAccount(StoredObject):
         return '<ExternalAccount: {}/{}>'.format(self.provider,
                                                  self.provider_id)
 
+    def save(self, *args, **kwargs):
+        saved_fields = super(ExternalAccount, self).save(*args, **kwargs)
+        # Cached WaterButler grants include the OAuth credentials
+        if {'oauth_key', 'oauth_secret'}.intersection(saved_fields):
+            from website.addons.base.grants import invalidate_grants
+            invalidate_grants()
+        return saved_fields
+
 
 class ExternalProviderMeta(abc.ABCMeta):
     """Keeps track of subclasses of the ``ExternalProvider`` object"""
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Denormalized per-node counters. Log, fork, registration, watcher, pointer,
+and template counts are kept in the `nodecounters` collection and updated with
+`$inc` as the underlying records change, so that dashboards and project pages
+do not have to load or count the records themselves.
+
+Counter documents are created from the source records the first time a node's
+counters are read; until then, increments are no-ops. Counters that drift can
+be recomputed with `scripts/consistency/fix_node_counters`.
+"""
+
+from framework.mongo import database
+
+
+COLLECTION = 'nodecounters'
+
+FIELDS = ('logs', 'forks', 'registrations', 'watchers', 'pointers', 'templates')
+
+
+def get_collection():
+    return database[COLLECTION]
+
+
+def increment(node_id, user_id=None, **counts):
+    """Atomically add to the counters of a node.
+
+    :param str node_id: Node primary key
+    :param str user_id: Also add ``counts['logs']`` to the log count of this
+        user
+    :param counts: Amounts to add, keyed by counter name
+    """
+    if node_id is None:
+        return
+    inc = {
+        key: value
+        for key, value in counts.items()
+        if value
+    }
+    if user_id is not None and inc.get('logs'):
+        inc['user_logs.{0}'.format(user_id)] = inc['logs']
+    if not inc:
+        return
+    get_collection().update(
+        {'_id': node_id},
+        {'$inc': inc},
+        upsert=False,
+        manipulate=False,
+    )
+
+
+def compute_counters(node):
+    """Count the records behind each counter of ``node``.
+
+    :return: Counter document, without `_id`
+    """
+    from website.project.model import NodeLog
+    log_ids = node.logs._to_primary_keys()
+    result = database[NodeLog._name].aggregate([
+        {'$match': {'_id': {'$in': log_ids}, 'user': {'$ne': None}}},
+        {'$group': {'_id': '$user', 'count': {'$sum': 1}}},
+    ])
+    return {
+        'logs': len(log_ids),
+        'user_logs': {
+            each['_id']: each['count']
+            for each in result['result']
+        },
+        'forks': len([
+            each for each in node.node__forked
+            if not each.is_deleted
+        ]),
+        'registrations': len(node.node__registrations),
+        'watchers': len(node.watchconfig__watched),
+        'pointers': len(node.get_points(deleted=False, folders=False)),
+        'templates': len(node.templated_list),
+    }
+
+
+def reset_counters(node):
+    """Recompute and store the counters of ``node``.
+
+    :return: Counter document
+    """
+    counters = compute_counters(node)
+    get_collection().update(
+        {'_id': node._id},
+        {'$set': counters},
+        upsert=True,
+        manipulate=False,
+    )
+    return counters
+
+
+def get_counters(nodes):
+    """Fetch the counters of several nodes with a single query, computing
+    them for nodes that do not have counters yet.
+
+    :param list nodes: `Node` or `Pointer` objects; pointers are resolved to
+        the nodes they point to
+    :return: Dict mapping node primary keys to counter documents
+    """
+    nodes = [node.resolve() for node in nodes]
+    node_ids = [node._id for node in nodes]
+    found = {
+        each.pop('_id'): each
+        for each in get_collection().find({'_id': {'$in': node_ids}})
+    }
+    for node in nodes:
+        if node._id not in found:
+            found[node._id] = reset_counters(node)
+    return found
+
+
+def get_node_counters(node):
+    node = node.resolve()
+    return get_counters([node])[node._id]
+
+
+def get_user_log_count(counters, user):
+    if user is None:
+        return 0
+    return counters.get('user_logs', {}).get(user._id, 0)
@@ -11,6 +11,7 @@ import warnings
 
 import pytz
 import blinker
+import pymongo
 from flask import request
 from HTMLParser import HTMLParser
 
@@ -23,6 +24,7 @@ from modularodm.exceptions import ValidationValueError
 from framework import status
 from framework.mongo import ObjectId
 from framework.mongo import StoredObject
+from framework.mongo import load_many
 from framework.addons import AddonModelMixin
 from framework.auth import get_user, User, Auth
 from framework.auth import signals as auth_signals
@@ -47,6 +49,7 @@ from website.identifiers.model import IdentifierMixin
 from website.util.permissions import expand_permissions
 from website.util.permissions import CREATOR_PERMISSIONS
 from website.project.metadata.schemas import OSF_META_SCHEMAS
+from website.project import counters
 from website.util.permissions import DEFAULT_CONTRIBUTOR_PERMISSIONS
 
 html_parser = HTMLParser()
@@ -286,6 +289,16 @@ class ApiKey(StoredObject):
 @unique_on(['params.node', '_id'])
 class NodeLog(StoredObject):
 
+    __indices__ = [
+        {
+            # Supports aggregate log queries filtered by node and sorted by id
+            'key_or_list': [
+                ('__backrefs.logged.node.logs', pymongo.ASCENDING),
+                ('_id', pymongo.DESCENDING),
+            ],
+        },
+    ]
+
     _id = fields.StringField(primary=True, default=lambda: str(ObjectId()))
 
     date = fields.DateTimeField(default=datetime.datetime.utcnow, index=True)
@@ -450,6 +463,7 @@ class Pointer(StoredObject):
             clone = self.clone()
             clone.node = self.node
             clone.save()
+            counters.increment(self.node._id, pointers=1)
             return clone
 
     def fork_node(self, *args, **kwargs):
@@ -491,6 +505,13 @@ def get_pointer_parent(pointer):
     return parent_refs[0]
 
 
+def _push_message(message, messages=None):
+    if messages is None:
+        status.push_status_message(message)
+    else:
+        messages.append(message)
+
+
 def validate_category(value):
     """Validator for Node#category. Makes sure that the value is one of the
     categories defined in CATEGORY_MAP.
@@ -865,10 +886,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
 
     @property
     def visible_contributors(self):
-        return [
-            User.load(_id)
-            for _id in self.visible_contributor_ids
-        ]
+        return load_many(User, self.visible_contributor_ids)
 
     @property
     def parents(self):
@@ -906,9 +924,9 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         accessing `visible_contributors`.
         """
         self.visible_contributor_ids = [
-            contributor._id
-            for contributor in self.contributors
-            if contributor._id in self.visible_contributor_ids
+            contributor_id
+            for contributor_id in self.contributors._to_primary_keys()
+            if contributor_id in self.visible_contributor_ids
         ]
         if save:
             self.save()
@@ -1056,6 +1074,23 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             need_update = False
         if need_update:
             self.update_search()
+            # Search documents of components include their parent's title
+            # and privacy
+            if {'title', 'is_public'}.intersection(saved_fields):
+                for child in self.nodes_primary:
+                    if child.is_public and not child.is_deleted:
+                        child.update_search()
+
+        # Notification recipients depend on who can read the node and its
+        # descendants
+        if {'permissions', 'nodes'}.intersection(saved_fields):
+            from website.notifications.utils import invalidate_subscribers
+            invalidate_subscribers()
+
+        # Cached WaterButler grants depend on who can access the node
+        if {'permissions', 'is_public', 'is_deleted', 'nodes'}.intersection(saved_fields):
+            from website.addons.base.grants import invalidate_grants
+            invalidate_grants()
 
         # This method checks what has changed.
         if settings.PIWIK_HOST and update_piwik:
@@ -1112,6 +1147,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         new.is_fork = False
         new.is_registration = False
         new.piwik_site_id = None
+        counters.increment(self._id, templates=1)
 
         # If that title hasn't been changed, apply the default prefix (once)
         if (new.title == self.title
@@ -1195,6 +1231,8 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         pointer = Pointer(node=node)
         pointer.save()
         self.nodes.append(pointer)
+        if not self.is_folder:
+            counters.increment(node._id, pointers=1)
 
         # Add log
         self.add_log(
@@ -1231,6 +1269,8 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         # Remove `Pointer` object; will also remove self from `nodes` list of
         # parent node
         Pointer.remove_one(pointer)
+        if not self.is_folder:
+            counters.increment(pointer.node._id, pointers=-1)
 
         # Add log
         self.add_log(
@@ -1293,13 +1333,42 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
                     if include(descendant):
                         yield descendant
 
+    def get_aggregate_logs_query(self, auth):
+        """Build a query for the logs of this node and of the descendants
+        that ``auth`` can view. Logs copied from the source of a fork or
+        registration are only included if ``auth`` can view the node that
+        originally created them, i.e. the first node in the log's backrefs.
+        """
+        nodes = [self] + [n for n in self.get_descendants_recursive()
+                          if n.can_view(auth)]
+        ids = [node._id for node in nodes]
+        origin_ids = set(ids)
+        # Walk back through the nodes that logs were copied from
+        visited = set(ids)
+        sources = [
+            source for node in nodes
+            for source in (node.forked_from, node.registered_from)
+        ]
+        while sources:
+            source = sources.pop()
+            if source is None or source._id in visited:
+                continue
+            visited.add(source._id)
+            if source.can_view(auth):
+                origin_ids.add(source._id)
+            sources.extend([source.forked_from, source.registered_from])
+        return (
+            Q('__backrefs.logged.node.logs', 'in', ids) &
+            Q('__backrefs.logged.node.logs.0', 'in', list(origin_ids))
+        )
+
     def get_aggregate_logs_queryset(self, auth):
-        ids = [self._id] + [n._id
-                            for n in self.get_descendants_recursive()
-                            if n.can_view(auth)]
-        query = Q('__backrefs.logged.node.logs', 'in', ids)
-        logs = NodeLog.find(query).sort('-_id')
-        return [each for each in logs if each.node__logged[0].can_view(auth)]
+        """Return the logs of this node and its viewable descendants, newest
+        first. Filtering, sorting, and pagination run in the database; use
+        `count`, `offset`, and `limit` on the result rather than `len` and
+        slicing.
+        """
+        return NodeLog.find(self.get_aggregate_logs_query(auth)).sort('-_id')
 
     @property
     def nodes_pointer(self):
@@ -1553,6 +1622,16 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         self.deleted_date = date
         self.save()
 
+        # Deleted nodes are not counted as forks, templated copies, or
+        # pointing nodes
+        if self.forked_from:
+            counters.increment(self.forked_from._id, forks=-1)
+        if self.template_node:
+            counters.increment(self.template_node._id, templates=-1)
+        if not self.is_folder:
+            for each in self.nodes_pointer:
+                counters.increment(each.node._id, pointers=-1)
+
         auth_signals.node_deleted.send(self)
 
         return True
@@ -1564,13 +1643,43 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         :param str title: Optional text to prepend to forked title
         :return: Forked node
         """
-        user = auth.user
+        original = self.load(self._primary_key)
+        forked = self.fork_single(auth, title=title)
 
+        # Recursively fork child nodes
+        for node_contained in original.nodes:
+            forked_node = None
+            try:  # Catch the potential PermissionsError above
+                forked_node = node_contained.fork_node(auth=auth, title='')
+            except PermissionsError:
+                pass  # If this exception is thrown omit the node from the result set
+            if forked_node is not None:
+                forked.nodes.append(forked_node)
+
+        forked.save()
+        return forked
+
+    def check_can_fork(self, user):
         # Non-contributors can't fork private nodes
         if not (self.is_public or self.has_permission(user, 'read')):
             raise PermissionsError('{0!r} does not have permission to fork node {1!r}'.format(user, self._id))
 
-        when = datetime.datetime.utcnow()
+    def fork_single(self, auth, title='Fork of ', when=None, pending=False, messages=None):
+        """Fork this node without its children.
+
+        :param Auth auth: Consolidated authorization
+        :param str title: Optional text to prepend to forked title
+        :param datetime when: Fork date; defaults to now
+        :param bool pending: Keep the fork deleted until `CloneJob` has
+            forked the rest of the tree
+        :param list messages: Collect messages from addons here rather than
+            in the session
+        :return: Forked node
+        """
+        user = auth.user
+        self.check_can_fork(user)
+
+        when = when or datetime.datetime.utcnow()
 
         original = self.load(self._primary_key)
 
@@ -1584,19 +1693,11 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         forked.logs = self.logs
         forked.tags = self.tags
 
-        # Recursively fork child nodes
-        for node_contained in original.nodes:
-            forked_node = None
-            try:  # Catch the potential PermissionsError above
-                forked_node = node_contained.fork_node(auth=auth, title='')
-            except PermissionsError:
-                pass  # If this exception is thrown omit the node from the result set
-            if forked_node is not None:
-                forked.nodes.append(forked_node)
-
         forked.title = title + forked.title
         forked.is_fork = True
         forked.is_registration = False
+        if pending:
+            forked.is_deleted = True
         forked.forked_date = when
         forked.forked_from = original
         forked.creator = user
@@ -1624,11 +1725,13 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         )
 
         forked.save()
+        if not forked.is_deleted:
+            counters.increment(original._id, forks=1)
         # After fork callback
         for addon in original.get_addons():
             _, message = addon.after_fork(original, forked, user)
             if message:
-                status.push_status_message(message)
+                _push_message(message, messages)
 
         return forked
 
@@ -1640,6 +1743,26 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         :template: Template name
         :data: Form data
         """
+        original = self.load(self._primary_key)
+        registered = self.register_single(schema, auth, template, data)
+
+        for node_contained in original.nodes:
+            if not node_contained.is_deleted:
+                registered_node = node_contained.register_node(
+                    schema, auth, template, data
+                )
+                if registered_node is not None:
+                    registered.nodes.append(registered_node)
+
+        original.add_registration_log(registered, auth)
+
+        registered.save()
+        for node in registered.nodes:
+            node.update_search()
+
+        return registered
+
+    def check_can_register(self, auth):
         # NOTE: Admins can register child nodes even if they don't have write access them
         if not self.can_edit(auth=auth) and not self.is_admin_parent(user=auth.user):
             raise PermissionsError(
@@ -1648,11 +1771,29 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             )
         if self.is_folder:
             raise NodeStateError("Folders may not be registered")
+        if self.is_deleted:
+            raise NodeStateError('Cannot register deleted node.')
+
+    def register_single(self, schema, auth, template, data, when=None, pending=False, messages=None):
+        """Make a frozen copy of this node without its children.
+
+        :param schema: Schema object
+        :param auth: All the auth information including user, API key.
+        :template: Template name
+        :data: Form data
+        :param datetime when: Registration date; defaults to now
+        :param bool pending: Keep the registration deleted until `CloneJob`
+            has registered the rest of the tree
+        :param list messages: Collect messages from addons here rather than
+            in the session
+        :return: Registered node
+        """
+        self.check_can_register(auth)
 
         template = urllib.unquote_plus(template)
         template = to_mongo(template)
 
-        when = datetime.datetime.utcnow()
+        when = when or datetime.datetime.utcnow()
 
         original = self.load(self._primary_key)
 
@@ -1661,12 +1802,11 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         # database objects to which these dictionaries refer. This means that
         # the cloned node must pass itself to its wiki objects to build the
         # correct URLs to that content.
-        if original.is_deleted:
-            raise NodeStateError('Cannot register deleted node.')
-
         registered = original.clone()
 
         registered.is_registration = True
+        if pending:
+            registered.is_deleted = True
         registered.registered_date = when
         registered.registered_user = auth.user
         registered.registered_schema = schema
@@ -1683,41 +1823,38 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
         registered.piwik_site_id = None
 
         registered.save()
+        if not pending:
+            original.count_registration(registered)
 
         # After register callback
         for addon in original.get_addons():
             _, message = addon.after_register(original, registered, auth.user)
             if message:
-                status.push_status_message(message)
+                _push_message(message, messages)
 
         registered.nodes = []
 
-        for node_contained in original.nodes:
-            if not node_contained.is_deleted:
-                registered_node = node_contained.register_node(
-                    schema, auth, template, data
-                )
-                if registered_node is not None:
-                    registered.nodes.append(registered_node)
+        return registered
+
+    def count_registration(self, registered):
+        counters.increment(self._id, registrations=1)
+        # Registrations of forks are listed among the forks of the fork source
+        if registered.forked_from:
+            counters.increment(registered.forked_from._id, forks=1)
 
-        original.add_log(
+    def add_registration_log(self, registered, auth):
+        self.add_log(
             action=NodeLog.PROJECT_REGISTERED,
             params={
-                'parent_node': original.parent_id,
-                'node': original._primary_key,
+                'parent_node': self.parent_id,
+                'node': self._primary_key,
                 'registration': registered._primary_key,
             },
             auth=auth,
-            log_date=when,
+            log_date=registered.registered_date,
             save=False,
         )
-        original.save()
-
-        registered.save()
-        for node in registered.nodes:
-            node.update_search()
-
-        return registered
+        self.save()
 
     def remove_tag(self, tag, auth, save=True):
         if tag in self.tags:
@@ -1770,6 +1907,7 @@ class Node(GuidStoredObject, AddonModelMixin, IdentifierMixin):
             log.date = log_date
         log.save()
         self.logs.append(log)
+        counters.increment(self._id, user_id=user._id if user else None, logs=1)
         if save:
             self.save()
         if user:
@@ -2522,7 +2660,7 @@ def validate_permissions(schema, instance):
 
     """
     node = instance
-    contributor_ids = set([user._id for user in node.contributors])
+    contributor_ids = set(node.contributors._to_primary_keys())
     permission_ids = set(node.permissions.keys())
     mismatched_contributors = contributor_ids.difference(permission_ids)
     if mismatched_contributors:
@@ -2583,6 +2721,14 @@ class PrivateLink(StoredObject):
     nodes = fields.ForeignField('node', list=True, backref='shared')
     creator = fields.ForeignField('user', backref='created')
 
+    def save(self, *args, **kwargs):
+        saved_fields = super(PrivateLink, self).save(*args, **kwargs)
+        # Cached WaterButler grants may have been issued for this link
+        if {'is_deleted', 'nodes', 'anonymous'}.intersection(saved_fields):
+            from website.addons.base.grants import invalidate_grants
+            invalidate_grants()
+        return saved_fields
+
     @property
     def node_ids(self):
         node_ids = [node._id for node in self.nodes]
@@ -2614,3 +2760,199 @@ class PrivateLink(StoredObject):
                       for x in self.nodes if not x.is_deleted],
             "anonymous": self.anonymous
         }
+
+
+class CloneJob(StoredObject):
+    """Fork or registration of a node tree, run in batches by
+    `website.project.tasks.run_clone_job`. Nodes are cloned breadth-first;
+    the queue of nodes still to clone and the mapping of source nodes to
+    their clones are saved with each batch, so a job that is interrupted
+    resumes where it stopped. Clones are kept deleted until the whole tree
+    has been copied and are revealed together in the final batch.
+    """
+
+    FORK = 'fork'
+    REGISTRATION = 'registration'
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCESS = 'success'
+    FAILURE = 'failure'
+
+    _id = fields.StringField(primary=True, default=lambda: str(ObjectId()))
+    kind = fields.StringField(required=True)
+    status = fields.StringField(default=PENDING)
+    error = fields.StringField()
+    date_created = fields.DateTimeField(auto_now_add=datetime.datetime.utcnow)
+
+    node = fields.ForeignField('node', backref='cloned')
+    user = fields.ForeignField('user')
+
+    # Fork arguments
+    title = fields.StringField(default='Fork of ')
+    # Registration arguments
+    schema = fields.ForeignField('metaschema')
+    template = fields.StringField()
+    data = fields.StringField()
+
+    # Entries awaiting cloning: dicts with the `source` node or pointer id,
+    # the `parent` node id, and whether the source is a `pointer`
+    queue = fields.DictionaryField(list=True)
+    # Maps source node ids to clone ids
+    clones = fields.DictionaryField()
+    total = fields.IntegerField(default=0)
+    done = fields.IntegerField(default=0)
+    messages = fields.StringField(list=True)
+
+    @classmethod
+    def create(cls, kind, node, auth, **kwargs):
+        """Create and save a job to fork or register ``node``. Permissions on
+        ``node`` are checked immediately; the caller is responsible for
+        running the job.
+        """
+        if kind == cls.FORK:
+            node.check_can_fork(auth.user)
+        else:
+            node.check_can_register(auth)
+        job = cls(kind=kind, node=node, user=auth.user, **kwargs)
+        job.queue = [{'source': node._id, 'parent': None, 'pointer': False}]
+        job.clones = {}
+        job.total = job._count_tree(node, auth)
+        job.save()
+        return job
+
+    @property
+    def is_finished(self):
+        return self.status in (self.SUCCESS, self.FAILURE)
+
+    @property
+    def result(self):
+        """The clone of the root node, once the job has succeeded.
+        """
+        if self.status != self.SUCCESS:
+            return None
+        return Node.load(self.clones[self.node._id])
+
+    def _includes(self, child, auth):
+        """Whether the child node or pointer ``child`` is cloned along with
+        its parent; mirrors `Node.fork_node` and `Node.register_node`.
+        """
+        if isinstance(child, Pointer):
+            if child.node is None:
+                return False
+            return self.kind == self.FORK or not child.node.is_deleted
+        if self.kind == self.FORK:
+            return child.is_public or child.has_permission(auth.user, 'read')
+        return not child.is_deleted
+
+    def _count_tree(self, node, auth):
+        count = 1
+        for child in node.nodes:
+            if not self._includes(child, auth):
+                continue
+            if isinstance(child, Pointer):
+                count += 1
+            else:
+                count += self._count_tree(child, auth)
+        return count
+
+    def run(self, batch_size=None):
+        """Run batches in separate transactions until the job is finished.
+        """
+        batch_size = batch_size or settings.CLONE_JOB_BATCH_SIZE
+        while not self.is_finished:
+            with TokuTransaction():
+                self.run_batch(batch_size)
+
+    def run_batch(self, batch_size):
+        """Clone up to ``batch_size`` queued entries, and reveal the clones
+        once the queue is empty.
+        """
+        self.status = self.RUNNING
+        auth = Auth(user=self.user)
+        for _ in range(batch_size):
+            if not self.queue:
+                break
+            entry = self.queue.pop(0)
+            self._clone_entry(entry, auth)
+            self.done += 1
+        if not self.queue:
+            self._finish(auth)
+        self.save()
+
+    def _clone_entry(self, entry, auth):
+        parent = Node.load(self.clones[entry['parent']]) if entry['parent'] else None
+        if entry['pointer']:
+            pointer = Pointer.load(entry['source'])
+            clone = pointer.fork_node() if self.kind == self.FORK else pointer.register_node()
+            if clone is not None:
+                parent.nodes.append(clone)
+                parent.save()
+            return
+        # Already cloned by an earlier, interrupted run
+        if entry['source'] in self.clones:
+            return
+        source = Node.load(entry['source'])
+        if self.kind == self.FORK:
+            clone = source.fork_single(
+                auth,
+                title=self.title if parent is None else '',
+                when=self.date_created,
+                pending=True,
+                messages=self.messages,
+            )
+        else:
+            clone = source.register_single(
+                self.schema, auth, self.template, self.data,
+                when=self.date_created,
+                pending=True,
+                messages=self.messages,
+            )
+        self.clones[source._id] = clone._id
+        if parent is not None:
+            parent.nodes.append(clone)
+            parent.save()
+        for child in source.nodes:
+            if self._includes(child, auth):
+                self.queue.append({
+                    'source': child._id,
+                    'parent': source._id,
+                    'pointer': isinstance(child, Pointer),
+                })
+
+    def _finish(self, auth):
+        for source_id, clone_id in self.clones.items():
+            source = Node.load(source_id)
+            clone = Node.load(clone_id)
+            # Forks of deleted components are deleted, as with `fork_node`
+            clone.is_deleted = source.is_deleted
+            clone.save()
+            # Pointers in deleted clones are not counted, as with `remove_node`
+            if clone.is_deleted:
+                for each in clone.nodes_pointer:
+                    counters.increment(each.node._id, pointers=-1)
+            if self.kind == self.FORK:
+                if not clone.is_deleted:
+                    counters.increment(source_id, forks=1)
+            else:
+                source.count_registration(clone)
+                source.add_registration_log(clone, auth)
+        self.status = self.SUCCESS
+
+    def fail(self, error):
+        self.status = self.FAILURE
+        self.error = unicode(error)
+        self.save()
+
+    def to_json(self):
+        result = self.result
+        return {
+            'id': self._id,
+            'kind': self.kind,
+            'status': self.status,
+            'done': self.done,
+            'total': self.total,
+            'result': result.url if result else None,
+            'messages': self.messages,
+            'status_url': self.node.api_url_for('clone_job_status', job_id=self._id),
+        }
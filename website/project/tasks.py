@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+from framework.tasks import app
+from framework.mongo import StoredObject
+from framework.transactions.context import TokuTransaction
+
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(bind=True, acks_late=True, max_retries=3, default_retry_delay=60)
+def run_clone_job(self, job_id):
+    """Fork or register a node tree in batches. Each batch commits in its
+    own transaction; if a batch fails, the job is retried from the last
+    committed batch, and marked as failed once retries are exhausted.
+    """
+    # Avoid circular imports
+    from website.project.model import CloneJob
+    try:
+        CloneJob.load(job_id).run()
+    except Exception as error:
+        logger.exception('Clone job {0} failed'.format(job_id))
+        # Drop records modified by the batch that was rolled back
+        StoredObject._clear_caches()
+        if self.request.retries >= self.max_retries:
+            with TokuTransaction():
+                CloneJob.load(job_id).fail(error)
+            raise
+        raise self.retry(exc=error)
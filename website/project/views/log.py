@@ -50,12 +50,11 @@ def _get_logs(node, count, auth, link=None, page=0):
 
     """
     logs_set = node.get_aggregate_logs_queryset(auth)
-    total = len(logs_set)
-    start = page * count
-    stop = start + count
+    total = logs_set.count()
+    anonymous = has_anonymous_link(node, auth)
     logs = [
-        serialize_log(log, auth=auth, anonymous=has_anonymous_link(node, auth))
-        for log in logs_set[start:stop]
+        serialize_log(log, auth=auth, anonymous=anonymous)
+        for log in logs_set.offset(page * count).limit(count)
     ]
     pages = math.ceil(total / float(count))
     return logs, total, pages
@@ -13,6 +13,7 @@ from framework.utils import iso8601format
 from framework.mongo import StoredObject
 from framework.auth.decorators import must_be_logged_in, collect_auth
 from framework.exceptions import HTTPError, PermissionsError
+from framework.tasks.handlers import enqueue_task
 from framework.mongo.utils import from_mongo, get_or_http_error
 
 from website import language
@@ -32,11 +33,13 @@ from website.util.permissions import ADMIN, READ, WRITE
 from website.util.rubeus import collect_addon_js
 from website.project.model import has_anonymous_link, get_pointer_parent, NodeUpdateError
 from website.project.forms import NewNodeForm
-from website.models import Node, Pointer, WatchConfig, PrivateLink
+from website.models import Node, Pointer, WatchConfig, PrivateLink, CloneJob
 from website import settings
 from website.views import _render_nodes, find_dashboard
 from website.profile import utils
 from website.project import new_folder
+from website.project import counters
+from website.project import tasks as project_tasks
 from website.util.sanitize import strip_html
 
 logger = logging.getLogger(__name__)
@@ -252,13 +255,35 @@ def node_fork_page(auth, node, **kwargs):
             redirect_url=node.url
         )
     try:
-        fork = node.fork_node(auth)
+        job = CloneJob.create(CloneJob.FORK, node, auth)
     except PermissionsError:
         raise HTTPError(
             http.FORBIDDEN,
             redirect_url=node.url
         )
-    return fork.url
+    return _start_clone_job(job)
+
+
+def _start_clone_job(job, status_code=http.OK):
+    """Queue a fork or registration job to run after the request, or run it
+    immediately if Celery is disabled.
+    """
+    if settings.USE_CELERY:
+        enqueue_task(project_tasks.run_clone_job.si(job._id))
+        return job.to_json(), http.ACCEPTED
+    job.run()
+    return job.to_json(), status_code
+
+
+@must_be_logged_in
+@must_be_valid_project
+def clone_job_status(auth, node, job_id, **kwargs):
+    job = CloneJob.load(job_id)
+    if job is None or job.node != node:
+        raise HTTPError(http.NOT_FOUND)
+    if job.user != auth.user:
+        raise HTTPError(http.FORBIDDEN)
+    return job.to_json()
 
 
 @must_be_valid_project
@@ -692,6 +717,7 @@ def _view_project(node, auth, primary=False):
     anonymous = has_anonymous_link(node, auth)
     widgets, configs, js, css = _render_addon(node)
     redirect_url = node.url + '?view_only=None'
+    node_counters = counters.get_node_counters(node)
 
     # Before page load callback; skip if not primary call
     if primary:
@@ -717,7 +743,7 @@ def _view_project(node, auth, primary=False):
             'is_public': node.is_public,
             'date_created': iso8601format(node.date_created),
             'date_modified': iso8601format(node.logs[-1].date) if node.logs else '',
-            'tags': [tag._primary_key for tag in node.tags],
+            'tags': node.tags._to_primary_keys(),
             'children': bool(node.nodes),
             'is_registration': node.is_registration,
             'registered_from_url': node.registered_from.url if node.is_registration else '',
@@ -729,18 +755,18 @@ def _view_project(node, auth, primary=False):
                 }
                 for meta in node.registered_meta or []
             ],
-            'registration_count': len(node.node__registrations),
+            'registration_count': node_counters['registrations'],
             'is_fork': node.is_fork,
             'forked_from_id': node.forked_from._primary_key if node.is_fork else '',
             'forked_from_display_absolute_url': node.forked_from.display_absolute_url if node.is_fork else '',
             'forked_date': iso8601format(node.forked_date) if node.is_fork else '',
-            'fork_count': len(node.node__forked.find(Q('is_deleted', 'eq', False))),
-            'templated_count': len(node.templated_list),
-            'watched_count': len(node.watchconfig__watched),
+            'fork_count': node_counters['forks'],
+            'templated_count': node_counters['templates'],
+            'watched_count': node_counters['watchers'],
             'private_links': [x.to_json() for x in node.private_links_active],
             'link': view_only_link,
             'anonymous': anonymous,
-            'points': len(node.get_points(deleted=False, folders=False)),
+            'points': node_counters['pointers'],
             'piwik_site_id': node.piwik_site_id,
             'comment_level': node.comment_level,
             'has_comments': bool(getattr(node, 'commented', [])),
@@ -847,20 +873,12 @@ def get_editable_children(auth, node, **kwargs):
     }
 
 
-def _get_user_activity(node, auth, rescale_ratio):
+def _get_user_activity(node, auth, rescale_ratio, node_counters=None):
 
     # Counters
-    total_count = len(node.logs)
-
-    # Note: It's typically much faster to find logs of a given node
-    # attached to a given user using node.logs.find(...) than by
-    # loading the logs into Python and checking each one. However,
-    # using deep caching might be even faster down the road.
-
-    if auth.user:
-        ua_count = node.logs.find(Q('user', 'eq', auth.user)).count()
-    else:
-        ua_count = 0
+    node_counters = node_counters or counters.get_node_counters(node)
+    total_count = node_counters['logs']
+    ua_count = counters.get_user_log_count(node_counters, auth.user)
 
     non_ua_count = total_count - ua_count  # base length of blue bar
 
@@ -916,9 +934,12 @@ def _get_summary(node, auth, rescale_ratio, primary=True, link_id=None):
             'is_public': node.is_public
         })
         if rescale_ratio:
-            ua_count, ua, non_ua = _get_user_activity(node, auth, rescale_ratio)
+            node_counters = counters.get_node_counters(node)
+            ua_count, ua, non_ua = _get_user_activity(
+                node, auth, rescale_ratio, node_counters=node_counters
+            )
             summary.update({
-                'nlogs': len(node.logs),
+                'nlogs': node_counters['logs'],
                 'ua_count': ua_count,
                 'ua': ua,
                 'non_ua': non_ua,
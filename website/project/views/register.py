@@ -22,11 +22,12 @@ from website.project.metadata.schemas import OSF_META_SCHEMAS
 from website.util.permissions import ADMIN
 from website.models import MetaSchema
 from website.models import NodeLog
+from website.models import CloneJob
 from website import language
 
 from website.identifiers.client import EzidClient
 
-from .node import _view_project
+from .node import _view_project, _start_clone_job
 from .. import clean_template_name
 
 
@@ -151,14 +152,11 @@ def node_register_template_page_post(auth, node, **kwargs):
     schema = MetaSchema.find(
         Q('name', 'eq', template)
     ).sort('-schema_version')[0]
-    register = node.register_node(
-        schema, auth, template, json.dumps(clean_data),
+    job = CloneJob.create(
+        CloneJob.REGISTRATION, node, auth,
+        schema=schema, template=template, data=json.dumps(clean_data),
     )
-
-    return {
-        'status': 'success',
-        'result': register.url,
-    }, http.CREATED
+    return _start_clone_job(job, http.CREATED)
 
 
 def _build_ezid_metadata(node):
@@ -1173,6 +1173,12 @@ def make_url_map(app):
             ], 'post', project_views.node.fork_pointer, json_renderer,
         ),
 
+        # Progress of fork and registration jobs
+        Rule([
+            '/project/<pid>/clone/<job_id>/',
+            '/project/<pid>/node/<nid>/clone/<job_id>/',
+        ], 'get', project_views.node.clone_job_status, json_renderer),
+
         # View forks
         Rule([
             '/project/<pid>/forks/',
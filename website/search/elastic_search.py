@@ -3,14 +3,16 @@
 from __future__ import division
 
 import re
-import copy
+import json
 import math
 import logging
 import unicodedata
 
 import six
+from modularodm import Q
 
 from elasticsearch import (
+    helpers,
     Elasticsearch,
     RequestError,
     NotFoundError,
@@ -18,6 +20,7 @@ from elasticsearch import (
 )
 
 from framework import sentry
+from framework.caching import TTLCache
 
 from website import settings
 from website.filters import gravatar
@@ -76,36 +79,48 @@ def requires_search(func):
     return wrapped
 
 
-@requires_search
-def get_counts(count_query, clean=True):
-    count_query['aggregations'] = {
-        'counts': {
-            'terms': {
-                'field': '_type',
-            }
-        }
-    }
+FACET_AGGREGATIONS = {
+    'tag_cloud': {
+        'terms': {'field': 'tags'}
+    },
+    'counts': {
+        'terms': {'field': '_type'}
+    },
+}
 
-    res = es.search(index=INDEX, doc_type=None, search_type='count', body=count_query)
+# Keys of a query body that do not affect its aggregations
+NON_FACET_KEYS = {'from', 'size', 'sort', 'post_filter', 'aggregations', 'aggs'}
 
-    counts = {x['key']: x['doc_count'] for x in res['aggregations']['counts']['buckets'] if x['key'] in ALIASES.keys()}
+facet_cache = TTLCache(
+    maxsize=settings.SEARCH_FACET_CACHE_SIZE,
+    ttl=settings.SEARCH_FACET_CACHE_TTL,
+) if settings.SEARCH_FACET_CACHE_TTL else None
+
+
+def get_counts(buckets):
+    counts = {x['key']: x['doc_count'] for x in buckets if x['key'] in ALIASES.keys()}
 
     counts['total'] = sum([val for val in counts.values()])
     return counts
 
 
-@requires_search
-def get_tags(query, index):
-    query['aggregations'] = {
-        'tag_cloud': {
-            'terms': {'field': 'tags'}
-        }
-    }
+def facet_cache_key(query, index):
+    return index, json.dumps(
+        {key: value for key, value in query.items() if key not in NON_FACET_KEYS},
+        sort_keys=True,
+    )
 
-    results = es.search(index=index, doc_type=None, body=query)
-    tags = results['aggregations']['tag_cloud']['buckets']
 
-    return tags
+def filter_doc_type(query, doc_type):
+    """Restrict the hits of ``query`` to ``doc_type`` with a post filter, so
+    that aggregations still count documents of every type.
+    """
+    if not doc_type or doc_type == '_all':
+        return
+    type_filter = {'terms': {'_type': doc_type.split(',')}}
+    if 'post_filter' in query:
+        type_filter = {'and': [query['post_filter'], type_filter]}
+    query['post_filter'] = type_filter
 
 
 @requires_search
@@ -122,27 +137,30 @@ def search(query, index=INDEX, doc_type='_all'):
         tags: A list of tags that are returned by the search query
         typeAliases: the doc_types that exist in the search database
     """
-    tag_query = copy.deepcopy(query)
-    count_query = copy.deepcopy(query)
-
-    for key in ['from', 'size', 'sort']:
-        try:
-            del tag_query[key]
-            del count_query[key]
-        except KeyError:
-            pass
-
-    tags = get_tags(tag_query, index)
-    counts = get_counts(count_query, index)
-
-    # Run the real query and get the results
-    raw_results = es.search(index=index, doc_type=doc_type, body=query)
+    query = dict(query)
+    cache_key = facet_cache_key(query, index)
+    facets = facet_cache.get(cache_key) if facet_cache is not None else None
+
+    # Hits, tag cloud and per-type counts are fetched in a single request
+    if facets is None:
+        query['aggregations'] = FACET_AGGREGATIONS
+    filter_doc_type(query, doc_type)
+    raw_results = es.search(index=index, doc_type=None, body=query)
+
+    if facets is None:
+        aggregations = raw_results['aggregations']
+        facets = {
+            'tags': aggregations['tag_cloud']['buckets'],
+            'counts': get_counts(aggregations['counts']['buckets']),
+        }
+        if facet_cache is not None:
+            facet_cache.set(cache_key, facets)
 
     results = [hit['_source'] for hit in raw_results['hits']['hits']]
     return_value = {
         'results': format_results(results),
-        'counts': counts,
-        'tags': tags,
+        'counts': facets['counts'],
+        'tags': facets['tags'],
         'typeAliases': ALIASES
     }
     return return_value
@@ -160,7 +178,11 @@ def format_results(results):
 
 
 def format_result(result, parent_id=None):
-    parent_info = load_parent(parent_id)
+    # Documents indexed before parent info was denormalized lack `parent_info`
+    if 'parent_info' in result:
+        parent_info = result['parent_info']
+    else:
+        parent_info = load_parent(parent_id)
     formatted_result = {
         'contributors': result['contributors'],
         'wiki_link': result['url'] + 'wiki/',
@@ -183,11 +205,17 @@ def format_result(result, parent_id=None):
 
 
 def load_parent(parent_id):
-    parent = Node.load(parent_id)
+    return serialize_parent(Node.load(parent_id))
+
+
+def serialize_parent(parent):
+    """Return the parent information shown alongside component results.
+    Private parents are masked.
+    """
     if parent is None:
         return None
     parent_info = {}
-    if parent is not None and parent.is_public:
+    if parent.is_public:
         parent_info['title'] = parent.title
         parent_info['url'] = parent.url
         parent_info['is_registration'] = parent.is_registration
@@ -200,8 +228,11 @@ def load_parent(parent_id):
     return parent_info
 
 
-@requires_search
-def update_node(node, index=INDEX):
+def node_action(node, index=INDEX):
+    """Build the bulk action that brings the search document for ``node`` up
+    to date: an index action for public nodes, a delete action otherwise.
+    Return `None` for orphaned components.
+    """
     from website.addons.wiki.model import NodeWikiPage
 
     component_categories = [k for k in Node.CATEGORY_MAP.keys() if not k == 'project']
@@ -218,57 +249,72 @@ def update_node(node, index=INDEX):
             category = 'registration' if node.is_registration else category
         except IndexError:
             # Skip orphaned components
-            return
+            return None
     if node.is_deleted or not node.is_public:
-        delete_doc(elastic_document_id, node)
-    else:
-        try:
-            normalized_title = six.u(node.title)
-        except TypeError:
-            normalized_title = node.title
-        normalized_title = unicodedata.normalize('NFKD', normalized_title).encode('ascii', 'ignore')
-
-        elastic_document = {
-            'id': elastic_document_id,
-            'contributors': [
-                {
-                    'fullname': x.fullname,
-                    'url': x.profile_url if x.is_active else None
-                }
-                for x in node.visible_contributors
-                if x is not None
-            ],
-            'title': node.title,
-            'normalized_title': normalized_title,
-            'category': category,
-            'public': node.is_public,
-            'tags': [tag._id for tag in node.tags if tag],
-            'description': node.description,
-            'url': node.url,
-            'is_registration': node.is_registration,
-            'registered_date': node.registered_date,
-            'wikis': {},
-            'parent_id': parent_id,
-            'date_created': node.date_created,
-            'boost': int(not node.is_registration) + 1,  # This is for making registered projects less relevant
+        return {
+            '_op_type': 'delete',
+            '_index': index,
+            '_type': 'registration' if node.is_registration else node.project_or_component,
+            '_id': elastic_document_id,
         }
-        for wiki in [
-            NodeWikiPage.load(x)
-            for x in node.wiki_pages_current.values()
-        ]:
-            elastic_document['wikis'][wiki.page_name] = wiki.raw_text(node)
 
-        es.index(index=index, doc_type=category, id=elastic_document_id, body=elastic_document, refresh=True)
+    try:
+        normalized_title = six.u(node.title)
+    except TypeError:
+        normalized_title = node.title
+    normalized_title = unicodedata.normalize('NFKD', normalized_title).encode('ascii', 'ignore')
+
+    elastic_document = {
+        'id': elastic_document_id,
+        'contributors': [
+            {
+                'fullname': x.fullname,
+                'url': x.profile_url if x.is_active else None
+            }
+            for x in node.visible_contributors
+            if x is not None
+        ],
+        'title': node.title,
+        'normalized_title': normalized_title,
+        'category': category,
+        'public': node.is_public,
+        'tags': [tag._id for tag in node.tags if tag],
+        'description': node.description,
+        'url': node.url,
+        'is_registration': node.is_registration,
+        'registered_date': node.registered_date,
+        'wikis': {},
+        'parent_id': parent_id,
+        'parent_info': serialize_parent(node.node__parent[0]) if parent_id else None,
+        'date_created': node.date_created,
+        'boost': int(not node.is_registration) + 1,  # This is for making registered projects less relevant
+    }
+    for wiki in [
+        NodeWikiPage.load(x)
+        for x in node.wiki_pages_current.values()
+    ]:
+        elastic_document['wikis'][wiki.page_name] = wiki.raw_text(node)
+
+    return {
+        '_op_type': 'index',
+        '_index': index,
+        '_type': category,
+        '_id': elastic_document_id,
+        '_source': elastic_document,
+    }
 
 
-@requires_search
-def update_user(user, index=INDEX):
+def user_action(user, index=INDEX):
+    """Build the bulk action that brings the search document for ``user`` up
+    to date: an index action for active users, a delete action otherwise.
+    """
     if not user.is_active:
-        try:
-            es.delete(index=index, doc_type='user', id=user._id, refresh=True, ignore=[404])
-        except NotFoundError:
-            pass
-        return
+        return {
+            '_op_type': 'delete',
+            '_index': index,
+            '_type': 'user',
+            '_id': user._id,
+        }
 
     names = dict(
         fullname=user.fullname,
@@ -302,7 +348,48 @@ def update_user(user, index=INDEX):
         'boost': 2,  # TODO(fabianvf): Probably should make this a constant or something
     }
 
-    es.index(index=index, doc_type='user', body=user_doc, id=user._id, refresh=True)
+    return {
+        '_op_type': 'index',
+        '_index': index,
+        '_type': 'user',
+        '_id': user._id,
+        '_source': user_doc,
+    }
+
+
+def bulk_update(actions, refresh=False):
+    """Send ``actions`` to elasticsearch with the bulk API. Unless ``refresh``
+    is set, new documents become searchable after the index's refresh
+    interval. Deletes of documents that are not indexed are ignored.
+    """
+    actions = [action for action in actions if action is not None]
+    if not actions:
+        return
+    _, errors = helpers.bulk(es, actions, refresh=refresh, raise_on_error=False)
+    for error in errors:
+        for op_type, item in error.items():
+            if not (op_type == 'delete' and item.get('status') == 404):
+                logger.error('Failed to {0} search document: {1}'.format(op_type, item))
+
+
+@requires_search
+def update_node(node, index=INDEX):
+    bulk_update([node_action(node, index=index)], refresh=True)
+
+
+@requires_search
+def bulk_update_nodes(nodes, index=INDEX):
+    bulk_update(node_action(node, index=index) for node in nodes)
+
+
+@requires_search
+def update_user(user, index=INDEX):
+    bulk_update([user_action(user, index=index)], refresh=True)
+
+
+@requires_search
+def bulk_update_users(users, index=INDEX):
+    bulk_update(user_action(user, index=index) for user in users)
 
 
 @requires_search
@@ -364,19 +451,29 @@ def search_contributor(query, page=0, size=10, exclude=[], current_user=None):
     docs = results['results']
     pages = math.ceil(results['counts'].get('user', 0) / size)
 
+    users_by_id = {
+        user._id: user
+        for user in User.find(Q('_id', 'in', [doc['id'] for doc in docs]))
+    }
+    if current_user:
+        current_user_projects = set(current_user.node__contributed._to_primary_keys())
+
     users = []
     for doc in docs:
         # TODO: use utils.serialize_user
-        user = User.load(doc['id'])
+        user = users_by_id.get(doc['id'])
+
+        if user is None:
+            logger.error('Could not load user {0}'.format(doc['id']))
+            continue
 
         if current_user:
-            n_projects_in_common = current_user.n_projects_in_common(user)
+            n_projects_in_common = len(
+                current_user_projects.intersection(user.node__contributed._to_primary_keys())
+            )
         else:
             n_projects_in_common = 0
 
-        if user is None:
-            logger.error('Could not load user {0}'.format(doc['id']))
-            continue
         if user.is_active:  # exclude merged, unregistered, etc.
             current_employment = None
             education = None
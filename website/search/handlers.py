@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""Defer search indexing until the end of the current request or Celery task.
+Nodes and users saved during a unit of work are collected in an `IndexQueue`
+and sent to the search engine in bulk when the unit of work ends; saving the
+same record several times produces a single index operation.
+"""
+
+import logging
+import threading
+import collections
+
+from flask import g
+
+from framework.sentry import log_exception
+from framework.transactions import handlers as transaction_handlers
+
+from website.search import exceptions
+
+
+logger = logging.getLogger(__name__)
+
+# Holds the queue of the Celery task running on the current thread
+_task_local = threading.local()
+
+
+class IndexQueue(object):
+    """Ordered, de-duplicated collection of records awaiting indexing.
+    """
+
+    def __init__(self):
+        self.nodes = collections.OrderedDict()
+        self.users = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self.nodes) + len(self.users)
+
+    def add_node(self, node, index):
+        self.nodes[(index, node._id)] = node
+
+    def add_user(self, user, index):
+        self.users[(index, user._id)] = user
+
+    def flush(self):
+        """Send all queued records to the search engine and empty the queue.
+        """
+        from website.search import search
+        nodes, self.nodes = self.nodes, collections.OrderedDict()
+        users, self.users = self.users, collections.OrderedDict()
+        try:
+            for index, records in _group_by_index(nodes).items():
+                search.bulk_update_nodes(records, index=index)
+            for index, records in _group_by_index(users).items():
+                search.bulk_update_users(records, index=index)
+        except exceptions.SearchUnavailableError as error:
+            logger.exception(error)
+            log_exception()
+
+
+def _group_by_index(records):
+    grouped = collections.OrderedDict()
+    for (index, _), record in records.items():
+        grouped.setdefault(index, []).append(record)
+    return grouped
+
+
+def get_queue():
+    """Return the queue for the current request or task, or `None` if records
+    should be indexed immediately.
+    """
+    try:
+        return g._search_queue
+    except (AttributeError, RuntimeError):
+        return getattr(_task_local, 'queue', None)
+
+
+def search_before_request():
+    g._search_queue = IndexQueue()
+
+
+def search_teardown_request(error=None):
+    try:
+        queue = g._search_queue
+    except AttributeError:
+        return
+    # Index only changes that were committed; requests without a transaction
+    # write immediately
+    status = transaction_handlers.get_transaction_status()
+    if error is None and status in (None, transaction_handlers.COMMITTED):
+        queue.flush()
+    del g._search_queue
+
+
+def search_task_prerun(*args, **kwargs):
+    _task_local.queue = IndexQueue()
+
+
+def search_task_postrun(state=None, *args, **kwargs):
+    queue = getattr(_task_local, 'queue', None)
+    _task_local.queue = None
+    # Tasks that fail or are retried roll back their transactions
+    if queue is not None and state == 'SUCCESS':
+        queue.flush()
+
+
+handlers = {
+    'before_request': search_before_request,
+    'teardown_request': search_teardown_request,
+}
@@ -2,6 +2,7 @@ import logging
 
 from website import settings
 from website.search import share_search
+from website.search.handlers import get_queue
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +26,15 @@ def search(query, index=settings.ELASTIC_INDEX, doc_type=None):
 
 @requires_search
 def update_node(node, index=settings.ELASTIC_INDEX):
-    search_engine.update_node(node, index=index)
+    queue = get_queue()
+    if queue is not None:
+        queue.add_node(node, index)
+    else:
+        search_engine.update_node(node, index=index)
+
+@requires_search
+def bulk_update_nodes(nodes, index=settings.ELASTIC_INDEX):
+    search_engine.bulk_update_nodes(nodes, index=index)
 
 @requires_search
 def delete_node(node, index=settings.ELASTIC_INDEX):
@@ -37,7 +46,15 @@ def delete_node(node, index=settings.ELASTIC_INDEX):
 
 @requires_search
 def update_user(user, index=settings.ELASTIC_INDEX):
-    search_engine.update_user(user, index=index)
+    queue = get_queue()
+    if queue is not None:
+        queue.add_user(user, index)
+    else:
+        search_engine.update_user(user, index=index)
+
+@requires_search
+def bulk_update_users(users, index=settings.ELASTIC_INDEX):
+    search_engine.bulk_update_users(users, index=index)
 
 
 @requires_search
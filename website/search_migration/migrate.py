@@ -2,19 +2,27 @@
 # -*- coding: utf-8 -*-
 '''Migration script for Search-enabled Models.'''
 from __future__ import absolute_import
+from __future__ import division
 
+import re
+import sys
+import time
 import logging
+import itertools
+import multiprocessing
 
-from elasticsearch import helpers
+from elasticsearch import helpers, Elasticsearch
 from modularodm.query.querydialect import DefaultQueryDialect as Q
 
 from website import settings
 from framework.auth import User
+from framework.mongo import database, client_pool, StoredObject
 from website.models import Node
 from website.app import init_app
 import website.search.search as search
-from scripts import utils as script_utils
+from website.search import elastic_search
 from website.search.elastic_search import es
+from scripts import utils as script_utils
 
 
 logger = logging.getLogger(__name__)
@@ -22,41 +30,181 @@ logger = logging.getLogger(__name__)
 app = init_app("website.settings", set_backends=True, routes=True)
 
 
-def migrate_nodes(index):
-    logger.info("Migrating nodes to index: {}".format(index))
-    n_iter = 0
-    nodes = Node.find(Q('is_public', 'eq', True) & Q('is_deleted', 'eq', False))
-    for node in nodes:
-        search.update_node(node, index=index)
-        n_iter += 1
+# Number of records sent to elasticsearch per bulk request
+BATCH_SIZE = 500
+# Number of records per unit of work handed to the process pool
+RANGE_SIZE = 10000
+
+CHECKPOINT_COLLECTION = 'searchmigration'
+
+
+def _checkpoints():
+    return database[CHECKPOINT_COLLECTION]
+
+
+def _get_models():
+    """Map each doc type to its model, the query selecting the records to
+    index (as a modular-odm query and as the equivalent raw Mongo filter),
+    and the function building its bulk action.
+    """
+    return {
+        'node': (
+            Node,
+            Q('is_public', 'eq', True) & Q('is_deleted', 'eq', False),
+            {'is_public': True, 'is_deleted': False},
+            elastic_search.node_action,
+        ),
+        'user': (
+            User,
+            None,
+            {},
+            elastic_search.user_action,
+        ),
+    }
+
+
+def _id_ranges(model, mongo_query, range_size=RANGE_SIZE):
+    """Split the `_id`s of records matching ``mongo_query`` into consecutive
+    ranges of at most ``range_size`` records. Each range is a `(lower, upper)`
+    pair where ``lower`` is exclusive (`None` for the first range) and
+    ``upper`` is inclusive.
+    """
+    ids = database[model._name].find(mongo_query, {'_id': True}).sort('_id', 1)
+    ranges = []
+    lower = None
+    for n, record in enumerate(ids, 1):
+        if n % range_size == 0:
+            ranges.append((lower, record['_id']))
+            lower = record['_id']
+    ranges.append((lower, None))
+    return ranges
+
+
+def create_checkpoints(index):
+    """Record the work for a migration into ``index``: one document per
+    `_id` range of each model, holding the last `_id` indexed so far.
+    """
+    for doc_type, (model, _, mongo_query, _) in _get_models().items():
+        for n, (lower, upper) in enumerate(_id_ranges(model, mongo_query)):
+            _checkpoints().insert({
+                '_id': '{0}:{1}:{2}'.format(index, doc_type, n),
+                'index': index,
+                'doc_type': doc_type,
+                'lower': lower,
+                'upper': upper,
+                'last': lower,
+                'done': False,
+            })
 
-    logger.info('Nodes migrated: {}'.format(n_iter))
 
+def get_pending_index(idx):
+    """Return the name of an interrupted migration's index for alias ``idx``,
+    or `None` if there is nothing to resume.
+    """
+    checkpoint = _checkpoints().find_one({
+        'index': {'$regex': '^{0}_v'.format(re.escape(idx))},
+        'done': False,
+    })
+    return checkpoint['index'] if checkpoint else None
 
-def migrate_users(index):
-    logger.info("Migrating users to index: {}".format(index))
-    n_migr = 0
-    n_iter = 0
-    for user in User.find():
-        if user.is_active:
-            search.update_user(user, index=index)
-            n_migr += 1
-        n_iter += 1
 
-    logger.info('Users iterated: {0}\nUsers migrated: {1}'.format(n_iter, n_migr))
+def reindex_range(checkpoint_id):
+    """Index the records in one checkpointed `_id` range, in batches of
+    `BATCH_SIZE`, starting after the last `_id` indexed. Return the number
+    of records indexed.
+    """
+    checkpoint = _checkpoints().find_one({'_id': checkpoint_id})
+    model, query, _, build_action = _get_models()[checkpoint['doc_type']]
+    last, upper = checkpoint['last'], checkpoint['upper']
+    n_indexed = 0
+    while True:
+        batch_query = query
+        if last is not None:
+            batch_query = _and(batch_query, Q('_id', 'gt', last))
+        if upper is not None:
+            batch_query = _and(batch_query, Q('_id', 'lte', upper))
+        records = list(model.find(batch_query).sort('_id').limit(BATCH_SIZE))
+        if not records:
+            break
+        elastic_search.bulk_update(
+            build_action(record, index=checkpoint['index'])
+            for record in records
+            if checkpoint['doc_type'] != 'user' or record.is_active
+        )
+        last = records[-1]._id
+        n_indexed += len(records)
+        _checkpoints().update({'_id': checkpoint_id}, {'$set': {'last': last}})
+        # Keep memory bounded; records are not revisited
+        StoredObject._clear_caches()
+    _checkpoints().update({'_id': checkpoint_id}, {'$set': {'done': True}})
+    return n_indexed
 
 
-def migrate(delete, index=settings.ELASTIC_INDEX):
+def _and(query, clause):
+    return clause if query is None else query & clause
+
+
+def _init_worker():
+    """Open fresh connections in each pool process instead of sharing the
+    parent's sockets.
+    """
+    elastic_search.es = Elasticsearch(
+        settings.ELASTIC_URI,
+        request_timeout=settings.ELASTIC_TIMEOUT
+    )
+    client_pool.reset()
+
+
+def migrate_records(index, processes=1):
+    """Index every pending checkpointed range for ``index``, using a pool of
+    ``processes`` workers, logging throughput as ranges complete.
+    """
+    pending = [
+        checkpoint['_id']
+        for checkpoint in _checkpoints().find({'index': index, 'done': False})
+    ]
+    logger.info('Migrating {0} ranges to index {1} with {2} process(es)'.format(
+        len(pending), index, processes
+    ))
+    if processes > 1:
+        pool = multiprocessing.Pool(processes, initializer=_init_worker)
+        results = pool.imap_unordered(reindex_range, pending)
+    else:
+        pool = None
+        results = itertools.imap(reindex_range, pending)
+
+    start = time.time()
+    n_indexed = 0
+    for n_ranges, count in enumerate(results, 1):
+        n_indexed += count
+        elapsed = time.time() - start
+        logger.info('Ranges: {0}/{1}; documents: {2}; {3:.1f} docs/s'.format(
+            n_ranges, len(pending), n_indexed, n_indexed / elapsed if elapsed else 0
+        ))
+
+    if pool is not None:
+        pool.close()
+        pool.join()
+    logger.info('Documents migrated: {}'.format(n_indexed))
+
+
+def migrate(delete, index=settings.ELASTIC_INDEX, processes=1, resume=False):
 
     script_utils.add_file_logger(logger, __file__)
     ctx = app.test_request_context()
     ctx.push()
-    new_index = set_up_index(index)
+    new_index = get_pending_index(index) if resume else None
+    if new_index:
+        logger.info('Resuming migration to {}'.format(new_index))
+    else:
+        new_index = set_up_index(index)
+        create_checkpoints(new_index)
 
-    migrate_nodes(new_index)
-    migrate_users(new_index)
+    migrate_records(new_index, processes=processes)
+    es.indices.refresh(index=new_index)
 
     set_up_alias(index, new_index)
+    _checkpoints().remove({'index': new_index})
 
     if delete:
         delete_old(new_index)
@@ -107,4 +255,8 @@ def delete_old(index):
 
 
 if __name__ == '__main__':
-    migrate(False)
+    migrate(
+        'delete' in sys.argv,
+        processes=multiprocessing.cpu_count(),
+        resume='resume' in sys.argv,
+    )
@@ -56,6 +56,10 @@ ELASTIC_URI = 'localhost:9200'
 ELASTIC_TIMEOUT = 10
 ELASTIC_INDEX = 'website'
 SHARE_ELASTIC_URI = ELASTIC_URI
+# Seconds to cache the tag cloud and per-type counts of a search query; 0 to
+# disable the cache
+SEARCH_FACET_CACHE_TTL = 0
+SEARCH_FACET_CACHE_SIZE = 1000
 # Sessions
 # TODO: Override SECRET_KEY in local.py in production
 COOKIE_NAME = 'osf'
@@ -76,6 +80,19 @@ SUPPORT_EMAIL = 'support@osf.io'
 MAIL_SERVER = 'smtp.sendgrid.net'
 MAIL_USERNAME = 'osf-smtp'
 MAIL_PASSWORD = ''  # Set this in local.py
+# Idle SMTP connections kept open per worker process
+MAIL_POOL_SIZE = 2
+# Seconds an idle SMTP connection is reused without a NOOP check
+MAIL_CONNECTION_MAX_IDLE = 30
+# Messages sent over a single SMTP connection before it is replaced
+MAIL_CONNECTION_MAX_MESSAGES = 500
+# Messages per `send_emails` task when sending in bulk
+MAIL_BULK_BATCH_SIZE = 200
+# Digest records fetched per round trip by scripts/send_digest.py
+DIGEST_BATCH_SIZE = 1000
+# Cached notification recipients per (node, event); seconds and entries
+NOTIFICATION_SUBSCRIBERS_CACHE_TTL = 60
+NOTIFICATION_SUBSCRIBERS_CACHE_SIZE = 2000
 
 # Mandrill
 MANDRILL_USERNAME = None
@@ -95,6 +112,9 @@ MAILGUN_API_KEY = None
 UPLOADS_PATH = os.path.join(BASE_PATH, 'uploads')
 MFR_CACHE_PATH = os.path.join(BASE_PATH, 'mfrcache')
 MFR_TEMP_PATH = os.path.join(BASE_PATH, 'mfrtemp')
+# Slot files limiting concurrent renders; must be shared by the worker
+# processes on a host
+MFR_RENDER_SLOTS_PATH = os.path.join(MFR_TEMP_PATH, 'slots')
 
 # Use Celery for file rendering
 USE_CELERY = True
@@ -105,6 +125,28 @@ USE_GNUPG = True
 # File rendering timeout (in ms)
 MFR_TIMEOUT = 30000
 
+# Bytes read per chunk when downloading files to render
+MFR_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Renders run at once by all worker processes on a host, overall and by file
+# extension
+MFR_MAX_CONCURRENT_RENDERS = 4
+MFR_MAX_CONCURRENT_RENDERS_BY_EXTENSION = {
+    '.pdf': 2,
+    '.docx': 1,
+    '.xlsx': 1,
+}
+# Seconds to wait before retrying a render deferred for lack of a slot
+MFR_RENDER_RETRY_DELAY = 5
+MFR_RENDER_MAX_RETRIES = 12
+# Seconds during which a web process will not enqueue the same render twice
+MFR_PENDING_RENDER_TTL = 60
+MFR_PENDING_RENDERS_SIZE = 10000
+# Size of the render cache in bytes before least recently used files are
+# evicted; None for no limit
+MFR_CACHE_MAX_SIZE = 10 * 1024 ** 3
+# Seconds between checks of the render cache size by each worker process
+MFR_CACHE_EVICTION_INTERVAL = 60 * 10
+
 # TODO: Override in local.py in production
 DB_HOST = 'localhost'
 DB_PORT = os_env.get('OSF_DB_PORT', 27017)
@@ -112,6 +154,31 @@ DB_NAME = 'osf20130903'
 DB_USER = None
 DB_PASS = None
 
+# Reuse one MongoClient per worker process instead of connecting and
+# authenticating on every request
+DB_POOLED_CLIENT = True
+DB_MAX_POOL_SIZE = 100
+# Seconds between liveness checks of the pooled client
+DB_HEALTH_CHECK_INTERVAL = 30
+
+# Compiled Mako templates kept in memory by each process
+TEMPLATE_CACHE_SIZE = 500
+# Recompile templates whose files have changed since they were cached; always
+# enabled in debug mode
+TEMPLATE_CACHE_CHECK_MTIME = False
+
+# Log embedded templates that take longer than this many milliseconds
+NESTED_RENDER_SLOW_MS = 200
+
+# Seconds to cache the rendered HTML of constant pages (about, FAQ, etc.) for
+# anonymous visitors; 0 to disable
+STATIC_PAGE_CACHE_TTL = 300
+STATIC_PAGE_CACHE_SIZE = 200
+
+# Seconds to cache the view that a GUID URL resolves to
+GUID_RESOLUTION_CACHE_TTL = 60 * 10
+GUID_RESOLUTION_CACHE_SIZE = 10000
+
 # Cache settings
 SESSION_HISTORY_LENGTH = 5
 SESSION_HISTORY_IGNORE_RULES = [
@@ -119,6 +186,21 @@ SESSION_HISTORY_IGNORE_RULES = [
     lambda url: 'favicon' in url,
     lambda url: url.startswith('/api/'),
 ]
+SESSION_HISTORY_COOKIE_NAME = 'osf_history'
+
+# Session storage: 'mongo', or 'cached' to serve sessions from an in-process
+# cache that writes through to MongoDB
+SESSION_BACKEND = 'mongo'
+SESSION_CACHE_TTL = 30
+SESSION_CACHE_SIZE = 10000
+# Seconds after their last write that sessions expire
+SESSION_TTL = 60 * 60 * 24 * 30
+# Seconds after which an unchanged session is written again to postpone expiry
+SESSION_TOUCH_INTERVAL = 60 * 60 * 24
+
+# Seconds after which unchanged cache version stamps expire; must exceed the
+# TTL of every cache checked against stamps
+CACHE_STAMP_TTL = 60 * 60 * 24
 
 # TODO: Configuration should not change between deploys - this should be dynamic.
 CANONICAL_DOMAIN = 'openscienceframework.org'
@@ -176,9 +258,13 @@ CELERY_IMPORTS = (
     'framework.render.tasks',
     'framework.analytics.tasks',
     'website.mailchimp_utils',
+    'website.project.tasks',
     'scripts.send_digest'
 )
 
+# Number of nodes copied per transaction by fork and registration jobs
+CLONE_JOB_BATCH_SIZE = 20
+
 # Add-ons
 # Load addons from addons.json
 with open(os.path.join(ROOT, 'addons.json')) as fp:
@@ -237,6 +323,13 @@ DEFAULT_HMAC_SECRET = 'changeme'
 DEFAULT_HMAC_ALGORITHM = hashlib.sha256
 WATERBUTLER_URL = 'http://localhost:7777'
 WATERBUTLER_ADDRS = ['127.0.0.1']
+# Grants returned to WaterButler by `get_auth` are cached per process for
+# this many seconds
+WATERBUTLER_AUTH_CACHE_TTL = 30
+WATERBUTLER_AUTH_CACHE_SIZE = 2000
+# Seconds to cache file metadata fetched from WaterButler
+WATERBUTLER_METADATA_CACHE_TTL = 60
+WATERBUTLER_METADATA_CACHE_SIZE = 5000
 
 # Test identifier namespaces
 DOI_NAMESPACE = 'doi:10.5072/FK2'
@@ -88,6 +88,31 @@ var putJSON = function(url, data, success, error) {
     return $.ajax(ajaxOpts);
 };
 
+/**
+  * Wait for a fork or registration job to finish, polling its status URL.
+  * Resolves with the final job status if the job succeeds; rejects otherwise.
+  *
+  * @param  {Object} job Job status, as returned when the job is started
+  * @param  {Number} interval Milliseconds between polls
+  * @return {jQuery Promise}
+  */
+var waitForJob = function(job, interval) {
+    var ret = $.Deferred();
+    var check = function(job) {
+        if (job.status === 'success') {
+            ret.resolve(job);
+        } else if (job.status === 'failure') {
+            ret.reject(job);
+        } else {
+            setTimeout(function() {
+                $.getJSON(job.status_url).done(check).fail(ret.reject);
+            }, interval || 2000);
+        }
+    };
+    check(job);
+    return ret.promise();
+};
+
 var errorDefaultShort = 'Unable to resolve';
 var errorDefaultLong = 'OSF was unable to resolve your request. If this issue persists, ' +
     'please report it to <a href="mailto:support@osf.io">support@osf.io</a>.';
@@ -476,6 +501,7 @@ ko.bindingHandlers.listing = {
 module.exports = window.$.osf = {
     postJSON: postJSON,
     putJSON: putJSON,
+    waitForJob: waitForJob,
     handleJSONError: handleJSONError,
     handleEditableError: handleEditableError,
     block: block,
@@ -26,13 +26,10 @@ function registerNode(data) {
         data: JSON.stringify(data),
         contentType: 'application/json',
         dataType: 'json'
-    }).done(function(response) {
-        if (response.status === 'success') {
-            window.location.href = response.result;
-        }
-        else if (response.status === 'error') {
-            registration_failed();
-        }
+    }).then(function(response) {
+        return $osf.waitForJob(response);
+    }).done(function(job) {
+        window.location.href = job.result;
     }).fail(function() {
         registration_failed();
     });
@@ -40,8 +40,10 @@ NodeActions.forkNode = function() {
         $osf.postJSON(
             ctx.node.urls.api + 'fork/',
             {}
-        ).done(function(response) {
-            window.location = response;
+        ).then(function(response) {
+            return $osf.waitForJob(response);
+        }).done(function(job) {
+            window.location = job.result;
         }).fail(function(response) {
             $osf.unblock();
             if (response.status === 403) {
@@ -8,6 +8,7 @@ import hurry.filesize
 from modularodm import Q
 
 from framework.auth.decorators import Auth
+from framework.mongo import prefetch
 
 from website.util import paths
 from website.settings import (
@@ -278,7 +279,7 @@ class NodeProjectCollector(object):
         modified_delta = delta_date(node.date_modified)
         date_modified = node.date_modified.isoformat()
         contributors = []
-        for contributor in node.contributors:
+        for contributor in prefetch(node.contributors):
             if contributor._id in node.visible_contributor_ids:
                 contributor_name = [
                     contributor.family_name,
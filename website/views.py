@@ -4,6 +4,7 @@ import itertools
 import math
 import httplib as http
 
+import bson
 from modularodm import Q
 from flask import request
 
@@ -11,10 +12,12 @@ from framework import utils
 from framework import sentry
 from framework.auth.core import User
 from framework.flask import redirect  # VOL-aware redirect
-from framework.routing import proxy_url
+from framework.routing import dispatch
+from framework.routing import match_url
 from framework.exceptions import HTTPError
 from framework.auth.forms import SignInForm
 from framework.forms import utils as form_utils
+from framework.guid import resolution as guid_resolution
 from framework.guid.model import GuidStoredObject
 from framework.auth.forms import RegistrationForm
 from framework.auth.forms import ResetPasswordForm
@@ -26,6 +29,7 @@ from website.models import Guid
 from website.models import Node
 from website.util import rubeus
 from website.project import model
+from website.project import counters
 from website.util import web_url_for
 from website.util import permissions
 from website.project import new_dashboard
@@ -44,10 +48,11 @@ def _rescale_ratio(auth, nodes):
     """
     if not nodes:
         return 0
+    nodes = [node.resolve() for node in nodes if node.can_view(auth)]
+    node_counters = counters.get_counters(nodes)
     counts = [
-        len(node.logs)
+        node_counters[node._id]['logs']
         for node in nodes
-        if node.can_view(auth)
     ]
     if counts:
         return float(max(counts))
@@ -253,18 +258,39 @@ def watched_logs_get(**kwargs):
             message_long='Invalid value for "size".'
         ))
 
-    total = sum(1 for x in user.get_recent_log_ids())
-    paginated_logs, pages = paginate(user.get_recent_log_ids(), total, page, size)
-    logs = (model.NodeLog.load(id) for id in paginated_logs)
+    # Logs older than the `cursor` log id; takes precedence over `page`
+    cursor = request.args.get('cursor') or None
+    if cursor is not None and not bson.ObjectId.is_valid(cursor):
+        raise HTTPError(http.BAD_REQUEST, data=dict(
+            message_long='Invalid value for "cursor".'
+        ))
+
+    total = user.count_recent_log_ids()
+    if cursor:
+        log_ids = list(itertools.islice(user.get_recent_log_ids(before=cursor), size))
+        pages = math.ceil(total / float(size))
+    else:
+        paginated_logs, pages = paginate(user.get_recent_log_ids(), total, page, size)
+        log_ids = list(paginated_logs)
 
     return {
-        "logs": [serialize_log(log) for log in logs],
+        "logs": [serialize_log(log) for log in load_logs(log_ids)],
         "total": total,
         "pages": pages,
-        "page": page
+        "page": page,
+        "cursor": log_ids[-1] if len(log_ids) == size else None,
     }
 
 
+def load_logs(log_ids):
+    """Load logs in a single query, preserving the order of ``log_ids``."""
+    logs = dict(
+        (log._id, log)
+        for log in model.NodeLog.find(Q('_id', 'in', log_ids))
+    )
+    return [logs[log_id] for log_id in log_ids if log_id in logs]
+
+
 def serialize_log(node_log, auth=None, anonymous=False):
     '''Return a dictionary representation of the log.'''
     return {
@@ -312,6 +338,19 @@ def _build_guid_url(base, suffix=None):
     return u'/{0}/'.format(url)
 
 
+def _inject_referent(referent, view_kwargs):
+    """Pass a node referent to the target view so that its decorators need
+    not load it again. Deleted nodes are left to the decorators, which report
+    them as gone.
+    """
+    view_kwargs = dict(view_kwargs)
+    if (isinstance(referent, Node) and not referent.is_deleted and
+            view_kwargs.get('pid') == referent._primary_key and
+            'nid' not in view_kwargs):
+        view_kwargs['node'] = referent
+    return view_kwargs
+
+
 def resolve_guid(guid, suffix=None):
     """Load GUID by primary key, look up the corresponding view function in the
     routing table, and return the return value of the view function without
@@ -321,6 +360,14 @@ def resolve_guid(guid, suffix=None):
     :param str suffix: Remainder of URL after the GUID
     :return: Return value of proxied view function
     """
+    # Dispatch straight to the view this GUID resolved to before
+    cached = guid_resolution.get_resolution(guid, suffix, request.method)
+    if cached is not None:
+        referent = cached.model.load(cached.primary_key)
+        if referent is not None and referent.deep_url == cached.deep_url:
+            return dispatch(cached.endpoint, _inject_referent(referent, cached.view_kwargs))
+        guid_resolution.invalidate_resolution(guid)
+
     # Look up GUID
     guid_object = Guid.load(guid)
     if guid_object:
@@ -342,7 +389,15 @@ def resolve_guid(guid, suffix=None):
         if not referent.deep_url:
             raise HTTPError(http.NOT_FOUND)
         url = _build_guid_url(referent.deep_url, suffix)
-        return proxy_url(url)
+        endpoint, view_kwargs = match_url(url)
+        guid_resolution.set_resolution(
+            guid, suffix, request.method,
+            guid_resolution.Resolution(
+                type(referent), referent._primary_key, referent.deep_url,
+                endpoint, view_kwargs,
+            ),
+        )
+        return dispatch(endpoint, _inject_referent(referent, view_kwargs))
 
     # GUID not found; try lower-cased and redirect if exists
     guid_object_lower = Guid.load(guid.lower())